@@ -0,0 +1,306 @@
+"""Throughput and latency of the main endpoints, driven in-process.
+
+Run from the repository root against a scratch database:
+
+    PYTHONPATH=src:benchmarks python benchmarks/api_latency.py --seed --output results.json
+    PYTHONPATH=src:benchmarks python benchmarks/api_latency.py --baseline results.json --max-regression 0.2
+
+The application is called directly as an ASGI app, lifespan included, so the
+numbers cover routing, middleware, validation, serialization and the database,
+but no sockets or HTTP parsing. Each case sends its requests from
+``--concurrency`` tasks after ``--warmup`` untimed ones. Reads run before
+writes, so they see the seeded data.
+
+``--seed`` empties every table of the schema (users included) and fills it with
+synthetic rows, as explain_plans.py does; without it the data already in the
+database is used. A benchmark admin user is created either way.
+
+The results are printed and, with ``--output``, written as JSON. With
+``--baseline``, a case whose p95 latency grew or whose throughput fell by more
+than ``--max-regression`` against the baseline file fails the run (exit status 1),
+and so does any request answered with an unexpected status.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable
+from urllib.parse import urlencode
+
+from sqlalchemy import text
+
+from common import latency_summary
+from explain_plans import SCHEMA, seed
+from main import app
+from project.infrastructure.postgres.database import database, metadata
+from project.resource.auth import get_password_hash
+from project.services.indexes import warm_up_indexes
+
+
+BENCHMARK_EMAIL = "benchmark@example.com"
+BENCHMARK_PASSWORD = "benchmark"
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    body: bytes = b""
+    content_type: str | None = None
+
+
+@dataclass
+class Case:
+    name: str
+    requests: int
+    make_request: Callable[[int], Request]
+    expected_status: int = 200
+
+
+class ASGIClient:
+    """Sends requests straight to an ASGI application and returns (status, body)."""
+
+    def __init__(self, app, headers: dict[str, str] | None = None) -> None:
+        self._app = app
+        self.headers = dict(headers or {})
+
+    async def send(self, request: Request) -> tuple[int, bytes]:
+        path, _, query = request.path.partition("?")
+        headers = {"host": "benchmark", **self.headers, "content-length": str(len(request.body))}
+        if request.content_type is not None:
+            headers["content-type"] = request.content_type
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(name.encode(), value.encode()) for name, value in headers.items()],
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80),
+        }
+        body_sent = False
+        response_complete = asyncio.Event()
+        status_code, chunks = 500, []
+
+        async def receive() -> dict:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": request.body, "more_body": False}
+            # Anything that listens for a disconnect hears of it once the response is out.
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_complete.set()
+
+        await self._app(scope, receive, send)
+        response_complete.set()
+        return status_code, b"".join(chunks)
+
+
+async def ensure_benchmark_user() -> None:
+    async with database.session() as session:
+        await session.execute(text(
+            f"INSERT INTO {SCHEMA}.users (first_name, last_name, email, password, is_admin) "
+            f"VALUES ('Benchmark', 'Benchmark', :email, :password, true) "
+            f"ON CONFLICT (email) DO UPDATE SET password = excluded.password, is_admin = true"
+        ), {"email": BENCHMARK_EMAIL, "password": get_password_hash(BENCHMARK_PASSWORD)})
+
+
+async def empty_tables() -> None:
+    tables = ", ".join(f"{SCHEMA}.{table.name}" for table in metadata.sorted_tables)
+    async with database.session() as session:
+        await session.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+async def load_keys() -> dict:
+    async with database.session() as session:
+        routes = list(await session.scalars(text(f"SELECT route_number FROM {SCHEMA}.routes ORDER BY route_number LIMIT 1000")))
+        drivers = list(await session.scalars(text(f"SELECT passport_number FROM {SCHEMA}.drivers ORDER BY passport_number LIMIT 1000")))
+        buses = list(await session.scalars(text(f"SELECT gos_num FROM {SCHEMA}.buses ORDER BY gos_num LIMIT 1000")))
+        last_trip_date = await session.scalar(text(f"SELECT max(trip_date) FROM {SCHEMA}.trips"))
+    if not (routes and drivers and buses):
+        sys.exit("The database has no routes, drivers or buses; run with --seed")
+    # Trips are written on days after every stored one, so that they never conflict with them.
+    first_free_date = max(last_trip_date or date(2024, 1, 1), date.today()) + timedelta(days=1)
+    return {"routes": routes, "drivers": drivers, "buses": buses, "first_free_date": first_free_date}
+
+
+def login_request() -> Request:
+    body = urlencode({"username": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD}).encode()
+    return Request("POST", "/token", body, "application/x-www-form-urlencoded")
+
+
+def build_cases(args: argparse.Namespace, keys: dict) -> list[Case]:
+    routes, drivers, buses = keys["routes"], keys["drivers"], keys["buses"]
+    # Trips fill hourly slots from 05:00, with each driver and bus once per slot, so none of them conflict.
+    slots = min(len(drivers), len(buses))
+    trips_per_day = 18 * slots
+    first_free_date = keys["first_free_date"]
+    # The added trips, warm-up ones included, come first; each bulk batch takes a day after them.
+    first_bulk_date = first_free_date + timedelta(days=(args.requests + args.warmup) // trips_per_day + 1)
+
+    def trip(trip_date: date, position: int) -> dict:
+        hour = 5 + position // slots
+        return {
+            "driver_passport": drivers[position % len(drivers)],
+            "route_number": routes[position % len(routes)],
+            "gos_num": buses[position % len(buses)],
+            "trip_date": trip_date.isoformat(),
+            "start_time": f"{hour:02}:00:00",
+            "end_time": f"{hour:02}:50:00",
+        }
+
+    def add_trip(i: int) -> Request:
+        trip_date = first_free_date + timedelta(days=i // trips_per_day)
+        return Request("POST", "/add_trip", json.dumps(trip(trip_date, i % trips_per_day)).encode(), "application/json")
+
+    def bulk_trips(i: int) -> Request:
+        trip_date = first_bulk_date + timedelta(days=i)
+        rows = [trip(trip_date, position) for position in range(min(args.bulk_rows, trips_per_day))]
+        return Request("POST", "/bulk/trips", json.dumps(rows).encode(), "application/json")
+
+    page = f"limit={args.page_size}"
+    return [
+        Case("POST /token", args.login_requests, lambda i: login_request()),
+        Case("GET /all_stops", args.requests, lambda i: Request("GET", f"/all_stops?{page}")),
+        Case("GET /all_routes", args.requests, lambda i: Request("GET", f"/all_routes?{page}")),
+        Case("GET /all_trips", args.requests, lambda i: Request("GET", f"/all_trips?{page}")),
+        Case("GET /all_stop_times", args.requests, lambda i: Request("GET", f"/all_stop_times?{page}")),
+        Case("GET /route/{route_number}", args.requests, lambda i: Request("GET", f"/route/{routes[i % len(routes)]}")),
+        Case("GET /route/{route_number}/full", args.requests, lambda i: Request("GET", f"/route/{routes[i % len(routes)]}/full")),
+        Case("POST /add_trip", args.requests, add_trip, expected_status=201),
+        Case("POST /bulk/trips", args.bulk_requests, bulk_trips),
+    ]
+
+
+async def run_case(client: ASGIClient, case: Case, concurrency: int, warmup: int) -> dict:
+    # Warm-up requests get indices past the timed ones, so writes never repeat a key.
+    for i in range(case.requests, case.requests + min(warmup, case.requests)):
+        await client.send(case.make_request(i))
+
+    indices = iter(range(case.requests))
+    samples: list[float] = []
+    unexpected: dict[int, int] = {}
+
+    async def worker() -> None:
+        for i in indices:
+            request = case.make_request(i)
+            started_at = time.perf_counter()
+            status_code, _ = await client.send(request)
+            samples.append(time.perf_counter() - started_at)
+            if status_code != case.expected_status:
+                unexpected[status_code] = unexpected.get(status_code, 0) + 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    return {
+        "requests_per_sec": len(samples) / elapsed if elapsed else 0.0,
+        "unexpected_statuses": unexpected,
+        **latency_summary(samples),
+    }
+
+
+def regressions(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    found = []
+    for name, current in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            found.append(f"{name}: p95 {previous['p95_ms']:.1f} ms -> {current['p95_ms']:.1f} ms")
+        if current["requests_per_sec"] < previous["requests_per_sec"] * (1 - max_regression):
+            found.append(f"{name}: {previous['requests_per_sec']:.0f} -> {current['requests_per_sec']:.0f} requests/s")
+    return found
+
+
+async def benchmark(args: argparse.Namespace) -> dict:
+    if args.seed:
+        await empty_tables()
+        await seed(args)
+    await ensure_benchmark_user()
+    keys = await load_keys()
+
+    async with app.router.lifespan_context(app):
+        # The startup build of the indexes would otherwise run during the first cases.
+        await warm_up_indexes()
+        client = ASGIClient(app)
+        status_code, body = await client.send(login_request())
+        if status_code != 200:
+            sys.exit(f"Could not log in as {BENCHMARK_EMAIL}: {status_code} {body!r}")
+        client.headers["authorization"] = f"Bearer {json.loads(body)['access_token']}"
+
+        cases = {}
+        for case in build_cases(args, keys):
+            if args.only and not any(pattern in case.name for pattern in args.only):
+                continue
+            cases[case.name] = await run_case(client, case, args.concurrency, args.warmup)
+
+    return {
+        "settings": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "page_size": args.page_size,
+            "bulk_rows": args.bulk_rows,
+            "seeded": {"trips": args.trips, "routes": args.routes} if args.seed else None,
+            "python": platform.python_version(),
+        },
+        "cases": cases,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", action="store_true", help="empty the tables and insert synthetic rows first")
+    parser.add_argument("--trips", type=int, default=20000)
+    parser.add_argument("--routes", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per case")
+    parser.add_argument("--login-requests", type=int, default=50, help="timed requests to /token, which hashes")
+    parser.add_argument("--bulk-requests", type=int, default=20, help="timed requests to /bulk/trips")
+    parser.add_argument("--bulk-rows", type=int, default=500, help="trips per bulk request")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--only", action="append", help="run only the cases whose name contains this (repeatable)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed share of p95 growth or throughput loss")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    failures = [
+        f"{name}: unexpected statuses {case['unexpected_statuses']}"
+        for name, case in results["cases"].items() if case["unexpected_statuses"]
+    ]
+    if args.baseline:
+        with open(args.baseline) as file:
+            failures += regressions(results, json.load(file), args.max_regression)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Query-plan regression check: no sequential scans of large tables on lookups.
+
+Run from the repository root against a scratch database:
+
+    PYTHONPATH=src:benchmarks python benchmarks/explain_plans.py --seed --trips 200000
+
+Each case calls a repository method the way the API does, with keys taken from
+the data. Every SELECT it sends is recorded and run again under EXPLAIN with the
+same parameters. So are the lookups Postgres makes for each foreign key when a
+referenced row is deleted or its key changes. Any plan that reads a table of at
+least ``--min-rows`` rows with a Seq Scan is reported, and the exit status is 1.
+
+``--seed`` fills the tables with synthetic rows first (and ANALYZEs them); without
+it the data already in the database is used. Queries that read a whole table by
+design (streams, exports, roster and index builds) are not checked.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import time
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.core.config import settings
+from project.infrastructure.postgres.database import database, metadata
+from project.infrastructure.postgres.repository.bus_repo import BusRepository
+from project.infrastructure.postgres.repository.driver_repo import DriverRepository
+from project.infrastructure.postgres.repository.pagination import encode_cursor
+from project.infrastructure.postgres.repository.route_repo import RouteRepository
+from project.infrastructure.postgres.repository.route_stop_repo import RouteStopRepository
+from project.infrastructure.postgres.repository.stop_repo import StopRepository
+from project.infrastructure.postgres.repository.trip_repo import TripRepository
+
+
+SCHEMA = settings.POSTGRES_SCHEMA
+
+SEED_QUERIES = (
+    "INSERT INTO {schema}.companies (id_company, company_name) SELECT g, 'Company ' || g FROM generate_series(1, 20) g",
+    "INSERT INTO {schema}.routes (route_number) SELECT g FROM generate_series(1, {routes}) g",
+    "INSERT INTO {schema}.stops (latitude, longitude, stop_name) "
+    "SELECT 55 + g / 100000.0, 37 + g % 1000 / 1000.0, 'Stop ' || g FROM generate_series(1, {stops}) g",
+    "INSERT INTO {schema}.route_stops (latitude, longitude, route_number, stop_sequence) "
+    "SELECT 55 + g / 100000.0, 37 + g % 1000 / 1000.0, 1 + g % {routes}, 1 + g / {routes} FROM generate_series(1, {stops}) g",
+    "INSERT INTO {schema}.stop_time (latitude, longitude, route_number, arrival_time, departure_time) "
+    "SELECT latitude, longitude, route_number, time '05:00' + stop_sequence * interval '2 minutes', "
+    "time '05:00' + stop_sequence * interval '2 minutes' FROM {schema}.route_stops",
+    "INSERT INTO {schema}.drivers (passport_number, full_name, id_company) "
+    "SELECT lpad(g::text, 10, '0'), 'Driver ' || g, 1 + g % 20 FROM generate_series(1, {drivers}) g",
+    "INSERT INTO {schema}.mechanics (passport_number, full_name, experience_years) "
+    "SELECT lpad(g::text, 10, '0'), 'Mechanic ' || g, 5 FROM generate_series(1, 100) g",
+    "INSERT INTO {schema}.buses (gos_num, owner_company, route_number, technical_condition) "
+    "SELECT 'A' || g, 1 + g % 20, CASE WHEN g % 3 = 0 THEN 1 + g % {routes} END, 'ok' FROM generate_series(1, {buses}) g",
+    "INSERT INTO {schema}.trips (driver_passport, route_number, gos_num, trip_date, start_time, end_time) "
+    "SELECT lpad((1 + g % {drivers})::text, 10, '0'), 1 + g % {routes}, 'A' || (1 + g % {buses}), "
+    "date '2024-05-01' + g % 30, time '05:00' + (g % 1000) * interval '1 minute', "
+    "time '05:50' + (g % 1000) * interval '1 minute' FROM generate_series(1, {trips}) g",
+    "INSERT INTO {schema}.repair_requests (gos_num, repair_cost) "
+    "SELECT 'A' || (1 + g % {buses}), 1000 FROM generate_series(1, {buses} * 5) g",
+    "INSERT INTO {schema}.technical_inspections (mechanic_passport, gos_num, conclusion) "
+    "SELECT lpad((1 + g % 100)::text, 10, '0'), 'A' || (1 + g % {buses}), 'ok' FROM generate_series(1, {buses} * 5) g",
+)
+
+# Scans that are the right plan: a day's trips join a large share of all buses,
+# and hashing the whole buses table beats probing it once per trip.
+ALLOWED_SEQ_SCANS = {
+    "TripRepository.get_trips_with_company": {"buses"},
+}
+
+
+class StatementRecorder:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, Any]] = []
+        self.enabled = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self.enabled and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            self.statements.append((statement, parameters))
+
+
+def seq_scans(plan: dict, large_tables: set[str]) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in large_tables:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found.extend(seq_scans(child, large_tables))
+    return found
+
+
+async def explain(session: AsyncSession, statement: str, parameters: Any) -> dict:
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    plan = await raw_connection.driver_connection.fetchval(f"EXPLAIN (FORMAT JSON) {statement}", *(parameters or ()))
+    # SQLAlchemy registers a json codec on its asyncpg connections; a bare one returns text.
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def seed(args: argparse.Namespace) -> None:
+    sizes = {"schema": SCHEMA, "routes": args.routes, "stops": args.routes * 40, "drivers": args.trips // 10,
+             "buses": args.trips // 20, "trips": args.trips}
+    async with database.session() as session:
+        for query in SEED_QUERIES:
+            await session.execute(text(query.format(**sizes)))
+    async with database.engine.connect() as connection:
+        await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("ANALYZE"))
+
+
+async def sample_keys(session: AsyncSession) -> dict[str, Any]:
+    row = (await session.execute(text(
+        f"SELECT trip_id, driver_passport, gos_num, route_number, trip_date FROM {SCHEMA}.trips "
+        f"WHERE driver_passport IS NOT NULL AND gos_num IS NOT NULL AND route_number IS NOT NULL AND trip_date IS NOT NULL "
+        f"ORDER BY trip_id DESC LIMIT 1"
+    ))).mappings().one()
+    stop = (await session.execute(text(f"SELECT latitude, longitude FROM {SCHEMA}.stops LIMIT 1"))).mappings().one()
+    return {**row, "latitude": stop["latitude"], "longitude": stop["longitude"]}
+
+
+def repository_cases(keys: dict[str, Any]) -> list[tuple[str, Callable[[AsyncSession], Awaitable[Any]]]]:
+    trips, buses, drivers = TripRepository(), BusRepository(), DriverRepository()
+    routes, route_stops, stops = RouteRepository(), RouteStopRepository(), StopRepository()
+    return [
+        ("TripRepository.get_trip_by_id", lambda session: trips.get_trip_by_id(session=session, trip_id=keys["trip_id"])),
+        ("TripRepository.get_all_trips after cursor", lambda session: trips.get_all_trips(session=session, after=encode_cursor([keys["trip_id"] - 100]))),
+        ("TripRepository.get_resource_trips driver", lambda session: trips.get_resource_trips(
+            session=session, field="driver_passport", key=keys["driver_passport"], trip_date=keys["trip_date"])),
+        ("TripRepository.get_resource_trips bus", lambda session: trips.get_resource_trips(
+            session=session, field="gos_num", key=keys["gos_num"], trip_date=keys["trip_date"])),
+        ("TripRepository.get_route_start_times", lambda session: trips.get_route_start_times(
+            session=session, route_number=keys["route_number"], start=time(7), end=time(9), trip_date=keys["trip_date"], limit=50)),
+        ("TripRepository.get_trips_for_dates", lambda session: trips.get_trips_for_dates(session=session, trip_dates={keys["trip_date"]})),
+        ("TripRepository.get_trips_with_company", lambda session: trips.get_trips_with_company(session=session, trip_date=keys["trip_date"])),
+        ("BusRepository.get_bus_by_gos_num", lambda session: buses.get_bus_by_gos_num(session=session, gos_num=keys["gos_num"])),
+        ("DriverRepository.get_driver_by_passport_number", lambda session: drivers.get_driver_by_passport_number(
+            session=session, passport_number=keys["driver_passport"])),
+        ("RouteRepository.get_route_by_number", lambda session: routes.get_route_by_number(session=session, route_number=keys["route_number"])),
+        ("RouteStopRepository.get_route_stop_list", lambda session: route_stops.get_route_stop_list(session=session, route_number=keys["route_number"])),
+        ("StopRepository.get_stop_by_coords", lambda session: stops.get_stop_by_coords(
+            session=session, latitude=keys["latitude"], longitude=keys["longitude"])),
+    ]
+
+
+async def foreign_key_lookups(session: AsyncSession) -> list[tuple[str, str, tuple]]:
+    # The row lookups a delete of a referenced row makes, one per foreign key, for a key in use.
+    lookups = []
+    for table in metadata.sorted_tables:
+        for constraint in table.foreign_key_constraints:
+            columns = [element.parent.name for element in constraint.elements]
+            present = " AND ".join(f"{column} IS NOT NULL" for column in columns)
+            values = (await session.execute(text(f"SELECT {', '.join(columns)} FROM {SCHEMA}.{table.name} WHERE {present} LIMIT 1"))).first()
+            if values is None:
+                continue
+            condition = " AND ".join(f"{column} = ${position}" for position, column in enumerate(columns, start=1))
+            lookups.append((f"foreign key {table.name}({', '.join(columns)})", f"SELECT 1 FROM {SCHEMA}.{table.name} WHERE {condition}", tuple(values)))
+    return lookups
+
+
+async def check(args: argparse.Namespace) -> int:
+    recorder = StatementRecorder()
+    event.listen(database.engine.sync_engine, "before_cursor_execute", recorder)
+    report, failures = [], 0
+    async with AsyncSession(database.engine) as session:
+        large_tables = set(await session.scalars(text(
+            "SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = :schema AND c.relkind = 'r' AND c.reltuples >= :min_rows"
+        ), {"schema": SCHEMA, "min_rows": args.min_rows}))
+        keys = await sample_keys(session)
+
+        cases = []
+        for name, call in repository_cases(keys):
+            recorder.statements.clear()
+            recorder.enabled = True
+            try:
+                await call(session)
+            finally:
+                recorder.enabled = False
+            cases.extend((name, statement, parameters) for statement, parameters in recorder.statements)
+        cases.extend(await foreign_key_lookups(session))
+
+        for name, statement, parameters in cases:
+            plan = await explain(session, statement, parameters)
+            scans = [table for table in seq_scans(plan, large_tables) if table not in ALLOWED_SEQ_SCANS.get(name, ())]
+            failures += bool(scans)
+            report.append({"case": name, "ok": not scans, "seq_scans": scans, "total_cost": plan["Total Cost"]})
+        await session.rollback()
+
+    print(json.dumps({"large_tables": sorted(large_tables), "cases": report, "failures": failures}, indent=2, default=str))
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", action="store_true", help="insert synthetic rows before checking")
+    parser.add_argument("--trips", type=int, default=200000)
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--min-rows", type=int, default=10000, help="tables at least this large must not be seq-scanned")
+    args = parser.parse_args()
+
+    async def run() -> int:
+        if args.seed:
+            await seed(args)
+        return await check(args)
+
+    sys.exit(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
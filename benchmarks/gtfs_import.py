@@ -0,0 +1,99 @@
+"""Throughput and memory of the GTFS importer on a synthetic city-sized feed.
+
+Run from the repository root:
+
+    PYTHONPATH=src:benchmarks python benchmarks/gtfs_import.py --stop-times 10000000
+
+The feed is generated into a temporary zip (stop_times.txt is written row by
+row, so generating it does not need the memory either). By default batches are
+counted and dropped, which measures parsing and mapping alone; with ``--database``
+they are written through COPY into the configured Postgres.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import zipfile
+
+from project.services.gtfs_import import GtfsImporter
+
+
+class CountingImporter(GtfsImporter):
+    async def write_batch(self, collection, rows, conflict_columns) -> int:
+        return len(rows)
+
+
+def write_feed(path: str, stops: int, routes: int, stop_times: int, stops_per_trip: int) -> None:
+    rng = random.Random(42)
+    trips = stop_times // stops_per_trip
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as feed:
+        with feed.open("stops.txt", "w") as raw, io.TextIOWrapper(raw, encoding="utf-8") as out:
+            out.write("stop_id,stop_name,stop_lat,stop_lon\n")
+            for stop in range(stops):
+                out.write(f"S{stop},Stop {stop},{55 + rng.random():.6f},{37 + rng.random():.6f}\n")
+        with feed.open("routes.txt", "w") as raw, io.TextIOWrapper(raw, encoding="utf-8") as out:
+            out.write("route_id,route_short_name,route_type\n")
+            for route in range(routes):
+                out.write(f"R{route},{route + 1},3\n")
+        with feed.open("trips.txt", "w") as raw, io.TextIOWrapper(raw, encoding="utf-8") as out:
+            out.write("route_id,service_id,trip_id\n")
+            for trip in range(trips):
+                out.write(f"R{trip % routes},daily,T{trip}\n")
+        with feed.open("stop_times.txt", "w") as raw, io.TextIOWrapper(raw, encoding="utf-8") as out:
+            out.write("trip_id,arrival_time,departure_time,stop_id,stop_sequence\n")
+            for trip in range(trips):
+                route = trip % routes
+                seconds = 5 * 3600 + (trip // routes) * 600 % (20 * 3600)
+                for sequence in range(stops_per_trip):
+                    stop = (route * 7 + sequence * 13) % stops
+                    clock = f"{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+                    out.write(f"T{trip},{clock},{clock},S{stop},{sequence}\n")
+                    seconds += 90
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stops", type=int, default=20000)
+    parser.add_argument("--routes", type=int, default=1000)
+    parser.add_argument("--stop-times", type=int, default=1000000)
+    parser.add_argument("--stops-per-trip", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--database", action="store_true", help="write batches into Postgres")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "feed.zip")
+        started_at = time.perf_counter()
+        write_feed(path, args.stops, args.routes, args.stop_times, args.stops_per_trip)
+        generated_in = time.perf_counter() - started_at
+        rss_before = peak_rss_mb()
+
+        importer_class = GtfsImporter if args.database else CountingImporter
+        started_at = time.perf_counter()
+        progress = await importer_class(batch_size=args.batch_size).run(path)
+        elapsed = time.perf_counter() - started_at
+
+        print(json.dumps({
+            "feed_mb": os.path.getsize(path) / 2 ** 20,
+            "generate_sec": generated_in,
+            "import_sec": elapsed,
+            "stop_times_per_sec": progress["rows"].get("stop_times.txt", 0) / elapsed,
+            "rows": progress["rows"],
+            "inserted": progress["inserted"],
+            "peak_rss_mb_before_import": rss_before,
+            "peak_rss_mb": peak_rss_mb(),
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
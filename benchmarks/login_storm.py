@@ -0,0 +1,69 @@
+"""Latency of unrelated requests while a burst of logins is being verified.
+
+Run from the repository root with the project settings in the environment:
+
+    PYTHONPATH=src:benchmarks python benchmarks/login_storm.py --logins 200
+
+A ticker coroutine stands in for an unrelated endpoint: it wakes up every
+``--tick-ms`` and records how late it was. The storm is run twice, with
+bcrypt verification called inline on the event loop (the old behaviour) and
+through ``password_hasher``.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from common import latency_summary
+from project.resource.auth import get_password_hash, password_hasher, verify_password
+
+
+async def ticker(stop: asyncio.Event, tick: float, lateness: list[float]) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + tick
+        await asyncio.sleep(tick)
+        lateness.append(max(0.0, time.perf_counter() - expected))
+
+
+async def inline_login(hashed: str) -> None:
+    verify_password("password", hashed)
+
+
+async def pooled_login(hashed: str) -> None:
+    await password_hasher.verify(plain_password="password", hashed_password=hashed)
+
+
+async def storm(login, hashed: str, logins: int, concurrency: int, tick: float) -> dict:
+    stop = asyncio.Event()
+    lateness: list[float] = []
+    ticker_task = asyncio.create_task(ticker(stop, tick, lateness))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await login(hashed)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    await ticker_task
+    return {"logins_per_sec": logins / elapsed, "unrelated_request_delay": latency_summary(lateness)}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--tick-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("password")
+    results = {}
+    for name, login in (("inline", inline_login), ("pool", pooled_login)):
+        results[name] = await storm(login, hashed, args.logins, args.concurrency, args.tick_ms / 1000)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""Query latency of the journey planner on a synthetic grid city.
+
+Run from the repository root:
+
+    PYTHONPATH=src:benchmarks python benchmarks/raptor.py --side 60
+
+``--side`` x ``--side`` stops are laid out on a grid ``--spacing-m`` apart. Every
+row and every column is served by a route in both directions with a trip every
+``--headway-min`` minutes, so a random query typically needs one or two transfers.
+No database is involved: the network is compiled straight from generated rows.
+"""
+import argparse
+import json
+import random
+import time
+
+from common import latency_summary
+from project.schemas.stop import StopSchema
+from project.services.journey_planner import compile_network, plan_journeys
+from project.services.spatial_index import METERS_PER_DEGREE
+
+
+def build_rows(side: int, spacing_m: float, headway_min: int, hop_sec: int):
+    step = spacing_m / METERS_PER_DEGREE
+    coordinates = [[(round(55.5 + row * step, 6), round(37.3 + column * step * 1.76, 6)) for column in range(side)] for row in range(side)]
+    stops = [StopSchema(latitude=latitude, longitude=longitude, stop_name=f"{row}-{column}")
+             for row, line in enumerate(coordinates) for column, (latitude, longitude) in enumerate(line)]
+
+    lines = [line for line in coordinates] + [[coordinates[row][column] for row in range(side)] for column in range(side)]
+    lines += [list(reversed(line)) for line in lines]
+    patterns, trips = [], []
+    for route_number, line in enumerate(lines, start=1):
+        for position, (latitude, longitude) in enumerate(line):
+            seconds = 5 * 3600 + position * hop_sec
+            patterns.append((route_number, latitude, longitude, seconds, seconds + 20))
+        for start in range(5 * 3600, 23 * 3600, headway_min * 60):
+            trips.append((route_number, None, start))
+    return stops, patterns, trips
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--side", type=int, default=60)
+    parser.add_argument("--spacing-m", type=float, default=350)
+    parser.add_argument("--headway-min", type=int, default=10)
+    parser.add_argument("--hop-sec", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    stops, patterns, trips = build_rows(args.side, args.spacing_m, args.headway_min, args.hop_sec)
+    started_at = time.perf_counter()
+    network = compile_network(stops, patterns, trips)
+    compile_sec = time.perf_counter() - started_at
+
+    rng = random.Random(7)
+    samples, found, transfers = [], 0, []
+    for _ in range(args.queries):
+        origin, destination = rng.choice(stops), rng.choice(stops)
+        depart_at = rng.randrange(6 * 3600, 20 * 3600)
+        started_at = time.perf_counter()
+        journeys = plan_journeys(network, (origin.latitude, origin.longitude), (destination.latitude, destination.longitude), depart_at)
+        samples.append(time.perf_counter() - started_at)
+        if journeys:
+            found += 1
+            transfers.append(journeys[-1].transfers)
+
+    print(json.dumps({
+        "stops": len(stops),
+        "routes": len(network.route_numbers),
+        "trips": len(trips),
+        "compile_sec": compile_sec,
+        "answered": found / args.queries,
+        "mean_transfers": sum(transfers) / len(transfers) if transfers else None,
+        "query": latency_summary(samples),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Time to validate a day's roster for driver and bus double-booking.
+
+Run from the repository root:
+
+    PYTHONPATH=src:benchmarks python benchmarks/trip_conflicts.py --trips 20000
+
+Each of ``--drivers`` drivers (with a bus of their own) drives back-to-back trips
+through the day; ``--overlap-share`` of the trips are stretched into the next one
+so that there is something to report. No database is involved.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date
+
+from common import latency_summary
+from project.schemas.trip import TripCreateUpdateSchema
+from project.services.timetable import seconds_to_time
+from project.services.trip_conflicts import IntervalIndex, find_conflicts, trip_interval
+
+
+def build_roster(trips: int, drivers: int, overlap_share: float) -> list[TripCreateUpdateSchema]:
+    rng = random.Random(7)
+    per_driver = -(-trips // drivers)
+    duration = (18 * 3600) // per_driver
+    roster = []
+    for driver in range(drivers):
+        for position in range(per_driver):
+            start = 5 * 3600 + position * duration
+            end = start + duration + (rng.randrange(60, duration) if rng.random() < overlap_share else 0)
+            roster.append(TripCreateUpdateSchema(
+                driver_passport=f"{driver:010}",
+                gos_num=f"A{driver:05}AA",
+                trip_date=date(2024, 5, 1),
+                start_time=seconds_to_time(start),
+                end_time=seconds_to_time(end),
+            ))
+    return roster[:trips]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=20000)
+    parser.add_argument("--drivers", type=int, default=1000)
+    parser.add_argument("--overlap-share", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    roster = build_roster(args.trips, args.drivers, args.overlap_share)
+    samples, conflicts = [], []
+    for _ in range(args.repeat):
+        started_at = time.perf_counter()
+        conflicts = find_conflicts((None, row, trip) for row, trip in enumerate(roster))
+        samples.append(time.perf_counter() - started_at)
+
+    # A single write checks one driver's day, which is what the IntervalIndex holds.
+    day = [trip for trip in roster if trip.driver_passport == roster[0].driver_passport]
+    index = IntervalIndex((*trip_interval(trip.start_time, trip.end_time), row) for row, trip in enumerate(day))
+    lookups = []
+    for trip in day:
+        started_at = time.perf_counter()
+        index.overlapping(*trip_interval(trip.start_time, trip.end_time))
+        lookups.append(time.perf_counter() - started_at)
+
+    print(json.dumps({
+        "trips": len(roster),
+        "conflicts": len(conflicts),
+        "batch": latency_summary(samples),
+        "single_lookup": latency_summary(lookups),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""add_route_stop_sequence
+
+Revision ID: b3f1c2d4e5a6
+Revises: 6cbe11b4075e
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from project.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f1c2d4e5a6'
+down_revision = '6cbe11b4075e'
+branch_labels = None
+depends_on = None
+
+
+# Route.stops_list is free text such as "Ленина, Пушкина - Вокзал". Its entries are
+# matched by name against the stops already linked to the route in route_stops; the
+# position of the first matching entry becomes the sequence. Stops not mentioned in
+# stops_list follow in the order of their stop_time, then by coordinates.
+BACKFILL_QUERY = r"""
+WITH tokens AS (
+    SELECT r.route_number, lower(btrim(t.token)) AS name, t.position
+    FROM my_app_schema.routes r,
+         regexp_split_to_table(r.stops_list, '\s*(,|;|\n|->|→|—|–|\s-\s)\s*') WITH ORDINALITY AS t(token, position)
+    WHERE r.stops_list IS NOT NULL AND btrim(t.token) <> ''
+),
+matched AS (
+    SELECT rs.latitude, rs.longitude, rs.route_number, min(tokens.position) AS position
+    FROM my_app_schema.route_stops rs
+    JOIN my_app_schema.stops s ON s.latitude = rs.latitude AND s.longitude = rs.longitude
+    JOIN tokens ON tokens.route_number = rs.route_number AND tokens.name = lower(btrim(s.stop_name))
+    GROUP BY rs.latitude, rs.longitude, rs.route_number
+),
+ordered AS (
+    SELECT rs.latitude, rs.longitude, rs.route_number,
+           row_number() OVER (
+               PARTITION BY rs.route_number
+               ORDER BY matched.position NULLS LAST,
+                        coalesce(st.departure_time, st.arrival_time) NULLS LAST,
+                        rs.latitude, rs.longitude
+           ) AS stop_sequence
+    FROM my_app_schema.route_stops rs
+    LEFT JOIN matched
+        ON matched.latitude = rs.latitude AND matched.longitude = rs.longitude AND matched.route_number = rs.route_number
+    LEFT JOIN my_app_schema.stop_time st
+        ON st.latitude = rs.latitude AND st.longitude = rs.longitude AND st.route_number = rs.route_number
+)
+UPDATE my_app_schema.route_stops rs
+SET stop_sequence = ordered.stop_sequence
+FROM ordered
+WHERE rs.latitude = ordered.latitude AND rs.longitude = ordered.longitude AND rs.route_number = ordered.route_number
+"""
+
+
+def upgrade():
+    op.add_column('route_stops', sa.Column('stop_sequence', sa.Integer(), nullable=True), schema='my_app_schema')
+    op.execute(BACKFILL_QUERY)
+    op.alter_column('route_stops', 'stop_sequence', nullable=False, schema='my_app_schema')
+    op.create_index('ix_route_stops_route_number_stop_sequence', 'route_stops', ['route_number', 'stop_sequence'], unique=False, schema='my_app_schema')
+
+
+def downgrade():
+    op.drop_index('ix_route_stops_route_number_stop_sequence', table_name='route_stops', schema='my_app_schema')
+    op.drop_column('route_stops', 'stop_sequence', schema='my_app_schema')
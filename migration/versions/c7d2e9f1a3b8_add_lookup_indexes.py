@@ -0,0 +1,50 @@
+"""add_lookup_indexes
+
+Revision ID: c7d2e9f1a3b8
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+from project.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e9f1a3b8'
+down_revision = 'b3f1c2d4e5a6'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns). The trip indexes lead with the column a query filters
+# on by equality and continue with the one it narrows or orders by: a driver's or a
+# bus's trips of a day, a route's departures by start time. Every other foreign key
+# gets an index too, so deleting a referenced row does not scan the referencing table.
+INDEXES = (
+    ('ix_trips_driver_passport_trip_date', 'trips', ['driver_passport', 'trip_date']),
+    ('ix_trips_gos_num_trip_date', 'trips', ['gos_num', 'trip_date']),
+    ('ix_trips_route_number_start_time', 'trips', ['route_number', 'start_time']),
+    ('ix_trips_trip_date', 'trips', ['trip_date']),
+    ('ix_buses_route_number', 'buses', ['route_number']),
+    ('ix_buses_owner_company', 'buses', ['owner_company']),
+    ('ix_buses_driver_passport', 'buses', ['driver_passport']),
+    ('ix_drivers_id_company', 'drivers', ['id_company']),
+    ('ix_stop_time_route_number', 'stop_time', ['route_number']),
+    ('ix_repair_requests_gos_num', 'repair_requests', ['gos_num']),
+    ('ix_technical_inspections_gos_num', 'technical_inspections', ['gos_num']),
+    ('ix_technical_inspections_mechanic_passport', 'technical_inspections', ['mechanic_passport']),
+)
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY does not lock out writes but cannot run in a transaction.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, schema='my_app_schema', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, schema='my_app_schema', postgresql_concurrently=True)
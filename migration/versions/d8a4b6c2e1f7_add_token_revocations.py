@@ -0,0 +1,31 @@
+"""add_token_revocations
+
+Revision ID: d8a4b6c2e1f7
+Revises: c7d2e9f1a3b8
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from project.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a4b6c2e1f7'
+down_revision = 'c7d2e9f1a3b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('token_revocations',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('user_id'),
+    schema=settings.POSTGRES_SCHEMA
+    )
+
+
+def downgrade():
+    op.drop_table('token_revocations', schema=settings.POSTGRES_SCHEMA)
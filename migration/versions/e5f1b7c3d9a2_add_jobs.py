@@ -0,0 +1,40 @@
+"""add_jobs
+
+Revision ID: e5f1b7c3d9a2
+Revises: d8a4b6c2e1f7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from project.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f1b7c3d9a2'
+down_revision = 'd8a4b6c2e1f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('progress', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    schema=settings.POSTGRES_SCHEMA
+    )
+    op.create_index('ix_jobs_started_at', 'jobs', ['started_at'], unique=False, schema=settings.POSTGRES_SCHEMA)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_started_at', table_name='jobs', schema=settings.POSTGRES_SCHEMA)
+    op.drop_table('jobs', schema=settings.POSTGRES_SCHEMA)
@@ -1,5 +1,8 @@
 import asyncio
 import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import uvicorn
 
 from fastapi import FastAPI
@@ -9,11 +12,31 @@ from project.core.config import settings
 #from project.api.routes import router
 from project.api.user_routes import user_router
 from project.api.auth_routes import auth_router
+from project.api.bulk_routes import bulk_router
+from project.api.admin_routes import admin_router
 from project.api.healthcheck import healthcheck_router
+from project.api.metrics import MetricsMiddleware, flush_metrics, write_snapshot
+from project.services.indexes import warm_up_indexes
+from project.services.readiness import readiness_prober
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warm_up = asyncio.create_task(warm_up_indexes())
+    readiness_probe = asyncio.create_task(readiness_prober.run())
+    metrics_flush = None
+    if settings.METRICS_DIR:
+        metrics_flush = asyncio.create_task(flush_metrics(directory=settings.METRICS_DIR, interval_sec=settings.METRICS_FLUSH_SEC))
+    yield
+    warm_up.cancel()
+    readiness_probe.cancel()
+    if metrics_flush is not None:
+        metrics_flush.cancel()
+        write_snapshot(settings.METRICS_DIR)
+
+
 def create_app() -> FastAPI:
     app_options = {}
     if settings.ENV.lower() == "prod":
@@ -24,7 +47,7 @@ def create_app() -> FastAPI:
     if settings.LOG_LEVEL in ["DEBUG", "INFO"]:
         app_options["debug"] = True
 
-    app = FastAPI(root_path=settings.ROOT_PATH, **app_options)
+    app = FastAPI(root_path=settings.ROOT_PATH, lifespan=lifespan, **app_options)
     app.add_middleware(
         CORSMiddleware,  # type: ignore
         allow_origins=settings.ORIGINS,
@@ -32,10 +55,14 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Added last, so it is the outermost middleware and times the others too.
+    app.add_middleware(MetricsMiddleware)
 
     #app.include_router(router, prefix="/api", tags=["User APIs"])
     app.include_router(user_router, tags=["User"])
     app.include_router(auth_router, tags=["Auth"])
+    app.include_router(bulk_router, tags=["Bulk"])
+    app.include_router(admin_router, tags=["Admin"])
     app.include_router(healthcheck_router, tags=["Health check"])
     return app
 
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, status, Depends
+from fastapi.concurrency import run_in_threadpool
+
+from project.core.config import settings
+from project.schemas.bus_schedule import BusScheduleSchema
+from project.schemas.job import JobSchema
+from project.schemas.user import UserSchema
+from project.api.depends import database, get_current_user, check_for_admin_access
+from project.api.timing import TimedRoute
+from project.services.bus_scheduling import bus_scheduler
+from project.services.driver_rostering import driver_rosterer
+from project.services.gtfs_import import GtfsImporter
+from project.services.jobs import Job, job_registry
+from project.services.spatial_index import stop_index
+from project.services.indexes import invalidate_schedule_indexes
+from project.services.response_cache import response_cache
+
+
+admin_router = APIRouter(route_class=TimedRoute)
+
+
+@admin_router.post("/admin/gtfs/import", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def import_gtfs_feed(
+    feed: UploadFile = File(...),
+    service_date: str | None = Form(default=None),
+    current_user: UserSchema = Depends(get_current_user),
+) -> JobSchema:
+    check_for_admin_access(user=current_user)
+    try:
+        trip_date = None if not service_date else date.fromisoformat(service_date)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Дата должна быть в формате ГГГГ-ММ-ДД")
+
+    # The upload is spooled to disk so the importer can stream members of the zip.
+    def spool() -> str:
+        handle, path = tempfile.mkstemp(suffix=".zip")
+        with os.fdopen(handle, "wb") as target:
+            shutil.copyfileobj(feed.file, target)
+        return path
+
+    path = await run_in_threadpool(spool)
+
+    async def run(job: Job) -> dict:
+        def on_progress(progress: dict) -> None:
+            job.progress = progress
+
+        try:
+            return await GtfsImporter(service_date=trip_date, on_progress=on_progress).run(path)
+        finally:
+            os.unlink(path)
+            stop_index.invalidate()
+            invalidate_schedule_indexes()
+            response_cache.invalidate("routes", "stops", "route_stops")
+
+    job = await job_registry.start(kind="gtfs_import", run=run)
+    return job.to_schema()
+
+
+@admin_router.get("/admin/jobs/{job_id}", response_model=JobSchema)
+async def get_job(job_id: str, current_user: UserSchema = Depends(get_current_user)) -> JobSchema:
+    check_for_admin_access(user=current_user)
+    job = await job_registry.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Задача {job_id} не найдена")
+    return job
+
+
+@admin_router.post("/admin/schedule/buses", response_model=BusScheduleSchema, status_code=status.HTTP_200_OK)
+async def schedule_buses(
+    trip_date: date = Query(alias="date"),
+    route_number: int | None = None,
+    owner_company: int | None = None,
+    technical_condition: list[str] | None = Query(default=None),
+    min_layover_sec: int = Query(default=settings.BUS_MIN_LAYOVER_SEC, ge=0),
+    reassign: bool = False,
+    dry_run: bool = False,
+    current_user: UserSchema = Depends(get_current_user),
+) -> BusScheduleSchema:
+    check_for_admin_access(user=current_user)
+    async with database.session() as session:
+        return await bus_scheduler.schedule(
+            session=session,
+            trip_date=trip_date,
+            route_number=route_number,
+            owner_company=owner_company,
+            technical_conditions=technical_condition,
+            min_layover_sec=min_layover_sec,
+            reassign=reassign,
+            dry_run=dry_run,
+        )
+
+
+@admin_router.post("/admin/roster/drivers", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def roster_drivers(
+    trip_date: date = Query(alias="date"),
+    id_company: int | None = None,
+    max_shift_sec: int = Query(default=settings.DRIVER_MAX_SHIFT_SEC, gt=0),
+    min_break_sec: int = Query(default=settings.DRIVER_MIN_BREAK_SEC, ge=0),
+    reassign: bool = False,
+    dry_run: bool = False,
+    current_user: UserSchema = Depends(get_current_user),
+) -> JobSchema:
+    # Progress and, once done, the roster itself are read from /admin/jobs/{job_id}.
+    check_for_admin_access(user=current_user)
+
+    async def run(job: Job) -> dict:
+        def on_progress(progress: dict) -> None:
+            job.progress = progress
+
+        async with database.session() as session:
+            roster = await driver_rosterer.roster(
+                session=session,
+                trip_date=trip_date,
+                id_company=id_company,
+                max_shift_sec=max_shift_sec,
+                min_break_sec=min_break_sec,
+                reassign=reassign,
+                dry_run=dry_run,
+                on_progress=on_progress,
+            )
+        return roster.model_dump(mode="json")
+
+    job = await job_registry.start(kind="driver_roster", run=run)
+    return job.to_schema()
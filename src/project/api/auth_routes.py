@@ -4,13 +4,14 @@ from fastapi.security import OAuth2PasswordRequestForm
 from fastapi import APIRouter, HTTPException, status, Depends
 from jose import jwt
 from project.core.config import settings
-from project.core.exceptions import UserNotFound
+from project.core.exceptions import UserNotFound, PasswordHashQueueFull
 from project.schemas.auth import Token
 from project.api.depends import database, user_repo
-from project.resource.auth import verify_password
+from project.api.timing import TimedRoute
+from project.resource.auth import password_hasher
 
 
-auth_router = APIRouter()
+auth_router = APIRouter(route_class=TimedRoute)
 
 
 @auth_router.post("/token")
@@ -20,7 +21,7 @@ async def login_for_access_token(
     try:
         async with database.session() as session:
             user = await user_repo.get_user_by_email(session=session, email=form_data.username)
-        if not verify_password(plain_password=form_data.password, hashed_password=user.password):
+        if not await password_hasher.verify(plain_password=form_data.password, hashed_password=user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Неверный пароль",
@@ -32,8 +33,20 @@ async def login_for_access_token(
             detail=e.message,
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except PasswordHashQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message,
+            headers={"Retry-After": "1"},
+        )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    token_data = {"sub": user.email}
+    token_data = {
+        "sub": user.email,
+        "uid": user.id,
+        "adm": user.is_admin,
+        # A fractional NumericDate; whole seconds would tie with a revocation in the same second.
+        "iat": datetime.now(timezone.utc).timestamp(),
+    }
     to_encode = token_data.copy()
     if access_token_expires:
         expire = datetime.now(timezone.utc) + access_token_expires
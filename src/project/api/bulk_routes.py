@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from pydantic import BaseModel, ValidationError
+
+from project.core.config import settings
+from project.core.exceptions import DatabaseError
+from project.schemas.bulk import BulkInsertResultSchema, BulkRowErrorSchema
+from project.schemas.route_stop import RouteStopCreateUpdateSchema
+from project.schemas.stop_time import StopTimeCreateUpdateSchema
+from project.schemas.trip import TripCreateUpdateSchema
+from project.schemas.user import UserSchema
+from project.api.depends import database, get_current_user, check_for_admin_access, stop_time_repo, route_stop_repo, trip_repo
+from project.api.timing import TimedRoute
+from project.infrastructure.postgres.repository.bulk import BulkInsertOutcome
+from project.services.indexes import invalidate_schedule_indexes
+from project.services.response_cache import response_cache
+
+
+bulk_router = APIRouter(route_class=TimedRoute)
+
+BULK_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+            "text/csv": {"schema": {"type": "string"}},
+        },
+    },
+}
+
+
+async def read_bulk_rows(request: Request, schema: type[BaseModel]) -> tuple[list, list[int], list[BulkRowErrorSchema]]:
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith("text/csv"):
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            raw_rows = [{key: value if value != "" else None for key, value in row.items()} for row in reader]
+        else:
+            raw_rows = json.loads(body)
+    except (UnicodeDecodeError, ValueError, csv.Error) as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Не удалось разобрать тело запроса: {error}")
+    if not isinstance(raw_rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ожидается JSON-массив или CSV")
+    if len(raw_rows) > settings.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Не более {settings.BULK_MAX_ROWS} строк за один запрос",
+        )
+
+    rows, row_numbers, errors = [], [], []
+    for row_number, raw_row in enumerate(raw_rows):
+        try:
+            rows.append(schema.model_validate(raw_row))
+            row_numbers.append(row_number)
+        except ValidationError as error:
+            errors.append(BulkRowErrorSchema(row=row_number, error=str(error)))
+    return rows, row_numbers, errors
+
+
+def bulk_result(
+    received: int,
+    row_numbers: list[int],
+    errors: list[BulkRowErrorSchema],
+    outcome: BulkInsertOutcome,
+) -> BulkInsertResultSchema:
+    errors = errors + [
+        BulkRowErrorSchema(row=row_numbers[position], error="Запись с таким ключом уже существует")
+        for position in outcome.conflicts
+    ] + [
+        BulkRowErrorSchema(row=row_numbers[position], error="Ссылка на несуществующую запись")
+        for position in outcome.missing_references
+    ]
+    errors.sort(key=lambda error: error.row)
+    return BulkInsertResultSchema(received=received, inserted=outcome.inserted, errors=errors)
+
+
+@bulk_router.post("/bulk/stop_times", response_model=BulkInsertResultSchema, status_code=status.HTTP_200_OK, openapi_extra=BULK_REQUEST_BODY)
+async def bulk_add_stop_times(request: Request, current_user: UserSchema = Depends(get_current_user),
+) -> BulkInsertResultSchema:
+    check_for_admin_access(user=current_user)
+    stop_times, row_numbers, errors = await read_bulk_rows(request=request, schema=StopTimeCreateUpdateSchema)
+    try:
+        async with database.session() as session:
+            outcome = await stop_time_repo.bulk_create_stop_times(session=session, stop_times=stop_times)
+    except DatabaseError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
+    invalidate_schedule_indexes()
+    return bulk_result(received=len(stop_times) + len(errors), row_numbers=row_numbers, errors=errors, outcome=outcome)
+
+
+@bulk_router.post("/bulk/route_stops", response_model=BulkInsertResultSchema, status_code=status.HTTP_200_OK, openapi_extra=BULK_REQUEST_BODY)
+async def bulk_add_route_stops(request: Request, current_user: UserSchema = Depends(get_current_user),
+) -> BulkInsertResultSchema:
+    check_for_admin_access(user=current_user)
+    route_stops, row_numbers, errors = await read_bulk_rows(request=request, schema=RouteStopCreateUpdateSchema)
+    try:
+        async with database.session() as session:
+            outcome = await route_stop_repo.bulk_create_route_stops(session=session, route_stops=route_stops)
+    except DatabaseError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
+    invalidate_schedule_indexes()
+    response_cache.invalidate("route_stops")
+    return bulk_result(received=len(route_stops) + len(errors), row_numbers=row_numbers, errors=errors, outcome=outcome)
+
+
+@bulk_router.post("/bulk/trips", response_model=BulkInsertResultSchema, status_code=status.HTTP_200_OK, openapi_extra=BULK_REQUEST_BODY)
+async def bulk_add_trips(request: Request, current_user: UserSchema = Depends(get_current_user),
+) -> BulkInsertResultSchema:
+    check_for_admin_access(user=current_user)
+    trips, row_numbers, errors = await read_bulk_rows(request=request, schema=TripCreateUpdateSchema)
+    try:
+        async with database.session() as session:
+            outcome = await trip_repo.bulk_create_trips(session=session, trips=trips)
+    except DatabaseError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
+    invalidate_schedule_indexes()
+    return bulk_result(received=len(trips) + len(errors), row_numbers=row_numbers, errors=errors, outcome=outcome)
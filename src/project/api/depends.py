@@ -1,10 +1,10 @@
 from typing import Annotated
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
-from project.schemas.auth import TokenData
+from project.schemas.auth import TokenData, AuthenticatedUserSchema
 from project.schemas.user import UserSchema
 from project.core.config import settings
-from project.core.exceptions import CredentialsException
+from project.core.exceptions import CredentialsException, UserNotFound
 
 from project.infrastructure.postgres.repository.user_repo import UserRepository
 from project.infrastructure.postgres.repository.mec_repo import MechanicRepository
@@ -19,8 +19,9 @@ from project.infrastructure.postgres.repository.repair_request_repo import Repai
 from project.infrastructure.postgres.repository.technical_inspection_repo import TechnicalInspectionRepository
 from project.infrastructure.postgres.repository.trip_repo import TripRepository
 
-from project.resource.auth import oauth2_scheme
-from project.infrastructure.postgres.database import PostgresDatabase
+from project.resource.auth import oauth2_scheme, token_revocation_list
+from project.api.timing import timed
+from project.infrastructure.postgres.database import database
 
 mec_repo = MechanicRepository()
 user_repo = UserRepository()
@@ -35,12 +36,15 @@ repair_request_repo = RepairRequestRepository()
 technical_inspection_repo = TechnicalInspectionRepository()
 trip_repo = TripRepository()
 
-database = PostgresDatabase()
-
 AUTH_EXCEPTION_MESSAGE = "Невозможно проверить данные для авторизации"
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-):
+) -> UserSchema | AuthenticatedUserSchema:
+    with timed("auth"):
+        return await _authenticate(token=token)
+
+
+async def _authenticate(token: str) -> UserSchema | AuthenticatedUserSchema:
     try:
         payload = jwt.decode(
             token=token,
@@ -53,15 +57,24 @@ async def get_current_user(
         token_data = TokenData(username=username)
     except JWTError:
         raise CredentialsException(detail=AUTH_EXCEPTION_MESSAGE)
-    async with database.session() as session:
-        user = await user_repo.get_user_by_email(
-            session=session,
-            email=token_data.username,
-        )
-    if user is None:
+
+    user_id, is_admin, issued_at = payload.get("uid"), payload.get("adm"), payload.get("iat")
+    # Tokens issued before the claims were added still go through the database.
+    if settings.AUTH_STATELESS and None not in (user_id, is_admin, issued_at):
+        if await token_revocation_list.is_revoked(user_id=user_id, issued_at=issued_at):
+            raise CredentialsException(detail=AUTH_EXCEPTION_MESSAGE)
+        return AuthenticatedUserSchema(id=user_id, email=token_data.username, is_admin=is_admin)
+
+    try:
+        async with database.session() as session:
+            user = await user_repo.get_user_by_email(
+                session=session,
+                email=token_data.username,
+            )
+    except UserNotFound:
         raise CredentialsException(detail=AUTH_EXCEPTION_MESSAGE)
     return user
-def check_for_admin_access(user: UserSchema) -> None:
+def check_for_admin_access(user: UserSchema | AuthenticatedUserSchema) -> None:
     if not user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,47 @@
+"""JSON bodies built straight from database rows.
+
+Rows read from columns whose types the response schemas already describe are
+encoded as they are, without being validated into models first and once more
+against response_model. orjson encodes them when it is installed, the standard
+library encoder otherwise.
+"""
+import json
+from datetime import date, time
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def plain_value(value: Any) -> Any:
+    # Numeric coordinates are exposed as floats by the JSON schemas as well.
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return value
+
+
+def json_default(value: Any) -> Any:
+    plain = plain_value(value)
+    if plain is value:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return plain
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default)
+    return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
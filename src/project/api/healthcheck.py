@@ -1,17 +1,51 @@
 from fastapi import APIRouter, status
-from project.api.depends import database, user_repo
-from project.schemas.healthcheck import HealthCheckSchema
-from project.core.exceptions import DatabaseError
-healthcheck_router = APIRouter()
+from fastapi.responses import JSONResponse, PlainTextResponse
+from project.api.depends import database
+from project.api.metrics import render_metrics
+from project.api.timing import TimedRoute
+from project.schemas.healthcheck import HealthCheckSchema, PoolStatsSchema, PasswordHasherStatsSchema, ReadinessSchema
+from project.resource.auth import password_hasher
+from project.services.readiness import readiness_prober
+healthcheck_router = APIRouter(route_class=TimedRoute)
 
 
 @healthcheck_router.get("/healthcheck", response_model=HealthCheckSchema, status_code=status.HTTP_200_OK)
 async def check_health() -> HealthCheckSchema:
-    try:
-        async with database.session() as session:
-            db_is_ok = await user_repo.check_connection(session=session)
-    except DatabaseError as error:
-        db_is_ok = False
+    readiness = await readiness_prober.status()
     return HealthCheckSchema(
-        db_is_ok=db_is_ok,
-    )
\ No newline at end of file
+        db_is_ok=readiness.db_is_ok,
+    )
+
+
+@healthcheck_router.get("/livez", response_class=PlainTextResponse, status_code=status.HTTP_200_OK)
+async def check_liveness() -> PlainTextResponse:
+    # Answered by the event loop alone: the process is alive if it can respond.
+    return PlainTextResponse("ok")
+
+
+@healthcheck_router.get(
+    "/readyz",
+    response_model=ReadinessSchema,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ReadinessSchema}},
+)
+async def check_readiness() -> ReadinessSchema | JSONResponse:
+    readiness = await readiness_prober.status()
+    if not readiness.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=readiness.model_dump())
+    return readiness
+
+
+@healthcheck_router.get("/healthcheck/pool", response_model=PoolStatsSchema, status_code=status.HTTP_200_OK)
+async def get_pool_stats() -> PoolStatsSchema:
+    return PoolStatsSchema.model_validate(obj=database.pool_stats(), from_attributes=True)
+
+
+@healthcheck_router.get("/healthcheck/password_hasher", response_model=PasswordHasherStatsSchema, status_code=status.HTTP_200_OK)
+async def get_password_hasher_stats() -> PasswordHasherStatsSchema:
+    return password_hasher.stats()
+
+
+@healthcheck_router.get("/metrics", response_class=PlainTextResponse, status_code=status.HTTP_200_OK)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
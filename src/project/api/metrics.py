@@ -0,0 +1,185 @@
+"""Request, database and pool metrics in the Prometheus text format.
+
+MetricsMiddleware records every HTTP request under its route template, so that
+/route/{route_number} is one series whatever the number; paths no route matches
+share the route "unmatched". Database time and pool waits come from the engine
+instrumentation and are attributed to the request that caused them.
+
+With SERVER_TIMING on, every response also carries a Server-Timing header that
+splits its time into authentication, the handler, database statements, pool
+waits and serialization of what the handler returned, with the number of
+statements and of connection checkouts. The phases overlap: handler includes the
+database time of the handler, total includes everything. The header is meant for
+developers and is off by default; turn it on in development only.
+
+Each process keeps its own metrics. With METRICS_DIR set (serve.py sets it for
+its workers) every process also writes them to <pid>.json there every
+METRICS_FLUSH_SEC, and /metrics adds up the files of all processes, so a scrape
+answered by any worker covers all of them. Counters and histograms of exited
+workers stay in the sum; their gauges do not.
+"""
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from project.core.metrics import LabeledCounter, LabeledHistogram, merge_snapshots, render_prometheus
+from project.api.timing import RequestTimings, current_timings
+from project.core.config import settings
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.instrumentation import QueryStats, current_query_stats, statement_duration
+from project.resource.auth import password_hasher
+
+
+UNMATCHED_ROUTE = "unmatched"
+
+HELP_TEXTS = {
+    "http_requests_total": "HTTP requests by route template and status code.",
+    "http_request_duration_seconds": "Time from the start of a request to the last byte of its response.",
+    "http_request_db_seconds": "Time a request spent executing database statements.",
+    "http_request_pool_wait_seconds": "Time a request spent waiting for database connections.",
+    "http_request_queries": "Database statements a request executed.",
+    "db_statement_duration_seconds": "Execution time of database statements.",
+    "db_pool_checkout_wait_seconds": "Time to get a connection from the pool.",
+    "db_pool_size": "Connections the pool keeps open.",
+    "db_pool_checked_out": "Connections in use.",
+    "password_hash_duration_seconds": "Time to hash or verify a password, queueing included.",
+    "password_hash_rejected_total": "Password hashes rejected because the queue was full.",
+}
+
+requests_total = LabeledCounter(("method", "route", "status"))
+request_duration = LabeledHistogram(("method", "route"))
+request_db_time = LabeledHistogram(("method", "route"))
+request_pool_wait = LabeledHistogram(("method", "route"))
+request_queries = LabeledHistogram(("method", "route"), buckets=(0, 1, 2, 5, 10, 20, 50, 100))
+
+
+def server_timing(timings: RequestTimings, stats: QueryStats, serialize_sec: float, total_sec: float) -> str:
+    def metric(name: str, seconds: float, description: str | None = None) -> str:
+        value = f"{name};dur={seconds * 1000:.1f}"
+        return f'{value};desc="{description}"' if description else value
+
+    metrics = [metric(phase, seconds) for phase, seconds in timings.phases.items()]
+    metrics.append(metric("db", stats.db_time_sec, f"{stats.statements} queries"))
+    metrics.append(metric("pool", stats.checkout_wait_sec, f"{stats.checkouts} checkouts"))
+    metrics.append(metric("serialize", serialize_sec))
+    metrics.append(metric("total", total_sec))
+    return ", ".join(metrics)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        method = scope["method"]
+        stats = QueryStats(request=f"{method} {scope['path']}")
+        timings = RequestTimings()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SERVER_TIMING:
+                    now = time.perf_counter()
+                    # Responses made without an endpoint (404, 405, errors) have nothing to serialize.
+                    finished_at = timings.endpoint_finished_at
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing",
+                        server_timing(timings, stats, now - finished_at if finished_at else 0.0, now - started_at),
+                    )
+            await send(message)
+
+        stats_token = current_query_stats.set(stats)
+        timings_token = current_timings.set(timings)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started_at
+            current_timings.reset(timings_token)
+            current_query_stats.reset(stats_token)
+            # The router leaves the matched route in the scope.
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            requests_total.inc(method, route, status_code)
+            request_duration.labels(method, route).observe(duration)
+            request_db_time.labels(method, route).observe(stats.db_time_sec)
+            request_pool_wait.labels(method, route).observe(stats.checkout_wait_sec)
+            request_queries.labels(method, route).observe(stats.statements)
+
+
+def collect() -> dict:
+    pool = database.pool_stats()
+    hasher = password_hasher.stats()
+    return {
+        "counters": {
+            "http_requests_total": requests_total.snapshot(),
+            "password_hash_rejected_total": {"": hasher.rejected},
+        },
+        "gauges": {
+            "db_pool_size": {"": pool.size},
+            "db_pool_checked_out": {"": pool.checked_out},
+        },
+        "histograms": {
+            "http_request_duration_seconds": request_duration.snapshot(),
+            "http_request_db_seconds": request_db_time.snapshot(),
+            "http_request_pool_wait_seconds": request_pool_wait.snapshot(),
+            "http_request_queries": request_queries.snapshot(),
+            "db_statement_duration_seconds": {"": statement_duration.snapshot()},
+            "db_pool_checkout_wait_seconds": {"": pool.checkout_wait_sec},
+            "password_hash_duration_seconds": {"": hasher.duration_sec.model_dump()},
+        },
+    }
+
+
+def write_snapshot(directory: str) -> None:
+    path = Path(directory) / f"{os.getpid()}.json"
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(collect()))
+    # Readers see the previous file or the new one, never half of one.
+    os.replace(temporary, path)
+
+
+async def flush_metrics(directory: str, interval_sec: float) -> None:
+    while True:
+        await asyncio.sleep(interval_sec)
+        write_snapshot(directory)
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_snapshots(directory: str) -> list[dict]:
+    snapshots = [collect()]
+    for path in Path(directory).glob("*.json"):
+        if not path.stem.isdigit() or int(path.stem) == os.getpid():
+            continue
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if not _is_running(int(path.stem)):
+            snapshot.pop("gauges", None)
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def render_metrics() -> str:
+    snapshots = _read_snapshots(settings.METRICS_DIR) if settings.METRICS_DIR else [collect()]
+    return render_prometheus(merge_snapshots(snapshots), HELP_TEXTS)
@@ -0,0 +1,65 @@
+import csv
+import io
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from project.api.fast_json import dumps, plain_value
+from project.core.config import settings
+from project.infrastructure.postgres.database import database
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def negotiate_export_format(export_format: str | None, accept: str | None) -> str | None:
+    if export_format is not None:
+        return None if export_format == "json" else export_format
+    if accept:
+        for media_range in accept.split(","):
+            media_type = media_range.split(";")[0].strip().lower()
+            if media_type in ("application/x-ndjson", "application/jsonl"):
+                return "ndjson"
+            if media_type == "text/csv":
+                return "csv"
+    return None
+
+
+def _encode_ndjson(columns: list[str], rows: list) -> bytes:
+    return b"".join(dumps({column: row[column] for column in columns}) + b"\n" for row in rows)
+
+
+def _encode_csv(rows: list[list[Any]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def stream_export(
+    open_stream: Callable[[AsyncSession, int], Awaitable[AsyncResult]],
+    export_format: str,
+    name: str,
+) -> StreamingResponse:
+    chunk_size = settings.STREAM_CHUNK_SIZE
+
+    async def body() -> AsyncIterator[bytes]:
+        async with database.session() as session:
+            result = await open_stream(session=session, chunk_size=chunk_size)
+            columns = list(result.keys())
+            if export_format == "csv":
+                yield _encode_csv([columns])
+            async for partition in result.mappings().partitions(chunk_size):
+                if export_format == "csv":
+                    yield _encode_csv([["" if row[column] is None else plain_value(row[column]) for column in columns] for row in partition])
+                else:
+                    yield _encode_ndjson(columns, partition)
+
+    headers = {}
+    if export_format == "csv":
+        headers["Content-Disposition"] = f'attachment; filename="{name}.csv"'
+    return StreamingResponse(body(), media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
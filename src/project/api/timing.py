@@ -0,0 +1,64 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from fastapi.routing import APIRoute
+
+
+@dataclass
+class RequestTimings:
+    # Seconds per phase of the request being handled, for the Server-Timing header.
+    phases: dict[str, float] = field(default_factory=dict)
+    endpoint_finished_at: float | None = None
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.phases[phase] = timings.phases.get(phase, 0) + time.perf_counter() - started_at
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # functools.wraps keeps the signature FastAPI reads the parameters from.
+    def finished(started_at: float) -> None:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.endpoint_finished_at = time.perf_counter()
+            timings.phases["handler"] = timings.endpoint_finished_at - started_at
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args: Any, **kwargs: Any) -> Any:
+            started_at = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                finished(started_at)
+    else:
+        @functools.wraps(endpoint)
+        def timed_endpoint(*args: Any, **kwargs: Any) -> Any:
+            started_at = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                finished(started_at)
+    return timed_endpoint
+
+
+class TimedRoute(APIRoute):
+    # Notes when the endpoint returns: the time from then until the response starts
+    # is spent validating and serializing what it returned.
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, endpoint=_timed_endpoint(endpoint), **kwargs)
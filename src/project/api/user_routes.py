@@ -1,17 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from datetime import date, datetime, time
+from itertools import islice
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header
+from fastapi.responses import Response, StreamingResponse
 
 from project.schemas.user import UserSchema, UserCreateUpdateSchema
 from project.schemas.mechanic import MechanicSchema, MecCreateUpdateSchema
 from project.schemas.company import CompanySchema, CompanyCreateUpdateSchema
-from project.schemas.route import RouteSchema, RouteCreateUpdateSchema
-from project.schemas.stop import StopSchema, StopCreateUpdateSchema
+from project.schemas.route import RouteSchema, RouteCreateUpdateSchema, RouteFullSchema
+from project.schemas.stop import StopSchema, StopCreateUpdateSchema, NearbyStopSchema
 from project.schemas.driver import DriverSchema, DriverCreateUpdateSchema
 from project.schemas.stop_time import StopTimeSchema, StopTimeCreateUpdateSchema
-from project.schemas.route_stop import RouteStopSchema, RouteStopCreateUpdateSchema
+from project.schemas.route_stop import RouteStopSchema, RouteStopCreateUpdateSchema, RouteStopDetailSchema
 from project.schemas.bus import BusSchema, BusCreateUpdateSchema
 from project.schemas.repair_request import RepairRequestSchema, RepairRequestCreateUpdateSchema
 from project.schemas.technical_inspection import TechnicalInspectionSchema, TechnicalInspectionCreateUpdateSchema
-from project.schemas.trip import TripSchema, TripCreateUpdateSchema
+from project.schemas.trip import TripSchema, TripCreateUpdateSchema, TripConflictSchema
+from project.schemas.pagination import PageSchema
+from project.schemas.departure import DepartureSchema, RouteDeparturesSchema
+from project.schemas.journey import JourneySchema
 
 from project.core.exceptions import UserNotFound, UserAlreadyExists
 from project.core.exceptions import MecNotFound, MecAlreadyExists
@@ -24,25 +32,47 @@ from project.core.exceptions import RouteStopNotFound, RouteStopAlreadyExists
 from project.core.exceptions import BusNotFound, BusAlreadyExists
 from project.core.exceptions import RepairRequestAlreadyExists, RepairRequestNotFound
 from project.core.exceptions import TechnicalInspectionNotFound, TechnicalInspectionAlreadyExists
-from project.core.exceptions import TripNotFound, TripAlreadyExists
+from project.core.exceptions import TripNotFound, TripAlreadyExists, TripConflict
+from project.core.exceptions import InvalidCursor, PasswordHashQueueFull
+from project.core.config import settings
 
 from project.api.depends import (database, get_current_user, check_for_admin_access, user_repo, company_repo, route_repo, stop_repo, driver_repo, stop_time_repo,
                                  route_stop_repo, bus_repo, repair_request_repo, technical_inspection_repo, trip_repo, mec_repo)
-from project.resource.auth import get_password_hash
+from project.api.fast_json import FastJSONResponse
+from project.api.streaming import negotiate_export_format, stream_export
+from project.api.timing import TimedRoute
+from project.resource.auth import password_hasher, token_revocation_list
+from project.services.gtfs_export import GtfsExporter
+from project.services.spatial_index import stop_index
+from project.services.departure_board import departure_index
+from project.services.indexes import invalidate_schedule_indexes
+from project.services.journey_planner import journey_planner
+from project.services.response_cache import response_cache
+from project.services.trip_conflicts import trip_conflicts
+from project.services.timetable import SECONDS_PER_DAY, Headway, seconds_to_time, time_to_seconds
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
 
+user_router = APIRouter(route_class=TimedRoute)
 
-user_router = APIRouter()
+COORDINATES_PATTERN = r"^-?\d+(\.\d+)?,-?\d+(\.\d+)?$"
 
 
 @user_router.get(
     "/all_users",
-    response_model=list[UserSchema],
+    response_model=PageSchema[UserSchema],
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(get_current_user)],
 )
-async def get_all_users() -> list[UserSchema]:
-    async with database.session() as session:
-        all_users = await user_repo.get_all_users(session=session)
+async def get_all_users(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+) -> PageSchema[UserSchema]:
+    try:
+        async with database.session() as session:
+            all_users = await user_repo.get_all_users(session=session, limit=limit, after=after)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
 
     return all_users
 
@@ -76,9 +106,11 @@ async def add_user(
 ) -> UserSchema:
     check_for_admin_access(user=current_user)
     try:
+        user_dto.password = await password_hasher.hash(password=user_dto.password)
         async with database.session() as session:
-            user_dto.password = get_password_hash(password=user_dto.password)
             new_user = await user_repo.create_user(session=session, user=user_dto)
+    except PasswordHashQueueFull as error:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=error.message, headers={"Retry-After": "1"})
     except UserAlreadyExists as error:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
 
@@ -98,13 +130,16 @@ async def update_user(
 ) -> UserSchema:
     check_for_admin_access(user=current_user)
     try:
+        user_dto.password = await password_hasher.hash(password=user_dto.password)
         async with database.session() as session:
-            user_dto.password = get_password_hash(password=user_dto.password)
             updated_user = await user_repo.update_user(
                 session=session,
                 user_id=user_id,
                 user=user_dto,
             )
+            await token_revocation_list.revoke(session=session, user_id=user_id)
+    except PasswordHashQueueFull as error:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=error.message, headers={"Retry-After": "1"})
     except UserNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
 
@@ -123,6 +158,7 @@ async def delete_user(
     try:
         async with database.session() as session:
             user = await user_repo.delete_user(session=session, user_id=user_id)
+            await token_revocation_list.revoke(session=session, user_id=user_id)
     except UserNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
 
@@ -130,13 +166,19 @@ async def delete_user(
 
 @user_router.get(
     "/all_mecs",
-    response_model=list[MechanicSchema],
+    response_model=PageSchema[MechanicSchema],
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(get_current_user)],
 )
-async def get_all_mecs() -> list[MechanicSchema]:
-    async with database.session() as session:
-        all_mecs = await mec_repo.get_all_mecs(session=session)
+async def get_all_mecs(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+) -> PageSchema[MechanicSchema]:
+    try:
+        async with database.session() as session:
+            all_mecs = await mec_repo.get_all_mecs(session=session, limit=limit, after=after)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
 
     return all_mecs
 
@@ -210,11 +252,20 @@ async def delete_mec(
     return mec
 
 
-@user_router.get("/all_companies", response_model=list[CompanySchema], status_code=status.HTTP_200_OK,dependencies=[Depends(get_current_user)],)
-async def get_all_companies() -> list[CompanySchema]:
-    async with database.session() as session:
-        all_companies = await company_repo.get_all_companies(session=session)
-    return all_companies
+@user_router.get("/all_companies", response_model=PageSchema[CompanySchema], status_code=status.HTTP_200_OK,dependencies=[Depends(get_current_user)],)
+async def get_all_companies(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    if_none_match: str | None = Header(default=None),
+) -> PageSchema[CompanySchema] | Response:
+    async def load() -> PageSchema[CompanySchema]:
+        async with database.session() as session:
+            return await company_repo.get_all_companies(session=session, limit=limit, after=after)
+
+    try:
+        return await response_cache.respond(namespace="companies", key=(limit, after), load=load, if_none_match=if_none_match)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
 
 @user_router.get("/company/{id_company}", response_model=CompanySchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
 async def get_company_by_id(id_company: int) -> CompanySchema:
@@ -233,6 +284,7 @@ async def add_company(company_dto: CompanyCreateUpdateSchema, current_user: User
             new_company = await company_repo.create_company(session=session, company=company_dto)
     except CompanyAlreadyExists as error:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
+    response_cache.invalidate("companies")
     return new_company
 
 @user_router.put("/update_company/{id_company}", response_model=CompanySchema, status_code=status.HTTP_200_OK)
@@ -244,6 +296,7 @@ async def update_company(id_company: int, company_dto: CompanyCreateUpdateSchema
             updated_company = await company_repo.update_company(session=session, id_company=id_company, company=company_dto)
     except CompanyNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    response_cache.invalidate("companies")
     return updated_company
 
 @user_router.delete("/delete_company/{id_company}", status_code=status.HTTP_204_NO_CONTENT)
@@ -255,13 +308,23 @@ async def delete_company(id_company: int, current_user: UserSchema = Depends(get
             company = await company_repo.delete_company(session=session, id_company=id_company)
     except CompanyNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    response_cache.invalidate("companies")
     return None
 
-@user_router.get("/all_routes", response_model=list[RouteSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_routes() -> list[RouteSchema]:
-    async with database.session() as session:
-        all_routes = await route_repo.get_all_routes(session=session)
-    return all_routes
+@user_router.get("/all_routes", response_model=PageSchema[RouteSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_routes(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    if_none_match: str | None = Header(default=None),
+) -> PageSchema[RouteSchema] | Response:
+    async def load() -> PageSchema[RouteSchema]:
+        async with database.session() as session:
+            return await route_repo.get_all_routes(session=session, limit=limit, after=after)
+
+    try:
+        return await response_cache.respond(namespace="routes", key=(limit, after), load=load, if_none_match=if_none_match)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
 
 @user_router.get("/route/{route_number}", response_model=RouteSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
 async def get_route_by_route_number(route_number: int) -> RouteSchema:
@@ -272,6 +335,53 @@ async def get_route_by_route_number(route_number: int) -> RouteSchema:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
     return route
 
+@user_router.get("/route/{route_number}/departures", response_model=RouteDeparturesSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_route_departures(
+    route_number: int,
+    from_time: time = Query(default=time(0), alias="from"),
+    to_time: time | None = Query(default=None, alias="to"),
+    trip_date: date | None = Query(default=None, alias="date"),
+    limit: int = Query(default=500, ge=1, le=MAX_PAGE_SIZE),
+) -> RouteDeparturesSchema:
+    try:
+        async with database.session() as session:
+            route = await route_repo.get_route_by_number(session=session, route_number=route_number)
+            headway = Headway.from_route(route.first_adv, route.last_adv, route.interval)
+            if headway is None:
+                start_times = await trip_repo.get_route_start_times(
+                    session=session, route_number=route_number, start=from_time, end=to_time, trip_date=trip_date, limit=limit,
+                )
+                return RouteDeparturesSchema(route_number=route_number, source="trips", departures=start_times)
+    except RouteNotFound as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+
+    start = time_to_seconds(from_time)
+    end = headway.last if to_time is None else time_to_seconds(to_time)
+    if end < start:
+        end += SECONDS_PER_DAY
+    departures = islice(headway.clock_window(start, end), limit)
+    return RouteDeparturesSchema(route_number=route_number, source="headway", departures=[seconds_to_time(departure) for departure in departures])
+
+@user_router.get("/route/{route_number}/stops", response_model=list[RouteStopDetailSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_route_stop_list(route_number: int) -> list[RouteStopDetailSchema]:
+    try:
+        async with database.session() as session:
+            route_stops = await route_stop_repo.get_route_stop_list(session=session, route_number=route_number)
+            if not route_stops:
+                await route_repo.get_route_by_number(session=session, route_number=route_number)
+    except RouteNotFound as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    return route_stops
+
+@user_router.get("/route/{route_number}/full", response_model=RouteFullSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_route_full(route_number: int) -> RouteFullSchema:
+    try:
+        async with database.session() as session:
+            route = await route_repo.get_route_full(session=session, route_number=route_number)
+    except RouteNotFound as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    return route
+
 @user_router.post("/add_route", response_model=RouteSchema, status_code=status.HTTP_201_CREATED)
 async def add_route(route_dto: RouteCreateUpdateSchema, current_user: UserSchema = Depends(get_current_user),
 ) -> RouteSchema:
@@ -281,6 +391,7 @@ async def add_route(route_dto: RouteCreateUpdateSchema, current_user: UserSchema
             new_route = await route_repo.create_route(session=session, route=route_dto)
     except RouteAlreadyExists as error:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
+    response_cache.invalidate("routes")
     return new_route
 
 @user_router.put("/update_route/{route_number}", response_model=RouteSchema, status_code=status.HTTP_200_OK)
@@ -292,6 +403,8 @@ async def update_route(route_number: int, route_dto: RouteCreateUpdateSchema, cu
             updated_route = await route_repo.update_route(session=session, route_number=route_number, route=route_dto)
     except RouteNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    invalidate_schedule_indexes()
+    response_cache.invalidate("routes")
     return updated_route
 
 @user_router.delete("/delete_route/{route_number}", status_code=status.HTTP_204_NO_CONTENT)
@@ -303,13 +416,34 @@ async def delete_route(route_number: int, current_user: UserSchema = Depends(get
             route = await route_repo.delete_route(session=session, route_number=route_number)
     except RouteNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    invalidate_schedule_indexes()
+    response_cache.invalidate("routes")
     return None
 
-@user_router.get("/all_stops", response_model=list[StopSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_stops() -> list[StopSchema]:
-    async with database.session() as session:
-        all_stops = await stop_repo.get_all_stops(session=session)
-    return all_stops
+@user_router.get("/all_stops", response_model=PageSchema[StopSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_stops(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    if_none_match: str | None = Header(default=None),
+) -> PageSchema[StopSchema] | Response:
+    async def load() -> PageSchema[StopSchema]:
+        async with database.session() as session:
+            return await stop_repo.get_all_stops(session=session, limit=limit, after=after)
+
+    try:
+        return await response_cache.respond(namespace="stops", key=(limit, after), load=load, if_none_match=if_none_match)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
+
+@user_router.get("/stops/nearby", response_model=list[NearbyStopSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_nearby_stops(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius: float = Query(default=500, gt=0, le=50000),
+    limit: int = Query(default=20, ge=1, le=200),
+) -> list[NearbyStopSchema]:
+    await stop_index.ensure_loaded()
+    return stop_index.nearby(latitude=lat, longitude=lon, radius_m=radius, limit=limit)
 
 @user_router.get("/stop/{latitude}/{longitude}", response_model=StopSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
 async def get_stop_by_coordinates(latitude: float, longitude: float) -> StopSchema:
@@ -320,6 +454,22 @@ async def get_stop_by_coordinates(latitude: float, longitude: float) -> StopSche
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
     return stop
 
+@user_router.get("/stop/{latitude}/{longitude}/departures", response_model=list[DepartureSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_stop_departures(
+    latitude: float,
+    longitude: float,
+    from_time: time | None = Query(default=None, alias="from"),
+    limit: int = Query(default=10, ge=1, le=100),
+) -> list[DepartureSchema]:
+    await stop_index.ensure_loaded()
+    if (latitude, longitude) not in stop_index:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=StopNotFound(_latitude=latitude, _longitude=longitude).message)
+    if from_time is None:
+        # Schedule times are local to the agency, as in GTFS.
+        from_time = datetime.now(ZoneInfo(settings.GTFS_AGENCY_TIMEZONE)).time()
+    await departure_index.ensure_loaded()
+    return departure_index.next_departures(latitude=latitude, longitude=longitude, after=from_time, limit=limit)
+
 @user_router.post("/add_stop", response_model=StopSchema, status_code=status.HTTP_201_CREATED)
 async def add_stop(stop_dto: StopCreateUpdateSchema, current_user: UserSchema = Depends(get_current_user),
 ) -> StopSchema:
@@ -329,6 +479,8 @@ async def add_stop(stop_dto: StopCreateUpdateSchema, current_user: UserSchema =
             new_stop = await stop_repo.create_stop(session=session, stop=stop_dto)
     except StopAlreadyExists as error:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
+    stop_index.add(new_stop)
+    response_cache.invalidate("stops")
     return new_stop
 
 @user_router.put("/update_stop/{latitude}/{longitude}", response_model=StopSchema, status_code=status.HTTP_200_OK)
@@ -340,6 +492,10 @@ async def update_stop(latitude: float, longitude: float, stop_dto: StopCreateUpd
             updated_stop = await stop_repo.update_stop(session=session, latitude=latitude, longitude=longitude, stop=stop_dto)
     except StopNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    stop_index.remove(latitude=latitude, longitude=longitude)
+    invalidate_schedule_indexes()
+    stop_index.add(updated_stop)
+    response_cache.invalidate("stops")
     return updated_stop
 
 @user_router.delete("/delete_stop/{latitude}/{longitude}", status_code=status.HTTP_204_NO_CONTENT)
@@ -351,13 +507,19 @@ async def delete_stop(latitude: float, longitude: float, current_user: UserSchem
             stop = await stop_repo.delete_stop(session=session, latitude=latitude, longitude=longitude)
     except StopNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    stop_index.remove(latitude=latitude, longitude=longitude)
+    invalidate_schedule_indexes()
+    response_cache.invalidate("stops")
     return None
 
 
-@user_router.get("/all_drivers", response_model=list[DriverSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_drivers() -> list[DriverSchema]:
-    async with database.session() as session:
-        all_drivers = await driver_repo.get_all_drivers(session=session)
+@user_router.get("/all_drivers", response_model=PageSchema[DriverSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_drivers(limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: str | None = None) -> PageSchema[DriverSchema]:
+    try:
+        async with database.session() as session:
+            all_drivers = await driver_repo.get_all_drivers(session=session, limit=limit, after=after)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
     return all_drivers
 
 @user_router.get("/driver/{passport_number}", response_model=DriverSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
@@ -402,11 +564,23 @@ async def delete_driver(passport_number: str, current_user: UserSchema = Depends
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
 
 
-@user_router.get("/all_stop_times", response_model=list[StopTimeSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_stop_times() -> list[StopTimeSchema]:
-    async with database.session() as session:
-        all_stop_times = await stop_time_repo.get_all_stop_times(session=session)
-    return all_stop_times
+@user_router.get("/all_stop_times", response_model=PageSchema[StopTimeSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_stop_times(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    export_format: str | None = Query(default=None, alias="format", pattern="^(json|ndjson|csv)$"),
+    accept: str | None = Header(default=None),
+) -> FastJSONResponse | StreamingResponse:
+    export_format = negotiate_export_format(export_format=export_format, accept=accept)
+    if export_format is not None:
+        return stream_export(open_stream=stop_time_repo.stream_all_stop_times, export_format=export_format, name="stop_times")
+    try:
+        async with database.session() as session:
+            rows, next_cursor = await stop_time_repo.get_all_stop_time_rows(session=session, limit=limit, after=after)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
+    # Encoded as read; response_model only documents the shape.
+    return FastJSONResponse({"items": rows, "next_cursor": next_cursor})
 
 @user_router.post("/add_stop_time", response_model=StopTimeSchema, status_code=status.HTTP_201_CREATED)
 async def add_stop_time(stop_time_dto: StopTimeCreateUpdateSchema, current_user: UserSchema = Depends(get_current_user),
@@ -417,6 +591,7 @@ async def add_stop_time(stop_time_dto: StopTimeCreateUpdateSchema, current_user:
             new_stop_time = await stop_time_repo.create_stop_time(session=session, stop_time=stop_time_dto)
     except StopTimeAlreadyExists as error:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
+    invalidate_schedule_indexes()
     return new_stop_time
 
 
@@ -429,13 +604,29 @@ async def delete_stop_time(latitude: float, longitude: float, route_number: int,
             await stop_time_repo.delete_stop_time(session=session, latitude=latitude, longitude=longitude, route_number=route_number)
     except StopTimeNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    invalidate_schedule_indexes()
 
 
-@user_router.get("/all_route_stops", response_model=list[RouteStopSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_route_stops() -> list[RouteStopSchema]:
-    async with database.session() as session:
-        all_route_stops = await route_stop_repo.get_all_route_stops(session=session)
-    return all_route_stops
+@user_router.get("/all_route_stops", response_model=PageSchema[RouteStopSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_route_stops(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    export_format: str | None = Query(default=None, alias="format", pattern="^(json|ndjson|csv)$"),
+    accept: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+) -> PageSchema[RouteStopSchema] | StreamingResponse | Response:
+    export_format = negotiate_export_format(export_format=export_format, accept=accept)
+    if export_format is not None:
+        return stream_export(open_stream=route_stop_repo.stream_all_route_stops, export_format=export_format, name="route_stops")
+
+    async def load() -> PageSchema[RouteStopSchema]:
+        async with database.session() as session:
+            return await route_stop_repo.get_all_route_stops(session=session, limit=limit, after=after)
+
+    try:
+        return await response_cache.respond(namespace="route_stops", key=(limit, after), load=load, if_none_match=if_none_match)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
 
 @user_router.post("/add_route_stop", response_model=RouteStopSchema, status_code=status.HTTP_201_CREATED)
 async def add_route_stop(route_stop_dto: RouteStopCreateUpdateSchema, current_user: UserSchema = Depends(get_current_user),
@@ -446,6 +637,8 @@ async def add_route_stop(route_stop_dto: RouteStopCreateUpdateSchema, current_us
             new_route_stop = await route_stop_repo.create_route_stop(session=session, route_stop=route_stop_dto)
     except RouteStopAlreadyExists as error:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
+    invalidate_schedule_indexes()
+    response_cache.invalidate("route_stops")
     return new_route_stop
 
 @user_router.delete("/delete_route_stop/{latitude}/{longitude}/{route_number}", status_code=status.HTTP_204_NO_CONTENT)
@@ -457,12 +650,17 @@ async def delete_route_stop(latitude: float, longitude: float, route_number: int
             await route_stop_repo.delete_route_stop(session=session, latitude=latitude, longitude=longitude, route_number=route_number)
     except RouteStopNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    invalidate_schedule_indexes()
+    response_cache.invalidate("route_stops")
 
 
-@user_router.get("/all_buses", response_model=list[BusSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_buses() -> list[BusSchema]:
-    async with database.session() as session:
-        all_buses = await bus_repo.get_all_buses(session=session)
+@user_router.get("/all_buses", response_model=PageSchema[BusSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_buses(limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: str | None = None) -> PageSchema[BusSchema]:
+    try:
+        async with database.session() as session:
+            all_buses = await bus_repo.get_all_buses(session=session, limit=limit, after=after)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
     return all_buses
 
 @user_router.get("/bus/{gos_num}", response_model=BusSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
@@ -507,10 +705,13 @@ async def delete_bus(gos_num: str, current_user: UserSchema = Depends(get_curren
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
 
 
-@user_router.get("/all_requests", response_model=list[RepairRequestSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_requests() -> list[RepairRequestSchema]:
-    async with database.session() as session:
-        all_requests = await repair_request_repo.get_all_requests(session=session)
+@user_router.get("/all_requests", response_model=PageSchema[RepairRequestSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_requests(limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: str | None = None) -> PageSchema[RepairRequestSchema]:
+    try:
+        async with database.session() as session:
+            all_requests = await repair_request_repo.get_all_requests(session=session, limit=limit, after=after)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
     return all_requests
 
 @user_router.get("/request/{request_id}", response_model=RepairRequestSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
@@ -555,10 +756,13 @@ async def delete_request(request_id: int, current_user: UserSchema = Depends(get
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
 
 
-@user_router.get("/all_inspections", response_model=list[TechnicalInspectionSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_inspections() -> list[TechnicalInspectionSchema]:
-    async with database.session() as session:
-        all_inspections = await technical_inspection_repo.get_all_inspections(session=session)
+@user_router.get("/all_inspections", response_model=PageSchema[TechnicalInspectionSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_inspections(limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: str | None = None) -> PageSchema[TechnicalInspectionSchema]:
+    try:
+        async with database.session() as session:
+            all_inspections = await technical_inspection_repo.get_all_inspections(session=session, limit=limit, after=after)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
     return all_inspections
 
 @user_router.get("/inspection/{inspection_id}", response_model=TechnicalInspectionSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
@@ -602,11 +806,51 @@ async def delete_inspection(inspection_id: int, current_user: UserSchema = Depen
     except TechnicalInspectionNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
 
-@user_router.get("/all_trips", response_model=list[TripSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
-async def get_all_trips() -> list[TripSchema]:
-    async with database.session() as session:
-        all_trips = await trip_repo.get_all_trips(session=session)
-    return all_trips
+@user_router.get("/all_trips", response_model=PageSchema[TripSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_all_trips(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    export_format: str | None = Query(default=None, alias="format", pattern="^(json|ndjson|csv)$"),
+    accept: str | None = Header(default=None),
+) -> FastJSONResponse | StreamingResponse:
+    export_format = negotiate_export_format(export_format=export_format, accept=accept)
+    if export_format is not None:
+        return stream_export(open_stream=trip_repo.stream_all_trips, export_format=export_format, name="trips")
+    try:
+        async with database.session() as session:
+            rows, next_cursor = await trip_repo.get_all_trip_rows(session=session, limit=limit, after=after)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.message)
+    # Encoded as read; response_model only documents the shape.
+    return FastJSONResponse({"items": rows, "next_cursor": next_cursor})
+
+@user_router.get("/export/gtfs", response_class=StreamingResponse, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def export_gtfs() -> StreamingResponse:
+    headers = {"Content-Disposition": 'attachment; filename="gtfs.zip"'}
+    return StreamingResponse(GtfsExporter().export(), media_type="application/zip", headers=headers)
+
+@user_router.get("/journeys", response_model=list[JourneySchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_journeys(
+    from_point: str = Query(alias="from", pattern=COORDINATES_PATTERN, examples=["55.7558,37.6173"]),
+    to_point: str = Query(alias="to", pattern=COORDINATES_PATTERN, examples=["55.7290,37.6010"]),
+    depart_at: str | None = Query(default=None, examples=["2024-05-01T08:30:00", "08:30"]),
+) -> list[JourneySchema]:
+    origin = tuple(float(value) for value in from_point.split(","))
+    destination = tuple(float(value) for value in to_point.split(","))
+    if depart_at is None:
+        moment = datetime.now(ZoneInfo(settings.GTFS_AGENCY_TIMEZONE))
+        service_date, departure = moment.date(), moment.time()
+    else:
+        try:
+            if "T" in depart_at or " " in depart_at:
+                moment = datetime.fromisoformat(depart_at)
+                service_date, departure = moment.date(), moment.time()
+            else:
+                service_date, departure = None, time.fromisoformat(depart_at)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="depart_at должен быть временем ЧЧ:ММ или датой и временем в формате ISO 8601")
+    await journey_planner.ensure_loaded()
+    return journey_planner.plan(origin=origin, destination=destination, depart_at=time_to_seconds(departure), service_date=service_date)
 
 @user_router.get("/trip/{trip_id}", response_model=TripSchema, status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
 async def get_trip_by_id(trip_id: int) -> TripSchema:
@@ -617,15 +861,29 @@ async def get_trip_by_id(trip_id: int) -> TripSchema:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
     return trip
 
+@user_router.get("/trips/conflicts", response_model=list[TripConflictSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def get_trip_conflicts(trip_date: date = Query(alias="date")) -> list[TripConflictSchema]:
+    async with database.session() as session:
+        return await trip_conflicts.find_day_conflicts(session=session, trip_date=trip_date)
+
+@user_router.post("/trips/validate", response_model=list[TripConflictSchema], status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)],)
+async def validate_trips(trips: list[TripCreateUpdateSchema]) -> list[TripConflictSchema]:
+    if len(trips) > settings.BULK_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Не более {settings.BULK_MAX_ROWS} строк за один запрос")
+    async with database.session() as session:
+        return await trip_conflicts.validate(session=session, trips=trips)
+
 @user_router.post("/add_trip", response_model=TripSchema, status_code=status.HTTP_201_CREATED)
 async def add_trip(trip_dto: TripCreateUpdateSchema, current_user: UserSchema = Depends(get_current_user),
 ) -> TripSchema:
     check_for_admin_access(user=current_user)
     try:
         async with database.session() as session:
+            await trip_conflicts.check(session=session, trip=trip_dto)
             new_trip = await trip_repo.create_trip(session=session, trip=trip_dto)
-    except TripAlreadyExists as error:
+    except (TripAlreadyExists, TripConflict) as error:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
+    invalidate_schedule_indexes()
     return new_trip
 
 @user_router.put("/update_trip/{trip_id}", response_model=TripSchema, status_code=status.HTTP_200_OK)
@@ -634,9 +892,14 @@ async def update_trip(trip_id: int, trip_dto: TripCreateUpdateSchema, current_us
     check_for_admin_access(user=current_user)
     try:
         async with database.session() as session:
+            await trip_repo.lock_trip(session=session, trip_id=trip_id)
+            await trip_conflicts.check(session=session, trip=trip_dto, trip_id=trip_id)
             updated_trip = await trip_repo.update_trip(session=session, trip_id=trip_id, trip=trip_dto)
     except TripNotFound as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    except TripConflict as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
+    invalidate_schedule_indexes()
     return updated_trip
 
 @user_router.delete("/delete_trip/{trip_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -647,4 +910,5 @@ async def delete_trip(trip_id: int, current_user: UserSchema = Depends(get_curre
         async with database.session() as session:
             await trip_repo.delete_trip(session=session, trip_id=trip_id)
     except TripNotFound as error:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.message)
+    invalidate_schedule_indexes()
\ No newline at end of file
@@ -28,9 +28,50 @@ class Settings(BaseSettings):
     POSTGRES_USER: SecretStr
     POSTGRES_PASSWORD: SecretStr
     POSTGRES_RECONNECT_INTERVAL_SEC: int
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT_SEC: float = 10
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_POOL_RECYCLE_SEC: int = 1800
+    POSTGRES_MAX_CONNECTIONS: int = 100
+    POSTGRES_RESERVED_CONNECTIONS: int = 10
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     SECRET_AUTH_KEY: SecretStr
     AUTH_ALGORITHM: str
+    AUTH_STATELESS: bool = False
+    AUTH_REVOCATION_TTL_SEC: float = 5
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    STREAM_CHUNK_SIZE: int = 1000
+    BULK_MAX_ROWS: int = 100000
+    GTFS_AGENCY_NAME: str = "BusScheduleApp"
+    GTFS_AGENCY_URL: str = "http://localhost"
+    GTFS_AGENCY_TIMEZONE: str = "Europe/Moscow"
+    STOP_INDEX_CELL_DEG: float = 0.01
+    STOP_INDEX_MAX_AGE_SEC: int = 300
+    DEPARTURE_INDEX_MAX_AGE_SEC: int = 300
+    JOURNEY_PLANNER_MAX_AGE_SEC: int = 300
+    JOURNEY_MAX_TRANSFERS: int = 3
+    JOURNEY_MAX_WALK_M: float = 400
+    JOURNEY_WALK_SPEED_MPS: float = 1.2
+    BUS_MIN_LAYOVER_SEC: int = 300
+    DRIVER_MAX_SHIFT_SEC: int = 43200
+    DRIVER_MIN_BREAK_SEC: int = 900
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_MAX_AGE_SEC: int = 60
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int = 0
+    WEB_GRACEFUL_TIMEOUT_SEC: int = 30
+    WEB_PRELOAD_INDEXES: bool = True
+    METRICS_DIR: str = ""
+    METRICS_FLUSH_SEC: float = 5
+    SLOW_QUERY_SEC: float = 0.5
+    SERVER_TIMING: bool = False
+    READINESS_PROBE_INTERVAL_SEC: float = 5
+    READINESS_PROBE_TIMEOUT_SEC: float = 2
+    READINESS_MAX_POOL_SATURATION: float = 1.0
+    JOB_PROGRESS_SAVE_SEC: float = 1
 
 
 
@@ -188,4 +188,22 @@ class TripAlreadyExists(BaseException):
     _ERROR_MESSAGE_TEMPLATE: Final[str] = "Trip с trip_id {trip_id} уже существует"
     def __init__(self, trip_id: int) -> None:
         self.message = self._ERROR_MESSAGE_TEMPLATE.format(trip_id=trip_id)
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+class TripConflict(BaseException):
+    _ERROR_MESSAGE_TEMPLATE: Final[str] = "{resource} {key} уже занят в рейсе {trip_id} в это время"
+    def __init__(self, resource: str, key: str, trip_id: int) -> None:
+        self.message = self._ERROR_MESSAGE_TEMPLATE.format(resource=resource, key=key, trip_id=trip_id)
+        super().__init__(self.message)
+
+class InvalidCursor(BaseException):
+    _ERROR_MESSAGE_TEMPLATE: Final[str] = "Некорректный курсор пагинации '{cursor}'"
+    def __init__(self, cursor: str) -> None:
+        self.message = self._ERROR_MESSAGE_TEMPLATE.format(cursor=cursor)
+        super().__init__(self.message)
+
+class PasswordHashQueueFull(BaseException):
+    _ERROR_MESSAGE_TEMPLATE: Final[str] = "Слишком много одновременных запросов авторизации, повторите попытку позже"
+    def __init__(self) -> None:
+        self.message = self._ERROR_MESSAGE_TEMPLATE
+        super().__init__(self.message)
@@ -0,0 +1,126 @@
+import bisect
+import threading
+from typing import Any, Iterable, Sequence
+
+
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self._buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self._buckets, counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = count
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+def format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+class LabeledCounter:
+    def __init__(self, label_names: Sequence[str]) -> None:
+        self._label_names = tuple(label_names)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: Any, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            values = list(self._values.items())
+        return {format_labels(self._label_names, label_values): value for label_values, value in values}
+
+
+class LabeledHistogram:
+    def __init__(self, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self._label_names = tuple(label_names)
+        self._buckets = buckets
+        self._histograms: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *label_values: Any) -> Histogram:
+        histogram = self._histograms.get(label_values)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(label_values, Histogram(self._buckets))
+        return histogram
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            histograms = list(self._histograms.items())
+        return {format_labels(self._label_names, label_values): histogram.snapshot() for label_values, histogram in histograms}
+
+
+def merge_snapshots(snapshots: Iterable[dict]) -> dict:
+    """Sum {"counters"|"gauges"|"histograms": {name: {labels: value}}} snapshots of several processes."""
+    merged: dict[str, dict[str, dict]] = {"counters": {}, "gauges": {}, "histograms": {}}
+    for snapshot in snapshots:
+        for kind in ("counters", "gauges"):
+            for name, series in snapshot.get(kind, {}).items():
+                target = merged[kind].setdefault(name, {})
+                for labels, value in series.items():
+                    target[labels] = target.get(labels, 0) + value
+        for name, series in snapshot.get("histograms", {}).items():
+            target = merged["histograms"].setdefault(name, {})
+            for labels, histogram in series.items():
+                if labels not in target:
+                    target[labels] = {"buckets": dict(histogram["buckets"]), "sum": histogram["sum"], "count": histogram["count"]}
+                    continue
+                total = target[labels]
+                for bound, count in histogram["buckets"].items():
+                    total["buckets"][bound] = total["buckets"].get(bound, 0) + count
+                total["sum"] += histogram["sum"]
+                total["count"] += histogram["count"]
+    return merged
+
+
+def _series(name: str, labels: str, extra: str = "") -> str:
+    joined = ",".join(part for part in (labels, extra) if part)
+    return f"{name}{{{joined}}}" if joined else name
+
+
+def render_prometheus(snapshot: dict, help_texts: dict[str, str]) -> str:
+    """A merged snapshot in the Prometheus text exposition format."""
+    lines = []
+    for kind, metric_type in (("counters", "counter"), ("gauges", "gauge"), ("histograms", "histogram")):
+        for name, series in sorted(snapshot.get(kind, {}).items()):
+            if name in help_texts:
+                lines.append(f"# HELP {name} {help_texts[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in sorted(series.items()):
+                if kind != "histograms":
+                    lines.append(f"{_series(name, labels)} {value}")
+                    continue
+                for bound, count in value["buckets"].items():
+                    bound_label = f'le="{bound}"'
+                    lines.append(f"{_series(name + '_bucket', labels, bound_label)} {count}")
+                lines.append(f"{_series(name + '_sum', labels)} {value['sum']}")
+                lines.append(f"{_series(name + '_count', labels)} {value['count']}")
+    lines.append("")
+    return "\n".join(lines)
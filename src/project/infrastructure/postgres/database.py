@@ -3,16 +3,27 @@ from typing import Any, AsyncIterator, Dict
 
 from sqlalchemy import JSON, MetaData, String
 from sqlalchemy.exc import PendingRollbackError
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from project.core.config import settings
 from project.core.exceptions import DatabaseError
+from project.infrastructure.postgres.instrumentation import instrument_engine
+from project.infrastructure.postgres.pool import InstrumentedAsyncQueuePool, PoolStats
 
 
 class PostgresDatabase:
     def __init__(self) -> None:
-        self._engine = create_async_engine(settings.postgres_url)
+        self._engine = create_async_engine(
+            settings.postgres_url,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=settings.POSTGRES_POOL_SIZE,
+            max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+            pool_timeout=settings.POSTGRES_POOL_TIMEOUT_SEC,
+            pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+            pool_recycle=settings.POSTGRES_POOL_RECYCLE_SEC,
+        )
+        instrument_engine(self._engine.sync_engine)
         self._session_factory = async_sessionmaker(
             bind=self._engine,
             autocommit=False,
@@ -31,6 +42,23 @@ class PostgresDatabase:
                 await session.rollback()
                 raise DatabaseError(message=repr(error))
 
+    @property
+    def engine(self) -> AsyncEngine:
+        return self._engine
+
+    def pool_stats(self) -> PoolStats:
+        pool = self._engine.pool
+        return PoolStats(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # QueuePool counts overflow from -pool_size while the pool is not full.
+            overflow=max(pool.overflow(), 0),
+            max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+            timeout_sec=pool.timeout(),
+            checkout_wait_sec=pool.checkout_wait.snapshot(),
+        )
+
 
 database = PostgresDatabase()
 metadata = MetaData(schema=settings.POSTGRES_SCHEMA)
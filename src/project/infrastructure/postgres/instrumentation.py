@@ -0,0 +1,84 @@
+import logging
+import time
+from collections.abc import Mapping, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from project.core.config import settings
+from project.core.metrics import Histogram
+
+
+logger = logging.getLogger(__name__)
+
+# How much of a slow statement and of its parameters goes into the log line.
+LOGGED_STATEMENT_CHARS = 500
+LOGGED_PARAMETERS = 10
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    db_time_sec: float = 0.0
+    checkouts: int = 0
+    checkout_wait_sec: float = 0.0
+    # "METHOD /path" of the request, for the slow statement log.
+    request: str | None = None
+
+
+# The stats of the request being handled, set by the metrics middleware. SQLAlchemy
+# runs the engine events below in the context of the awaiting task, so they see it.
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+statement_duration = Histogram()
+
+
+def parameters_shape(parameters: Any, executemany: bool = False) -> str:
+    """The types of the parameters, never their values, which may be personal data or passwords."""
+    if executemany and isinstance(parameters, Sequence) and parameters:
+        return f"{len(parameters)} x {parameters_shape(parameters[0])}"
+    if isinstance(parameters, Mapping):
+        items = [f"{key}: {type(value).__name__}" for key, value in parameters.items()]
+        opening, closing = "{", "}"
+    elif isinstance(parameters, Sequence) and not isinstance(parameters, (str, bytes)):
+        items = [type(value).__name__ for value in parameters]
+        opening, closing = "(", ")"
+    else:
+        return type(parameters).__name__
+    if len(items) > LOGGED_PARAMETERS:
+        items = items[:LOGGED_PARAMETERS] + [f"... {len(items) - LOGGED_PARAMETERS} more"]
+    return opening + ", ".join(items) + closing
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # A connection runs one statement at a time. One that failed never reaches the after
+    # event and leaves its start time behind, to be replaced by the next statement's.
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started_at = conn.info.pop("query_started_at", None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+    statement_duration.observe(elapsed)
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time_sec += elapsed
+    if elapsed >= settings.SLOW_QUERY_SEC:
+        logger.warning(
+            "Slow statement (%.3f s) in %s: %s; parameters: %s",
+            elapsed,
+            stats.request if stats is not None and stats.request else "no request",
+            " ".join(statement.split())[:LOGGED_STATEMENT_CHARS],
+            parameters_shape(parameters, executemany),
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
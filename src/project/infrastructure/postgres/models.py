@@ -1,6 +1,8 @@
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey, Numeric, Time, Interval, Date, DECIMAL, ForeignKeyConstraint
-from datetime import time, date, timedelta
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, Numeric, Time, Interval, Date, DateTime, DECIMAL, ForeignKeyConstraint, Index
+from datetime import time, date, datetime, timedelta
+from typing import Any
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy import ForeignKey, false
 from project.infrastructure.postgres.database import Base
 
@@ -60,6 +62,11 @@ class Route(Base):
     last_adv: Mapped[time | None] = mapped_column(nullable=True)
     stops_list: Mapped[str | None] = mapped_column(nullable=True)
 
+    # lazy="raise": related rows are only ever loaded explicitly, never one query per access.
+    route_stops: Mapped[list["RouteStop"]] = relationship(lazy="raise", order_by="RouteStop.stop_sequence", viewonly=True)
+    stop_times: Mapped[list["StopTime"]] = relationship(lazy="raise", viewonly=True)
+    buses: Mapped[list["Bus"]] = relationship(lazy="raise", order_by="Bus.gos_num", viewonly=True)
+
 class Stop(Base):
     __tablename__ = "stops"
     latitude: Mapped[float] = mapped_column(Numeric(9, 6), primary_key=True)
@@ -78,6 +85,9 @@ class Driver(Base):
     contract_number: Mapped[str | None] = mapped_column(nullable=True)
     contract_start: Mapped[date | None] = mapped_column(Date, nullable=True)
     contract_end: Mapped[date | None] = mapped_column(Date, nullable=True)
+    __table_args__ = (
+        Index("ix_drivers_id_company", "id_company"),
+    )
 
 
 #class RouteStop(Base):
@@ -92,13 +102,17 @@ class RouteStop(Base):
     latitude: Mapped[float] = mapped_column(Numeric(9, 6), primary_key=True)
     longitude: Mapped[float] = mapped_column(Numeric(9, 6), primary_key=True)
     route_number: Mapped[int] = mapped_column(ForeignKey("routes.route_number"), primary_key=True)
+    stop_sequence: Mapped[int] = mapped_column(nullable=False)
 
     __table_args__ = (
         ForeignKeyConstraint(
             ["latitude", "longitude"], ["stops.latitude", "stops.longitude"]
         ),
+        Index("ix_route_stops_route_number_stop_sequence", "route_number", "stop_sequence"),
     )
 
+    stop: Mapped["Stop"] = relationship(lazy="raise", viewonly=True)
+
 #class StopTime(Base):
 #    __tablename__ = "stop_time"
 #    latitude: Mapped[float] = mapped_column(Numeric(9, 6), ForeignKey("stops.latitude"), primary_key=True)
@@ -120,6 +134,7 @@ class StopTime(Base):
         ForeignKeyConstraint(
             ["latitude", "longitude"], ["stops.latitude", "stops.longitude"]
         ),
+        Index("ix_stop_time_route_number", "route_number"),
     )
 
 class Bus(Base):
@@ -134,6 +149,11 @@ class Bus(Base):
     driver_passport: Mapped[str | None] = mapped_column(ForeignKey("drivers.passport_number"), nullable=True)
     capacity: Mapped[int | None] = mapped_column(nullable=True)
     registration_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    __table_args__ = (
+        Index("ix_buses_route_number", "route_number"),
+        Index("ix_buses_owner_company", "owner_company"),
+        Index("ix_buses_driver_passport", "driver_passport"),
+    )
 
 
 class RepairRequest(Base):
@@ -142,6 +162,9 @@ class RepairRequest(Base):
     gos_num: Mapped[str | None] = mapped_column(ForeignKey("buses.gos_num"), nullable=True)
     repair_cost: Mapped[float | None] = mapped_column(Numeric(10, 2), nullable=True)
     repair_duration: Mapped[timedelta | None] = mapped_column(Interval, nullable=True)
+    __table_args__ = (
+        Index("ix_repair_requests_gos_num", "gos_num"),
+    )
 
 
 class TechnicalInspection(Base):
@@ -150,6 +173,10 @@ class TechnicalInspection(Base):
     mechanic_passport: Mapped[str | None] = mapped_column(ForeignKey("mechanics.passport_number"), nullable=True)
     gos_num: Mapped[str | None] = mapped_column(ForeignKey("buses.gos_num"), nullable=True)
     conclusion: Mapped[str | None] = mapped_column(nullable=True)
+    __table_args__ = (
+        Index("ix_technical_inspections_gos_num", "gos_num"),
+        Index("ix_technical_inspections_mechanic_passport", "mechanic_passport"),
+    )
 
 
 class Trip(Base):
@@ -160,4 +187,35 @@ class Trip(Base):
     gos_num: Mapped[str | None] = mapped_column(ForeignKey("buses.gos_num"), nullable=True)
     trip_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     start_time: Mapped[time | None] = mapped_column(Time, nullable=True)
-    end_time: Mapped[time | None] = mapped_column(Time, nullable=True)
\ No newline at end of file
+    end_time: Mapped[time | None] = mapped_column(Time, nullable=True)
+    __table_args__ = (
+        Index("ix_trips_driver_passport_trip_date", "driver_passport", "trip_date"),
+        Index("ix_trips_gos_num_trip_date", "gos_num", "trip_date"),
+        Index("ix_trips_route_number_start_time", "route_number", "start_time"),
+        Index("ix_trips_trip_date", "trip_date"),
+    )
+
+
+class TokenRevocation(Base):
+    # Tokens of the user issued before revoked_at are rejected. No foreign key: a
+    # deleted user's tokens must stay revoked.
+    __tablename__ = "token_revocations"
+    user_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class BackgroundJob(Base):
+    # Background jobs of every worker process, so that any of them can report a job.
+    __tablename__ = "jobs"
+    id: Mapped[str] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[str] = mapped_column(nullable=False)
+    progress: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    result: Mapped[Any] = mapped_column(JSONB, nullable=True)
+    error: Mapped[str] = mapped_column(nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_started_at", "started_at"),
+    )
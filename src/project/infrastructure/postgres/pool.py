@@ -0,0 +1,44 @@
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from project.core.metrics import Histogram
+from project.infrastructure.postgres.instrumentation import current_query_stats
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    timeout_sec: float
+    # Histogram.snapshot() of the checkout waits.
+    checkout_wait_sec: dict
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    # QueuePool has no "before checkout" hook, so the time spent waiting for a free
+    # connection (or opening a new one) is measured around _do_get itself.
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = Histogram()
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.checkout_wait.observe(elapsed)
+            stats = current_query_stats.get()
+            if stats is not None:
+                stats.checkouts += 1
+                stats.checkout_wait_sec += elapsed
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        pool = super().recreate()
+        pool.checkout_wait = self.checkout_wait
+        return pool
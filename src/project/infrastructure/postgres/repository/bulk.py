@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Sequence
+
+from sqlalchemy import Numeric, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass
+class BulkInsertOutcome:
+    inserted: int = 0
+    # Positions in the submitted list.
+    conflicts: list[int] = field(default_factory=list)
+    missing_references: list[int] = field(default_factory=list)
+
+
+def _to_db_value(column, value: Any) -> Any:
+    if value is not None and isinstance(column.type, Numeric) and not isinstance(value, Decimal):
+        return Decimal(str(value))
+    return value
+
+
+async def copy_insert(
+    session: AsyncSession,
+    collection: type,
+    rows: Sequence[dict[str, Any]],
+    conflict_columns: Sequence[str] = (),
+) -> BulkInsertOutcome:
+    """COPY rows into a temporary table, then move them into the target table in one statement.
+
+    Rows whose foreign keys point nowhere are reported in missing_references. Rows that
+    collide with an existing row (or an earlier row of the same batch) on conflict_columns
+    are reported in conflicts. Neither aborts the batch.
+    """
+    if not rows:
+        return BulkInsertOutcome()
+
+    table = collection.__table__
+    connection = await session.connection()
+    preparer = connection.dialect.identifier_preparer
+    column_names = list(rows[0].keys())
+    columns = ", ".join(preparer.quote(name) for name in column_names)
+    target = preparer.format_table(table)
+    staging = preparer.quote(f"_bulk_{table.name}")
+
+    await session.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    await session.execute(text(
+        f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT 0::integer AS _row, {columns} FROM {target} WITH NO DATA"
+    ))
+    records = [
+        (position, *(_to_db_value(table.columns[name], row[name]) for name in column_names))
+        for position, row in enumerate(rows)
+    ]
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        f"_bulk_{table.name}",
+        records=records,
+        columns=["_row", *column_names],
+    )
+
+    reference_checks = []
+    for constraint in table.foreign_key_constraints:
+        local = [element.parent.name for element in constraint.elements]
+        if not set(local) <= set(column_names):
+            continue
+        remote_table = preparer.format_table(constraint.elements[0].column.table)
+        matches = " AND ".join(f"r.{preparer.quote(element.column.name)} = s.{preparer.quote(element.parent.name)}" for element in constraint.elements)
+        any_null = " OR ".join(f"s.{preparer.quote(name)} IS NULL" for name in local)
+        reference_checks.append(f"({any_null} OR EXISTS (SELECT 1 FROM {remote_table} r WHERE {matches}))")
+    references_ok = " AND ".join(reference_checks) or "TRUE"
+
+    missing = await session.scalars(text(f"SELECT s._row FROM {staging} s WHERE NOT ({references_ok}) ORDER BY s._row"))
+    outcome = BulkInsertOutcome(missing_references=list(missing))
+
+    select_columns = ", ".join(f"s.{preparer.quote(name)}" for name in column_names)
+    if conflict_columns:
+        key = ", ".join(f"s.{preparer.quote(name)}" for name in conflict_columns)
+        key_match = " AND ".join(f"i.{preparer.quote(name)} = c.{preparer.quote(name)}" for name in conflict_columns)
+        returning = ", ".join(preparer.quote(name) for name in conflict_columns)
+        inserted = await session.scalars(text(
+            f"WITH candidates AS ("
+            f"SELECT DISTINCT ON ({key}) s._row, {select_columns} FROM {staging} s "
+            f"WHERE {references_ok} ORDER BY {key}, s._row"
+            f"), ins AS ("
+            f"INSERT INTO {target} ({columns}) SELECT {columns} FROM candidates "
+            f"ON CONFLICT DO NOTHING RETURNING {returning}"
+            f") SELECT c._row FROM candidates c JOIN ins i ON {key_match}"
+        ))
+        inserted_rows = set(inserted)
+        skipped = set(outcome.missing_references)
+        outcome.conflicts = [position for position in range(len(rows)) if position not in inserted_rows and position not in skipped]
+        outcome.inserted = len(inserted_rows)
+    else:
+        result = await session.execute(text(
+            f"INSERT INTO {target} ({columns}) SELECT {select_columns} FROM {staging} s "
+            f"WHERE {references_ok} ORDER BY s._row"
+        ))
+        outcome.inserted = result.rowcount
+    return outcome
@@ -4,7 +4,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import insert, select, update, delete, text
 from sqlalchemy.exc import IntegrityError
 from project.schemas.bus import BusSchema, BusCreateUpdateSchema
+from project.schemas.pagination import PageSchema
 from project.infrastructure.postgres.models import Bus
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
 from project.core.exceptions import BusNotFound, BusAlreadyExists
 
 class BusRepository:
@@ -15,10 +17,20 @@ class BusRepository:
         result = await session.scalar(text(query))
         return True if result else False
 
-    async def get_all_buses(self, session: AsyncSession) -> list[BusSchema]:
-        query = select(self._collection)
-        buses = await session.scalars(query)
-        return [BusSchema.model_validate(obj=bus) for bus in buses]
+    async def get_all_buses(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[BusSchema]:
+        buses, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[BusSchema](items=[BusSchema.model_validate(obj=bus) for bus in buses], next_cursor=next_cursor)
+
+    async def get_schedulable_buses(
+        self, session: AsyncSession, owner_company: int | None = None, technical_conditions: list[str] | None = None,
+    ) -> list[tuple[str, int | None]]:
+        query = select(self._collection.gos_num, self._collection.route_number).order_by(self._collection.gos_num)
+        if owner_company is not None:
+            query = query.where(self._collection.owner_company == owner_company)
+        if technical_conditions:
+            query = query.where(self._collection.technical_condition.in_(technical_conditions))
+        result = await session.execute(query)
+        return list(result.tuples())
 
     async def get_bus_by_gos_num(self, session: AsyncSession, gos_num: str) -> BusSchema:
         query = select(self._collection).where(self._collection.gos_num == gos_num)
@@ -3,7 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update, delete, text
 from sqlalchemy.exc import IntegrityError
 from project.schemas.company import CompanySchema, CompanyCreateUpdateSchema
+from project.schemas.pagination import PageSchema
 from project.infrastructure.postgres.models import Company
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
 from project.core.exceptions import CompanyNotFound
 
 class CompanyRepository:
@@ -14,10 +16,9 @@ class CompanyRepository:
         result = await session.scalar(text(query))
         return True if result else False
 
-    async def get_all_companies(self, session: AsyncSession) -> list[CompanySchema]:
-        query = select(self._collection)
-        companies = await session.scalars(query)
-        return [CompanySchema.model_validate(obj=company) for company in companies.all()]
+    async def get_all_companies(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[CompanySchema]:
+        companies, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[CompanySchema](items=[CompanySchema.model_validate(obj=company) for company in companies], next_cursor=next_cursor)
 
     async def get_company_by_id(self, session: AsyncSession, id_company: int) -> CompanySchema:
         query = select(self._collection).where(self._collection.id_company == id_company)
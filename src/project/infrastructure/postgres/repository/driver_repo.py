@@ -1,8 +1,12 @@
+from datetime import date
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, insert, update, delete, text
+from sqlalchemy import select, insert, update, delete, or_, text
 from sqlalchemy.exc import IntegrityError
 from project.schemas.driver import DriverSchema, DriverCreateUpdateSchema
+from project.schemas.pagination import PageSchema
 from project.infrastructure.postgres.models import Driver
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
 from project.core.exceptions import DriverNotFound, DriverAlreadyExists
 from typing import Type
 from project.core.exceptions import CompanyAlreadyExists, CompanyNotFound
@@ -15,10 +19,22 @@ class DriverRepository:
         result = await session.scalar(text(query))
         return True if result else False
 
-    async def get_all_drivers(self, session: AsyncSession) -> list[DriverSchema]:
-        query = select(self._collection)
-        drivers = await session.scalars(query)
-        return [DriverSchema.model_validate(obj=driver) for driver in drivers.all()]
+    async def get_all_drivers(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[DriverSchema]:
+        drivers, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[DriverSchema](items=[DriverSchema.model_validate(obj=driver) for driver in drivers], next_cursor=next_cursor)
+
+    async def get_rosterable_drivers(self, session: AsyncSession, trip_date: date, id_company: int | None = None) -> list[tuple[str, int | None]]:
+        # (passport_number, id_company) of drivers whose contract covers trip_date.
+        query = (
+            select(self._collection.passport_number, self._collection.id_company)
+            .where(or_(self._collection.contract_start.is_(None), self._collection.contract_start <= trip_date))
+            .where(or_(self._collection.contract_end.is_(None), self._collection.contract_end >= trip_date))
+            .order_by(self._collection.passport_number)
+        )
+        if id_company is not None:
+            query = query.where(self._collection.id_company == id_company)
+        result = await session.execute(query)
+        return list(result.tuples())
 
     async def get_driver_by_passport_number(self, session: AsyncSession, passport_number: str) -> DriverSchema:
         query = select(self._collection).where(self._collection.passport_number == passport_number)
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from typing import Type
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.schemas.job import JobSchema
+from project.infrastructure.postgres.models import BackgroundJob
+
+
+def _to_datetime(timestamp: float | None) -> datetime | None:
+    return None if timestamp is None else datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def _to_timestamp(value: datetime | None) -> float | None:
+    return None if value is None else value.timestamp()
+
+
+class JobRepository:
+    _collection: Type[BackgroundJob] = BackgroundJob
+
+    async def save_job(self, session: AsyncSession, job: JobSchema) -> None:
+        values = job.model_dump()
+        values["started_at"] = _to_datetime(job.started_at)
+        values["finished_at"] = _to_datetime(job.finished_at)
+        query = insert(self._collection).values(values)
+        query = query.on_conflict_do_update(
+            index_elements=[self._collection.id],
+            set_={name: query.excluded[name] for name in ("status", "progress", "result", "error", "finished_at")},
+        )
+        await session.execute(query)
+
+    async def get_job(self, session: AsyncSession, job_id: str) -> JobSchema | None:
+        job = await session.get(self._collection, job_id)
+        if job is None:
+            return None
+        return JobSchema(
+            id=job.id,
+            kind=job.kind,
+            status=job.status,
+            progress=job.progress,
+            result=job.result,
+            error=job.error,
+            started_at=_to_timestamp(job.started_at),
+            finished_at=_to_timestamp(job.finished_at),
+        )
+
+    async def delete_old_jobs(self, session: AsyncSession, keep: int) -> None:
+        # Finished jobs older than the newest keep jobs; running ones stay.
+        newest = select(self._collection.id).order_by(self._collection.started_at.desc()).limit(keep)
+        query = (
+            delete(self._collection)
+            .where(self._collection.finished_at.is_not(None))
+            .where(self._collection.id.not_in(newest))
+        )
+        await session.execute(query)
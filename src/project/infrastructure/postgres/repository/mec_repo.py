@@ -6,7 +6,9 @@ from sqlalchemy import text, select, insert, update, delete
 from sqlalchemy.exc import IntegrityError
 
 from project.schemas.mechanic import MechanicSchema, MecCreateUpdateSchema
+from project.schemas.pagination import PageSchema
 from project.infrastructure.postgres.models import Mechanic
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
 
 #from project.core.config import settings
 from project.core.exceptions import MecNotFound, MecAlreadyExists
@@ -27,12 +29,20 @@ class MechanicRepository:
     async def get_all_mecs(
         self,
         session: AsyncSession,
-    ) -> list[MechanicSchema]:
-        query = select(self._collection)
-
-        mecs = await session.scalars(query)
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+    ) -> PageSchema[MechanicSchema]:
+        mecs, next_cursor = await fetch_page(
+            session=session,
+            collection=self._collection,
+            limit=limit,
+            after=after,
+        )
 
-        return [MechanicSchema.model_validate(obj=mec) for mec in mecs.all()]
+        return PageSchema[MechanicSchema](
+            items=[MechanicSchema.model_validate(obj=mec) for mec in mecs],
+            next_cursor=next_cursor,
+        )
 
     async def get_mec_by_p_n(
             self,
@@ -0,0 +1,77 @@
+import base64
+import binascii
+import decimal
+import json
+from typing import Any, Sequence
+
+from sqlalchemy import Column, inspect, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.core.exceptions import InvalidCursor
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([str(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Column]) -> list[Any]:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(columns):
+            raise ValueError(cursor)
+        return [column.type.python_type(value) for column, value in zip(columns, raw)]
+    except (ValueError, TypeError, binascii.Error, decimal.InvalidOperation):
+        raise InvalidCursor(cursor=cursor)
+
+
+def _page_query(collection: type, columns: Sequence[Any], limit: int, after: str | None) -> tuple[Any, list[Column]]:
+    primary_key = list(inspect(collection).primary_key)
+    query = select(*columns).order_by(*primary_key).limit(limit + 1)
+    if after is not None:
+        values = decode_cursor(after, primary_key)
+        if len(primary_key) == 1:
+            query = query.where(primary_key[0] > values[0])
+        else:
+            query = query.where(
+                tuple_(*primary_key) > tuple_(*(literal(value, column.type) for column, value in zip(primary_key, values)))
+            )
+    return query, primary_key
+
+
+async def fetch_page(
+    session: AsyncSession,
+    collection: type,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+) -> tuple[list[Any], str | None]:
+    query, primary_key = _page_query(collection=collection, columns=[collection], limit=limit, after=after)
+    rows = (await session.scalars(query)).all()
+    if len(rows) <= limit:
+        return list(rows), None
+    rows = rows[:limit]
+    last = rows[-1]
+    return list(rows), encode_cursor([getattr(last, column.key) for column in primary_key])
+
+
+async def fetch_page_rows(
+    session: AsyncSession,
+    collection: type,
+    fields: Sequence[str],
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    # Same page as fetch_page, but each row is a dict of the given columns, with no
+    # ORM entity built for it. fields must include the primary key.
+    columns = [collection.__table__.columns[field] for field in fields]
+    query, primary_key = _page_query(collection=collection, columns=columns, limit=limit, after=after)
+    rows = [dict(row) for row in (await session.execute(query)).mappings()]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([last[column.name] for column in primary_key])
@@ -3,7 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import insert, select, update, delete
 from sqlalchemy.exc import IntegrityError
 from project.schemas.repair_request import RepairRequestSchema, RepairRequestCreateUpdateSchema
+from project.schemas.pagination import PageSchema
 from project.infrastructure.postgres.models import RepairRequest
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
 from project.core.exceptions import RepairRequestNotFound, RepairRequestAlreadyExists
 
 class RepairRequestRepository:
@@ -14,10 +16,9 @@ class RepairRequestRepository:
         result = await session.scalar(query)
         return True if result else False
 
-    async def get_all_requests(self, session: AsyncSession) -> list[RepairRequestSchema]:
-        query = select(self._collection)
-        requests = await session.scalars(query)
-        return [RepairRequestSchema.model_validate(obj=req) for req in requests.all()]
+    async def get_all_requests(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[RepairRequestSchema]:
+        requests, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[RepairRequestSchema](items=[RepairRequestSchema.model_validate(obj=req) for req in requests], next_cursor=next_cursor)
 
     async def get_request_by_id(
             self,
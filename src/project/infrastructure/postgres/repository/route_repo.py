@@ -1,9 +1,14 @@
+from datetime import time
 from typing import Type
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 from sqlalchemy import select, insert, update, delete, text
 from sqlalchemy.exc import IntegrityError
-from project.schemas.route import RouteSchema, RouteCreateUpdateSchema
-from project.infrastructure.postgres.models import Route
+from sqlalchemy.orm import selectinload
+from project.schemas.route import RouteSchema, RouteCreateUpdateSchema, RouteFullSchema
+from project.schemas.route_stop import RouteStopDetailSchema
+from project.schemas.pagination import PageSchema
+from project.infrastructure.postgres.models import Route, RouteStop
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
 from project.core.exceptions import RouteNotFound, RouteAlreadyExists
 
 class RouteRepository:
@@ -14,10 +19,17 @@ class RouteRepository:
         result = await session.scalar(text(query))
         return True if result else False
 
-    async def get_all_routes(self, session: AsyncSession) -> list[RouteSchema]:
-        query = select(self._collection)
-        routes = await session.scalars(query)
-        return [RouteSchema.model_validate(obj=route) for route in routes.all()]
+    async def get_all_routes(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[RouteSchema]:
+        routes, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[RouteSchema](items=[RouteSchema.model_validate(obj=route) for route in routes], next_cursor=next_cursor)
+
+    async def stream_headways(self, session: AsyncSession, chunk_size: int) -> AsyncResult:
+        query = (
+            select(self._collection.route_number, self._collection.first_adv, self._collection.last_adv, self._collection.interval)
+            .where(self._collection.first_adv.is_not(None), self._collection.last_adv.is_not(None), self._collection.interval.is_not(None))
+            .execution_options(yield_per=chunk_size)
+        )
+        return await session.stream(query)
 
     async def get_route_by_number(self, session: AsyncSession, route_number: int) -> RouteSchema:
         query = select(self._collection).where(self._collection.route_number == route_number)
@@ -26,6 +38,44 @@ class RouteRepository:
             raise RouteNotFound(_route_number=route_number)
         return RouteSchema.model_validate(obj=route)
 
+    async def get_route_full(self, session: AsyncSession, route_number: int) -> RouteFullSchema:
+        # One query for the route and one per collection, whatever the number of stops and buses.
+        query = (
+            select(self._collection)
+            .where(self._collection.route_number == route_number)
+            .options(
+                selectinload(self._collection.route_stops).joinedload(RouteStop.stop),
+                selectinload(self._collection.stop_times),
+                selectinload(self._collection.buses),
+            )
+        )
+        route = await session.scalar(query)
+        if not route:
+            raise RouteNotFound(_route_number=route_number)
+        stops = [
+            RouteStopDetailSchema(
+                stop_sequence=route_stop.stop_sequence,
+                latitude=route_stop.latitude,
+                longitude=route_stop.longitude,
+                stop_name=route_stop.stop.stop_name,
+                address=route_stop.stop.address,
+            )
+            for route_stop in route.route_stops
+        ]
+        sequences = {(route_stop.latitude, route_stop.longitude): route_stop.stop_sequence for route_stop in route.route_stops}
+
+        def stop_time_order(stop_time) -> tuple:
+            # Times at stops missing from route_stops go last, as do blank times within a stop.
+            at = stop_time.arrival_time or stop_time.departure_time
+            return sequences.get((stop_time.latitude, stop_time.longitude), len(sequences) + 1), at is None, at or time.min
+
+        return RouteFullSchema.model_validate(obj={
+            **RouteSchema.model_validate(obj=route).model_dump(),
+            "stops": stops,
+            "stop_times": sorted(route.stop_times, key=stop_time_order),
+            "buses": route.buses,
+        }, from_attributes=True)
+
     async def create_route(self, session: AsyncSession, route: RouteCreateUpdateSchema) -> RouteSchema:
         query = insert(self._collection).values(route.model_dump()).returning(self._collection)
         try:
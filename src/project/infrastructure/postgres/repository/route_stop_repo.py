@@ -1,22 +1,67 @@
 
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from sqlalchemy import select, insert, update, delete, func, tuple_
 from sqlalchemy.exc import IntegrityError
-from project.schemas.route_stop import RouteStopSchema, RouteStopCreateUpdateSchema
-from project.infrastructure.postgres.models import RouteStop
+from project.schemas.route_stop import RouteStopSchema, RouteStopCreateUpdateSchema, RouteStopDetailSchema
+from project.schemas.pagination import PageSchema
+from project.infrastructure.postgres.models import RouteStop, Stop, Route
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
+from project.infrastructure.postgres.repository.streaming import stream_table
+from project.infrastructure.postgres.repository.bulk import BulkInsertOutcome, copy_insert
 from project.core.exceptions import RouteStopNotFound, RouteStopAlreadyExists
+from decimal import Decimal
 from typing import Type
 
 class RouteStopRepository:
     _collection: Type[RouteStop] = RouteStop
 
-    async def get_all_route_stops(self, session: AsyncSession) -> list[RouteStopSchema]:
-        query = select(self._collection)
-        route_stops = await session.scalars(query)
-        return [RouteStopSchema.model_validate(obj=route_stop) for route_stop in route_stops.all()]
+    async def get_all_route_stops(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[RouteStopSchema]:
+        route_stops, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[RouteStopSchema](items=[RouteStopSchema.model_validate(obj=route_stop) for route_stop in route_stops], next_cursor=next_cursor)
+
+    async def stream_all_route_stops(self, session: AsyncSession, chunk_size: int) -> AsyncResult:
+        return await stream_table(session=session, collection=self._collection, chunk_size=chunk_size)
+
+    async def get_route_stop_list(self, session: AsyncSession, route_number: int) -> list[RouteStopDetailSchema]:
+        query = (
+            select(
+                self._collection.stop_sequence,
+                self._collection.latitude,
+                self._collection.longitude,
+                Stop.stop_name,
+                Stop.address,
+            )
+            .join(Stop, (Stop.latitude == self._collection.latitude) & (Stop.longitude == self._collection.longitude))
+            .where(self._collection.route_number == route_number)
+            .order_by(self._collection.stop_sequence)
+        )
+        rows = await session.execute(query)
+        return [RouteStopDetailSchema.model_validate(obj=row) for row in rows.mappings()]
+
+    async def _last_sequences(self, session: AsyncSession, route_numbers: set[int]) -> dict[int, int]:
+        if not route_numbers:
+            return {}
+        query = (
+            select(self._collection.route_number, func.max(self._collection.stop_sequence))
+            .where(self._collection.route_number.in_(route_numbers))
+            .group_by(self._collection.route_number)
+        )
+        return dict((await session.execute(query)).tuples().all())
 
     async def create_route_stop(self, session: AsyncSession, route_stop: RouteStopCreateUpdateSchema) -> RouteStopSchema:
-        query = insert(self._collection).values(route_stop.dict()).returning(self._collection)
+        values = route_stop.model_dump()
+        if values["stop_sequence"] is None:
+            last_sequences = await self._last_sequences(session=session, route_numbers={route_stop.route_number})
+            values["stop_sequence"] = last_sequences.get(route_stop.route_number, 0) + 1
+        else:
+            # Inserting in the middle of the route moves the following stops one position down.
+            await session.execute(
+                update(self._collection)
+                .where(self._collection.route_number == route_stop.route_number)
+                .where(self._collection.stop_sequence >= values["stop_sequence"])
+                .values(stop_sequence=self._collection.stop_sequence + 1)
+            )
+        query = insert(self._collection).values(values).returning(self._collection)
         try:
             created_route_stop = await session.scalar(query)
             await session.flush()
@@ -24,6 +69,81 @@ class RouteStopRepository:
             raise RouteStopAlreadyExists(latitude=route_stop.latitude, longitude=route_stop.longitude, route_number=route_stop.route_number)
         return RouteStopSchema.model_validate(obj=created_route_stop)
 
+    async def _route_sequences(self, session: AsyncSession, route_numbers: set[int]) -> dict[int, dict[tuple, int]]:
+        # {route_number: {(latitude, longitude): stop_sequence}} of the stored stops.
+        sequences: dict[int, dict[tuple, int]] = {route_number: {} for route_number in route_numbers}
+        if not route_numbers:
+            return sequences
+        query = (
+            select(self._collection.route_number, self._collection.latitude, self._collection.longitude, self._collection.stop_sequence)
+            .where(self._collection.route_number.in_(route_numbers))
+        )
+        for route_number, latitude, longitude, stop_sequence in (await session.execute(query)).tuples():
+            sequences[route_number][(latitude, longitude)] = stop_sequence
+        return sequences
+
+    async def _known_references(self, session: AsyncSession, stops: set[tuple], route_numbers: set[int]) -> tuple[set[tuple], set[int]]:
+        # The stops and routes of the batch that exist; rows pointing elsewhere are not placed.
+        known_stops = await session.execute(select(Stop.latitude, Stop.longitude).where(tuple_(Stop.latitude, Stop.longitude).in_(stops)))
+        known_routes = await session.scalars(select(Route.route_number).where(Route.route_number.in_(route_numbers)))
+        return set(known_stops.tuples()), set(known_routes)
+
+    async def bulk_create_route_stops(self, session: AsyncSession, route_stops: list[RouteStopCreateUpdateSchema]) -> BulkInsertOutcome:
+        rows = [route_stop.model_dump() for route_stop in route_stops]
+        stops = [(Decimal(str(row["latitude"])), Decimal(str(row["longitude"]))) for row in rows]
+        outcome = BulkInsertOutcome()
+        if not rows:
+            return outcome
+        known_stops, known_routes = await self._known_references(
+            session=session, stops=set(stops), route_numbers={row["route_number"] for row in rows},
+        )
+        # Rows are placed as create_route_stop would place them one by one, in the order sent: without
+        # a position after the last stop of their route, with one moving the stops from there one down.
+        # Only rows that will be inserted take part, so a rejected row never moves the stored stops.
+        stored = await self._route_sequences(session=session, route_numbers=known_routes)
+        sequences = {route_number: dict(stops) for route_number, stops in stored.items()}
+        placed = []
+        for position, (row, stop) in enumerate(zip(rows, stops)):
+            if stop not in known_stops or row["route_number"] not in known_routes:
+                outcome.missing_references.append(position)
+                continue
+            route_sequences = sequences[row["route_number"]]
+            if stop in route_sequences:
+                # Already on the route, or sent earlier in the batch.
+                outcome.conflicts.append(position)
+                continue
+            if row["stop_sequence"] is None:
+                row["stop_sequence"] = max(route_sequences.values(), default=0) + 1
+            else:
+                for other, stop_sequence in route_sequences.items():
+                    if stop_sequence >= row["stop_sequence"]:
+                        route_sequences[other] = stop_sequence + 1
+            route_sequences[stop] = row["stop_sequence"]
+            placed.append((position, row, stop))
+        # Later rows may have moved earlier ones down as well.
+        for _, row, stop in placed:
+            row["stop_sequence"] = sequences[row["route_number"]][stop]
+
+        moved = [
+            {"latitude": latitude, "longitude": longitude, "route_number": route_number, "stop_sequence": sequences[route_number][(latitude, longitude)]}
+            for route_number, stops in stored.items()
+            for (latitude, longitude), stop_sequence in stops.items()
+            if sequences[route_number][(latitude, longitude)] != stop_sequence
+        ]
+        if moved:
+            await session.execute(update(self._collection), moved)
+        inserted = await copy_insert(
+            session=session,
+            collection=self._collection,
+            rows=[row for _, row, _ in placed],
+            conflict_columns=("latitude", "longitude", "route_number"),
+        )
+        # copy_insert reports positions in the placed rows; map them back to the submitted list.
+        outcome.inserted = inserted.inserted
+        outcome.conflicts = sorted(outcome.conflicts + [placed[index][0] for index in inserted.conflicts])
+        outcome.missing_references = sorted(outcome.missing_references + [placed[index][0] for index in inserted.missing_references])
+        return outcome
+
     async def delete_route_stop(self, session: AsyncSession, latitude: float, longitude: float, route_number: int) -> None:
         query = delete(self._collection).where(self._collection.latitude == latitude).where(self._collection.longitude == longitude).where(self._collection.route_number == route_number)
         result = await session.execute(query)
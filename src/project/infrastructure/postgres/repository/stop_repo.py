@@ -1,9 +1,12 @@
 from typing import Type
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 from sqlalchemy import select, insert, update, delete, text
 from sqlalchemy.exc import IntegrityError
 from project.schemas.stop import StopSchema, StopCreateUpdateSchema
+from project.schemas.pagination import PageSchema
 from project.infrastructure.postgres.models import Stop
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
+from project.infrastructure.postgres.repository.streaming import stream_table
 from project.core.exceptions import StopNotFound, StopAlreadyExists
 
 class StopRepository:
@@ -14,10 +17,12 @@ class StopRepository:
         result = await session.scalar(text(query))
         return True if result else False
 
-    async def get_all_stops(self, session: AsyncSession) -> list[StopSchema]:
-        query = select(self._collection)
-        stops = await session.scalars(query)
-        return [StopSchema.model_validate(obj=stop) for stop in stops.all()]
+    async def get_all_stops(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[StopSchema]:
+        stops, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[StopSchema](items=[StopSchema.model_validate(obj=stop) for stop in stops], next_cursor=next_cursor)
+
+    async def stream_all_stops(self, session: AsyncSession, chunk_size: int) -> AsyncResult:
+        return await stream_table(session=session, collection=self._collection, chunk_size=chunk_size)
 
     async def get_stop_by_coords(self, session: AsyncSession, latitude: float, longitude: float) -> StopSchema:
         query = select(self._collection).where(self._collection.latitude == latitude, self._collection.longitude == longitude)
@@ -1,19 +1,83 @@
 from typing import Type
 
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from sqlalchemy import select, insert, update, delete, func
 from project.schemas.stop_time import StopTimeSchema, StopTimeCreateUpdateSchema
-from project.infrastructure.postgres.models import StopTime, Stop, Route
+from project.schemas.pagination import PageSchema
+from project.infrastructure.postgres.models import StopTime, Stop, Route, RouteStop
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page, fetch_page_rows
+from project.infrastructure.postgres.repository.streaming import stream_table
+from project.infrastructure.postgres.repository.bulk import BulkInsertOutcome, copy_insert
 from project.core.exceptions import StopTimeNotFound, StopTimeAlreadyExists
 from sqlalchemy.exc import IntegrityError
 
 class StopTimeRepository:
     _collection: Type[StopTime] = StopTime
 
-    async def get_all_stop_times(self, session: AsyncSession) -> list[StopTimeSchema]:
-        query = select(self._collection)
-        stop_times = await session.scalars(query)
-        return [StopTimeSchema.model_validate(obj=stop_time) for stop_time in stop_times.all()]
+    async def get_all_stop_times(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[StopTimeSchema]:
+        stop_times, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[StopTimeSchema](items=[StopTimeSchema.model_validate(obj=stop_time) for stop_time in stop_times], next_cursor=next_cursor)
+
+    async def get_all_stop_time_rows(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> tuple[list[dict], str | None]:
+        # The page of get_all_stop_times as plain StopTimeSchema dicts, not validated.
+        return await fetch_page_rows(session=session, collection=self._collection, fields=list(StopTimeSchema.model_fields), limit=limit, after=after)
+
+    async def stream_all_stop_times(self, session: AsyncSession, chunk_size: int) -> AsyncResult:
+        return await stream_table(session=session, collection=self._collection, chunk_size=chunk_size)
+
+    async def stream_departures(self, session: AsyncSession, chunk_size: int) -> AsyncResult:
+        query = (
+            select(
+                self._collection.latitude,
+                self._collection.longitude,
+                self._collection.route_number,
+                self._collection.arrival_time,
+                self._collection.departure_time,
+                Route.start_stop,
+                Route.end_stop,
+                Route.first_adv,
+                Route.last_adv,
+                Route.interval,
+                RouteStop.stop_sequence,
+            )
+            .join(Route, Route.route_number == self._collection.route_number)
+            .outerjoin(
+                RouteStop,
+                (RouteStop.route_number == self._collection.route_number)
+                & (RouteStop.latitude == self._collection.latitude)
+                & (RouteStop.longitude == self._collection.longitude),
+            )
+            .where((self._collection.departure_time.is_not(None)) | (self._collection.arrival_time.is_not(None)))
+            .execution_options(yield_per=chunk_size)
+        )
+        return await session.stream(query)
+
+    async def stream_route_patterns(self, session: AsyncSession, chunk_size: int) -> AsyncResult:
+        # Stop times of each route in the order the route passes its stops: by stop_sequence,
+        # falling back to the time for stops that are not in route_stops.
+        query = (
+            select(
+                self._collection.route_number,
+                self._collection.latitude,
+                self._collection.longitude,
+                self._collection.arrival_time,
+                self._collection.departure_time,
+            )
+            .outerjoin(
+                RouteStop,
+                (RouteStop.route_number == self._collection.route_number)
+                & (RouteStop.latitude == self._collection.latitude)
+                & (RouteStop.longitude == self._collection.longitude),
+            )
+            .where((self._collection.departure_time.is_not(None)) | (self._collection.arrival_time.is_not(None)))
+            .order_by(
+                self._collection.route_number,
+                RouteStop.stop_sequence.asc().nulls_last(),
+                func.coalesce(self._collection.departure_time, self._collection.arrival_time),
+            )
+            .execution_options(yield_per=chunk_size)
+        )
+        return await session.stream(query)
 
     async def create_stop_time(self, session: AsyncSession, stop_time: StopTimeCreateUpdateSchema) -> StopTimeSchema:
         query = insert(self._collection).values(stop_time.dict()).returning(self._collection)
@@ -24,6 +88,10 @@ class StopTimeRepository:
             raise StopTimeAlreadyExists(longitude=stop_time.longitude, latitude=stop_time.latitude, route_number=stop_time.route_number)
         return StopTimeSchema.model_validate(obj=created_stop_time)
 
+    async def bulk_create_stop_times(self, session: AsyncSession, stop_times: list[StopTimeCreateUpdateSchema]) -> BulkInsertOutcome:
+        rows = [stop_time.model_dump() for stop_time in stop_times]
+        return await copy_insert(session=session, collection=self._collection, rows=rows, conflict_columns=("latitude", "longitude", "route_number"))
+
 
     async def delete_stop_time(self, session: AsyncSession, latitude: float, longitude: float, route_number: int) -> None:
         query = delete(self._collection).where(self._collection.latitude == latitude).where(self._collection.longitude == longitude).where(self._collection.route_number == route_number)
@@ -0,0 +1,11 @@
+from typing import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+
+async def stream_table(session: AsyncSession, collection: type, chunk_size: int, order_by: Sequence = ()) -> AsyncResult:
+    # Plain columns instead of ORM entities, read through a server-side cursor
+    # chunk_size rows at a time.
+    query = select(*collection.__table__.columns).order_by(*order_by).execution_options(yield_per=chunk_size)
+    return await session.stream(query)
@@ -3,7 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import insert, select, update, delete
 from sqlalchemy.exc import IntegrityError
 from project.schemas.technical_inspection import TechnicalInspectionSchema, TechnicalInspectionCreateUpdateSchema
+from project.schemas.pagination import PageSchema
 from project.infrastructure.postgres.models import TechnicalInspection
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
 from project.core.exceptions import TechnicalInspectionNotFound, TechnicalInspectionAlreadyExists
 
 class TechnicalInspectionRepository:
@@ -14,10 +16,9 @@ class TechnicalInspectionRepository:
         result = await session.scalar(query)
         return True if result else False
 
-    async def get_all_inspections(self, session: AsyncSession) -> list[TechnicalInspectionSchema]:
-        query = select(self._collection)
-        inspections = await session.scalars(query)
-        return [TechnicalInspectionSchema.model_validate(obj=inspection) for inspection in inspections]
+    async def get_all_inspections(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[TechnicalInspectionSchema]:
+        inspections, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[TechnicalInspectionSchema](items=[TechnicalInspectionSchema.model_validate(obj=inspection) for inspection in inspections], next_cursor=next_cursor)
 
     async def get_inspection_by_id(self, session: AsyncSession, inspection_id: int) -> TechnicalInspectionSchema:
         query = select(self._collection).where(self._collection.inspection_id == inspection_id)
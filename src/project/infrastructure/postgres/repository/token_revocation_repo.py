@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Type
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.infrastructure.postgres.models import TokenRevocation
+
+
+class TokenRevocationRepository:
+    _collection: Type[TokenRevocation] = TokenRevocation
+
+    async def revoke(self, session: AsyncSession, user_id: int, revoked_at: datetime, expired_before: datetime) -> None:
+        query = insert(self._collection).values(user_id=user_id, revoked_at=revoked_at)
+        query = query.on_conflict_do_update(
+            index_elements=[self._collection.user_id],
+            set_={"revoked_at": query.excluded.revoked_at},
+        )
+        await session.execute(query)
+        # Revocations older than the token lifetime cannot match a live token.
+        await session.execute(delete(self._collection).where(self._collection.revoked_at < expired_before))
+
+    async def get_revocations(self, session: AsyncSession, since: datetime) -> dict[int, datetime]:
+        query = select(self._collection.user_id, self._collection.revoked_at).where(self._collection.revoked_at >= since)
+        return dict((await session.execute(query)).tuples().all())
@@ -1,9 +1,15 @@
 from typing import Type
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select, update, delete
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from datetime import date, time
+
+from sqlalchemy import RowMapping, insert, select, update, delete, func, or_
 from sqlalchemy.exc import IntegrityError
 from project.schemas.trip import TripSchema, TripCreateUpdateSchema
-from project.infrastructure.postgres.models import Trip
+from project.schemas.pagination import PageSchema
+from project.infrastructure.postgres.models import Bus, Trip
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page, fetch_page_rows
+from project.infrastructure.postgres.repository.streaming import stream_table
+from project.infrastructure.postgres.repository.bulk import BulkInsertOutcome, copy_insert
 from project.core.exceptions import TripNotFound, TripAlreadyExists
 
 class TripRepository:
@@ -14,11 +20,78 @@ class TripRepository:
         result = await session.scalar(query)
         return True if result else False
 
-    async def get_all_trips(self, session: AsyncSession) -> list[TripSchema]:
-        query = select(self._collection)
+    async def get_all_trips(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> PageSchema[TripSchema]:
+        trips, next_cursor = await fetch_page(session=session, collection=self._collection, limit=limit, after=after)
+        return PageSchema[TripSchema](items=[TripSchema.model_validate(obj=trip) for trip in trips], next_cursor=next_cursor)
+
+    async def get_all_trip_rows(self, session: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None) -> tuple[list[dict], str | None]:
+        # The page of get_all_trips as plain TripSchema dicts, not validated.
+        return await fetch_page_rows(session=session, collection=self._collection, fields=list(TripSchema.model_fields), limit=limit, after=after)
+
+    async def stream_all_trips(self, session: AsyncSession, chunk_size: int) -> AsyncResult:
+        return await stream_table(session=session, collection=self._collection, chunk_size=chunk_size)
+
+    async def stream_trip_starts(self, session: AsyncSession, chunk_size: int) -> AsyncResult:
+        query = (
+            select(self._collection.route_number, self._collection.trip_date, self._collection.start_time)
+            .where(self._collection.route_number.is_not(None), self._collection.start_time.is_not(None))
+            .execution_options(yield_per=chunk_size)
+        )
+        return await session.stream(query)
+
+    async def get_route_start_times(
+        self, session: AsyncSession, route_number: int, start: time, end: time | None, trip_date: date | None, limit: int,
+    ) -> list[time]:
+        # end before start means the window runs past midnight.
+        query = select(self._collection.start_time).where(self._collection.route_number == route_number)
+        if end is None:
+            query = query.where(self._collection.start_time >= start)
+        elif end >= start:
+            query = query.where(self._collection.start_time.between(start, end))
+        else:
+            query = query.where(or_(self._collection.start_time >= start, self._collection.start_time <= end))
+        if trip_date is not None:
+            query = query.where(or_(self._collection.trip_date == trip_date, self._collection.trip_date.is_(None)))
+        query = query.order_by(self._collection.start_time < start, self._collection.start_time).limit(limit)
+        return list(await session.scalars(query))
+
+    async def get_resource_trips(
+        self, session: AsyncSession, field: str, key: str, trip_date: date | None, exclude_trip_id: int | None = None,
+    ) -> list[TripSchema]:
+        # Trips of one driver or bus sharing a day with trip_date; a trip without a date shares every day.
+        column = getattr(self._collection, field)
+        query = select(self._collection).where(column == key)
+        if trip_date is not None:
+            query = query.where(or_(self._collection.trip_date == trip_date, self._collection.trip_date.is_(None)))
+        if exclude_trip_id is not None:
+            query = query.where(self._collection.trip_id != exclude_trip_id)
         trips = await session.scalars(query)
         return [TripSchema.model_validate(obj=trip) for trip in trips]
 
+    async def get_trips_for_dates(self, session: AsyncSession, trip_dates: set[date | None]) -> list[TripSchema]:
+        # Trips sharing a day with any of trip_dates; None among them means every trip.
+        # Plain rows rather than ORM objects: a busy day has tens of thousands of trips.
+        query = select(*self._collection.__table__.columns)
+        if None not in trip_dates:
+            query = query.where(or_(self._collection.trip_date.in_(trip_dates), self._collection.trip_date.is_(None)))
+        rows = await session.execute(query)
+        return [TripSchema.model_validate(obj=row) for row in rows.mappings()]
+
+    async def get_trips_with_company(self, session: AsyncSession, trip_date: date) -> list[RowMapping]:
+        # Trips sharing a day with trip_date, with the company owning each trip's bus.
+        query = (
+            select(*self._collection.__table__.columns, Bus.owner_company)
+            .outerjoin(Bus, Bus.gos_num == self._collection.gos_num)
+            .where(or_(self._collection.trip_date == trip_date, self._collection.trip_date.is_(None)))
+        )
+        rows = await session.execute(query)
+        return list(rows.mappings())
+
+    async def lock_trip_resources(self, session: AsyncSession, keys: list[str]) -> None:
+        # Transaction-scoped advisory locks, taken in a fixed order so writers never deadlock.
+        for key in sorted(set(keys)):
+            await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(key))))
+
     async def get_trip_by_id(self, session: AsyncSession, trip_id: int) -> TripSchema:
         query = select(self._collection).where(self._collection.trip_id == trip_id)
         trip = await session.scalar(query)
@@ -26,6 +99,12 @@ class TripRepository:
             raise TripNotFound(_trip_id=trip_id)
         return TripSchema.model_validate(obj=trip)
 
+    async def lock_trip(self, session: AsyncSession, trip_id: int) -> None:
+        # Holds the row until the transaction ends, so it cannot go away between checks and the update.
+        query = select(self._collection.trip_id).where(self._collection.trip_id == trip_id).with_for_update()
+        if await session.scalar(query) is None:
+            raise TripNotFound(_trip_id=trip_id)
+
     async def create_trip(self, session: AsyncSession, trip: TripCreateUpdateSchema) -> TripSchema:
         query = insert(self._collection).values(trip.model_dump()).returning(self._collection)
         try:
@@ -35,6 +114,10 @@ class TripRepository:
             raise TripAlreadyExists(trip_id=trip.trip_id)
         return TripSchema.model_validate(obj=created_trip)
 
+    async def bulk_create_trips(self, session: AsyncSession, trips: list[TripCreateUpdateSchema]) -> BulkInsertOutcome:
+        rows = [trip.model_dump() for trip in trips]
+        return await copy_insert(session=session, collection=self._collection, rows=rows)
+
     async def update_trip(self, session: AsyncSession, trip_id: int, trip: TripCreateUpdateSchema) -> TripSchema:
         query = update(self._collection).where(self._collection.trip_id == trip_id).values(trip.model_dump()).returning(self._collection)
         updated_trip = await session.scalar(query)
@@ -42,6 +125,11 @@ class TripRepository:
             raise TripNotFound(_trip_id=trip_id)
         return TripSchema.model_validate(obj=updated_trip)
 
+    async def bulk_update_trips(self, session: AsyncSession, changes: list[dict]) -> None:
+        # [{"trip_id": ..., <column>: ...}]: one executemany UPDATE by primary key.
+        if changes:
+            await session.execute(update(self._collection), changes)
+
     async def delete_trip(self, session: AsyncSession, trip_id: int) -> None:
         query = delete(self._collection).where(self._collection.trip_id == trip_id)
         result = await session.execute(query)
@@ -5,7 +5,9 @@ from sqlalchemy import text, select, insert, update, delete, true
 from sqlalchemy.exc import IntegrityError, PendingRollbackError, InterfaceError
 
 from project.schemas.user import UserSchema, UserCreateUpdateSchema
+from project.schemas.pagination import PageSchema
 from project.infrastructure.postgres.models import User
+from project.infrastructure.postgres.repository.pagination import DEFAULT_PAGE_SIZE, fetch_page
 
 from project.core.exceptions import UserNotFound, UserAlreadyExists
 
@@ -44,12 +46,20 @@ class UserRepository:
     async def get_all_users(
         self,
         session: AsyncSession,
-    ) -> list[UserSchema]:
-        query = select(self._collection)
-
-        users = await session.scalars(query)
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+    ) -> PageSchema[UserSchema]:
+        users, next_cursor = await fetch_page(
+            session=session,
+            collection=self._collection,
+            limit=limit,
+            after=after,
+        )
 
-        return [UserSchema.model_validate(obj=user) for user in users.all()]
+        return PageSchema[UserSchema](
+            items=[UserSchema.model_validate(obj=user) for user in users],
+            next_cursor=next_cursor,
+        )
 
     async def get_user_by_id(
         self,
@@ -1,6 +1,23 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable
+
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.core.config import settings
+from project.core.exceptions import DatabaseError, PasswordHashQueueFull
+from project.core.metrics import Histogram
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.repository.token_revocation_repo import TokenRevocationRepository
+from project.schemas.healthcheck import PasswordHasherStatsSchema
+
 
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -11,4 +28,110 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+class PasswordHasher:
+    # bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+    # loop and runs it in parallel. Requests beyond max_pending are rejected instead
+    # of queueing behind a login burst.
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._duration = Histogram()
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self._max_pending:
+            self._rejected += 1
+            raise PasswordHashQueueFull()
+        self._pending += 1
+        started_at = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+            self._duration.observe(time.perf_counter() - started_at)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def stats(self) -> PasswordHasherStatsSchema:
+        return PasswordHasherStatsSchema(
+            max_workers=self._max_workers,
+            max_pending=self._max_pending,
+            pending=self._pending,
+            completed=self._completed,
+            rejected=self._rejected,
+            duration_sec=self._duration.snapshot(),
+        )
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+class TokenRevocationList:
+    # Tokens issued to a user before the user was last updated or deleted are
+    # rejected. Times have sub-second precision, so a token issued right after the
+    # update, in the same second, still works. Revocations are stored in the
+    # database with the change that causes them; every process reads them back at
+    # most AUTH_REVOCATION_TTL_SEC late, so a revocation made through one worker
+    # takes that long to reach the others.
+    def __init__(self, ttl_sec: float = settings.AUTH_REVOCATION_TTL_SEC) -> None:
+        self._ttl_sec = ttl_sec
+        self._repo = TokenRevocationRepository()
+        self._revoked_at: dict[int, float] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _expired_before(now: float) -> float:
+        # Revocations older than the token lifetime cannot match a live token.
+        return now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    async def revoke(self, session: AsyncSession, user_id: int) -> None:
+        """Record the revocation in session, so that it is committed with the change to the user."""
+        now = time.time()
+        await self._repo.revoke(
+            session=session,
+            user_id=user_id,
+            revoked_at=datetime.fromtimestamp(now, timezone.utc),
+            expired_before=datetime.fromtimestamp(self._expired_before(now), timezone.utc),
+        )
+        self._revoked_at[user_id] = now
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self._ttl_sec
+
+    async def _refresh(self) -> None:
+        since = datetime.fromtimestamp(self._expired_before(time.time()), timezone.utc)
+        try:
+            async with database.session() as session:
+                revocations = await self._repo.get_revocations(session=session, since=since)
+        except DatabaseError:
+            # Nothing can be revoked while the database is unreachable, so the last list stays right.
+            logger.warning("Could not refresh the token revocation list", exc_info=True)
+        else:
+            self._revoked_at = {user_id: revoked_at.timestamp() for user_id, revoked_at in revocations.items()}
+        self._loaded_at = time.monotonic()
+
+    async def is_revoked(self, user_id: int, issued_at: float) -> bool:
+        if not self._is_fresh():
+            async with self._lock:
+                if not self._is_fresh():
+                    await self._refresh()
+        revoked_at = self._revoked_at.get(user_id)
+        return revoked_at is not None and issued_at < revoked_at
+
+
+token_revocation_list = TokenRevocationList()
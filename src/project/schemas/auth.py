@@ -12,4 +12,10 @@ class Token(BaseModel):
 
 
 class TokenData(BaseModel):
-    username: str | None = Field(default=None)
\ No newline at end of file
+    username: str | None = Field(default=None)
+
+
+class AuthenticatedUserSchema(BaseModel):
+    id: int
+    email: str
+    is_admin: bool = False
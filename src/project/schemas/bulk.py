@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class BulkRowErrorSchema(BaseModel):
+    row: int
+    error: str
+
+
+class BulkInsertResultSchema(BaseModel):
+    received: int
+    inserted: int
+    errors: list[BulkRowErrorSchema]
@@ -0,0 +1,18 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+
+class BusAssignmentSchema(BaseModel):
+    trip_id: int
+    gos_num: str
+
+
+class BusScheduleSchema(BaseModel):
+    trip_date: date
+    dry_run: bool
+    trips: int
+    buses_used: int
+    assignments: list[BusAssignmentSchema]
+    # Trips left without a bus: no eligible bus was free, or the trip has no start or end time.
+    unassigned_trip_ids: list[int]
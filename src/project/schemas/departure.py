@@ -0,0 +1,18 @@
+from datetime import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class DepartureSchema(BaseModel):
+    route_number: int
+    departure_time: time
+    arrival_time: Optional[time] = None
+    start_stop: Optional[str] = None
+    end_stop: Optional[str] = None
+
+
+class RouteDeparturesSchema(BaseModel):
+    route_number: int
+    source: str
+    departures: list[time]
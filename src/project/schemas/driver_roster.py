@@ -0,0 +1,21 @@
+from datetime import date, time
+
+from pydantic import BaseModel
+
+
+class DriverShiftSchema(BaseModel):
+    driver_passport: str
+    # shift_end before shift_start means the shift runs past midnight.
+    shift_start: time
+    shift_end: time
+    trip_ids: list[int]
+
+
+class DriverRosterSchema(BaseModel):
+    trip_date: date
+    dry_run: bool
+    trips: int
+    drivers_used: int
+    shifts: list[DriverShiftSchema]
+    # Trips left without a driver: nobody fitted them, or the trip has no start or end time.
+    unassigned_trip_ids: list[int]
@@ -2,4 +2,39 @@ from pydantic import BaseModel
 
 
 class HealthCheckSchema(BaseModel):
-    db_is_ok: bool
\ No newline at end of file
+    db_is_ok: bool
+
+
+class HistogramSchema(BaseModel):
+    buckets: dict[str, int]
+    sum: float
+    count: int
+
+
+class PoolStatsSchema(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    timeout_sec: float
+    checkout_wait_sec: HistogramSchema
+
+
+class PasswordHasherStatsSchema(BaseModel):
+    max_workers: int
+    max_pending: int
+    pending: int
+    completed: int
+    rejected: int
+    duration_sec: HistogramSchema
+
+
+class ReadinessSchema(BaseModel):
+    ready: bool
+    db_is_ok: bool
+    # Connections in use over pool size plus overflow, as the last probe found them.
+    pool_saturation: float
+    pool: PoolStatsSchema
+    checked_sec_ago: float
+    error: str | None = None
@@ -0,0 +1,14 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class JobSchema(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: dict[str, Any]
+    result: Any = None
+    error: str | None = None
+    started_at: float
+    finished_at: float | None = None
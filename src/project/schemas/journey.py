@@ -0,0 +1,26 @@
+from datetime import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class JourneyLegSchema(BaseModel):
+    mode: str
+    route_number: Optional[int] = None
+    from_latitude: float
+    from_longitude: float
+    from_stop_name: Optional[str] = None
+    to_latitude: float
+    to_longitude: float
+    to_stop_name: Optional[str] = None
+    departure_time: time
+    arrival_time: time
+    stops_count: Optional[int] = None
+
+
+class JourneySchema(BaseModel):
+    departure_time: time
+    arrival_time: time
+    duration_sec: int
+    transfers: int
+    legs: list[JourneyLegSchema]
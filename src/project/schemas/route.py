@@ -3,6 +3,10 @@ from typing import Optional
 from datetime import time
 from decimal import Decimal
 
+from project.schemas.bus import BusSchema
+from project.schemas.route_stop import RouteStopDetailSchema
+from project.schemas.stop_time import StopTimeSchema
+
 class RouteCreateUpdateSchema(BaseModel):
     start_stop: Optional[str] = None
     end_stop: Optional[str] = None
@@ -16,4 +20,10 @@ class RouteCreateUpdateSchema(BaseModel):
 class RouteSchema(RouteCreateUpdateSchema):
     model_config = ConfigDict(from_attributes=True)
 
-    route_number: int
\ No newline at end of file
+    route_number: int
+
+class RouteFullSchema(RouteSchema):
+    stops: list[RouteStopDetailSchema]
+    # In order of the stops along the route, then by arrival time.
+    stop_times: list[StopTimeSchema]
+    buses: list[BusSchema]
\ No newline at end of file
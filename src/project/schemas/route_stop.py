@@ -1,10 +1,23 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 
 class RouteStopCreateUpdateSchema(BaseModel):
     latitude: float
     longitude: float
     route_number: int
+    # Position along the route; appended after the last stop when omitted.
+    stop_sequence: Optional[int] = Field(default=None, ge=1)
 
 class RouteStopSchema(RouteStopCreateUpdateSchema):
     model_config = ConfigDict(from_attributes=True)
+
+    stop_sequence: int
+
+class RouteStopDetailSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    stop_sequence: int
+    latitude: float
+    longitude: float
+    stop_name: Optional[str] = None
+    address: Optional[str] = None
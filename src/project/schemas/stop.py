@@ -11,4 +11,7 @@ class StopSchema(StopCreateUpdateSchema):
     model_config = ConfigDict(from_attributes=True)
 
     #latitude: float
-    #longitude: float
\ No newline at end of file
+    #longitude: float
+
+class NearbyStopSchema(StopSchema):
+    distance_m: float
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Literal, Optional
 from datetime import date, time
 
 
@@ -13,4 +13,18 @@ class TripCreateUpdateSchema(BaseModel):
 
 
 class TripSchema(TripCreateUpdateSchema):
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+    trip_id: int
+
+
+class TripConflictSchema(BaseModel):
+    # A trip is referred to by trip_id when it is stored and by its position in the
+    # submitted list otherwise.
+    resource: Literal["driver", "bus"]
+    key: str
+    trip_date: Optional[date] = None
+    trip_id: Optional[int] = None
+    row: Optional[int] = None
+    other_trip_id: Optional[int] = None
+    other_row: Optional[int] = None
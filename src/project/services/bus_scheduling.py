@@ -0,0 +1,139 @@
+"""Minimal-fleet assignment of buses to a day's trips.
+
+Trips are taken in order of start time. Each goes to a bus that is already out and
+free again (its last trip ended at least min_layover_sec earlier); only when none is
+free is another bus taken out. With interchangeable buses this greedy uses as few
+buses as possible: the largest number of trips running at once. Driving empty from
+the end of one trip to the start of the next is not modelled beyond the layover.
+
+A bus bound to a route (Bus.route_number) only runs trips of that route and is
+preferred for them; unbound buses run any route.
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.core.config import settings
+from project.schemas.bus_schedule import BusAssignmentSchema, BusScheduleSchema
+from project.infrastructure.postgres.repository.bus_repo import BusRepository
+from project.infrastructure.postgres.repository.trip_repo import TripRepository
+from project.services.trip_conflicts import trip_interval
+
+
+@dataclass(frozen=True)
+class ScheduledTrip:
+    trip_id: int
+    route_number: int | None
+    start: int
+    end: int
+
+
+def assign_buses(
+    trips: list[ScheduledTrip],
+    buses: list[tuple[str, int | None]],
+    min_layover_sec: int,
+) -> tuple[dict[int, str], list[int]]:
+    """Assign (gos_num, route_number) buses to trips; returns trip_id -> gos_num and the trips left over."""
+    # Buses not out yet and buses out, keyed by the route they are bound to (None: any route).
+    idle: dict[int | None, list[str]] = {}
+    for gos_num, route_number in reversed(buses):
+        idle.setdefault(route_number, []).append(gos_num)
+    running: dict[int | None, list[tuple[int, int, str]]] = {}
+
+    assignments: dict[int, str] = {}
+    unassigned: list[int] = []
+    for order, trip in enumerate(sorted(trips, key=lambda trip: (trip.start, trip.end))):
+        pools = (None,) if trip.route_number is None else (trip.route_number, None)
+        gos_num = pool = None
+        for candidate in pools:
+            heap = running.get(candidate)
+            if heap and heap[0][0] <= trip.start:
+                gos_num, pool = heapq.heappop(heap)[2], candidate
+                break
+        else:
+            for candidate in pools:
+                if idle.get(candidate):
+                    gos_num, pool = idle[candidate].pop(), candidate
+                    break
+        if gos_num is None:
+            unassigned.append(trip.trip_id)
+            continue
+        assignments[trip.trip_id] = gos_num
+        heapq.heappush(running.setdefault(pool, []), (trip.end + min_layover_sec, order, gos_num))
+    return assignments, unassigned
+
+
+class BusScheduler:
+    def __init__(self) -> None:
+        self._trip_repo = TripRepository()
+        self._bus_repo = BusRepository()
+
+    async def schedule(
+        self,
+        session: AsyncSession,
+        trip_date: date,
+        route_number: int | None = None,
+        owner_company: int | None = None,
+        technical_conditions: list[str] | None = None,
+        min_layover_sec: int = settings.BUS_MIN_LAYOVER_SEC,
+        reassign: bool = False,
+        dry_run: bool = False,
+    ) -> BusScheduleSchema:
+        """Assign buses to the trips of trip_date (of one route if route_number is given).
+
+        Trips that already have a bus keep it unless reassign is set, and their buses
+        stay out of the pool, as do the buses of daily trips. With dry_run nothing
+        is written.
+        """
+        busy: set[str] = set()
+        scheduled: list[ScheduledTrip] = []
+        previous: dict[int, str | None] = {}
+        unassigned: list[int] = []
+        for trip in await self._trip_repo.get_trips_for_dates(session=session, trip_dates={trip_date}):
+            if (
+                trip.trip_date is None
+                or (route_number is not None and trip.route_number != route_number)
+                or (not reassign and trip.gos_num is not None)
+            ):
+                if trip.gos_num is not None:
+                    busy.add(trip.gos_num)
+                continue
+            previous[trip.trip_id] = trip.gos_num
+            interval = trip_interval(trip.start_time, trip.end_time)
+            if interval is None:
+                unassigned.append(trip.trip_id)
+                continue
+            scheduled.append(ScheduledTrip(trip_id=trip.trip_id, route_number=trip.route_number, start=interval[0], end=interval[1]))
+
+        buses = await self._bus_repo.get_schedulable_buses(
+            session=session, owner_company=owner_company, technical_conditions=technical_conditions,
+        )
+        assignments, left_over = assign_buses(
+            trips=scheduled,
+            buses=[(gos_num, bus_route) for gos_num, bus_route in buses if gos_num not in busy],
+            min_layover_sec=min_layover_sec,
+        )
+        unassigned.extend(left_over)
+
+        if not dry_run:
+            # Reassigned trips that found no bus lose the old one, which may now run other trips.
+            changes = [
+                {"trip_id": trip_id, "gos_num": assignments.get(trip_id)}
+                for trip_id, gos_num in previous.items()
+                if assignments.get(trip_id) != gos_num
+            ]
+            await self._trip_repo.bulk_update_trips(session=session, changes=changes)
+
+        return BusScheduleSchema(
+            trip_date=trip_date,
+            dry_run=dry_run,
+            trips=len(previous),
+            buses_used=len(set(assignments.values())),
+            assignments=[BusAssignmentSchema(trip_id=trip_id, gos_num=gos_num) for trip_id, gos_num in sorted(assignments.items())],
+            unassigned_trip_ids=sorted(unassigned),
+        )
+
+
+bus_scheduler = BusScheduler()
@@ -0,0 +1,125 @@
+import heapq
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import time
+from itertools import islice
+from typing import Iterator
+
+from project.core.config import settings
+from project.schemas.departure import DepartureSchema
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.repository.stop_time_repo import StopTimeRepository
+from project.services.loaded_index import LoadedIndex
+from project.services.timetable import SECONDS_PER_DAY, Headway, seconds_to_time, time_to_seconds, unwrap_pattern
+
+
+@dataclass(frozen=True)
+class _HeadwayService:
+    # A frequency-based route at one stop: its departures are the route's headway
+    # shifted by the stop's offset from the first stop of the StopTime pattern.
+    headway: Headway
+    departure_offset: int
+    dwell: int
+    route_number: int
+    start_stop: str | None
+    end_stop: str | None
+
+    def upcoming(self, after: int) -> Iterator[tuple[int, int, "_HeadwayService"]]:
+        for departure in islice(self.headway.upcoming(after - self.departure_offset), len(self.headway)):
+            yield departure + self.departure_offset, self.route_number, self
+
+    def to_schema(self, departure: int) -> DepartureSchema:
+        return DepartureSchema(
+            route_number=self.route_number,
+            departure_time=seconds_to_time(departure),
+            arrival_time=seconds_to_time(departure - self.dwell),
+            start_stop=self.start_stop,
+            end_stop=self.end_stop,
+        )
+
+
+def _cycle_once(entries: list[tuple[int, int, DepartureSchema]], start: int, after: int) -> Iterator[tuple[int, int, DepartureSchema]]:
+    base = after - after % SECONDS_PER_DAY
+    for seconds, route_number, departure in entries[start:]:
+        yield base + seconds, route_number, departure
+    for seconds, route_number, departure in entries[:start]:
+        yield base + SECONDS_PER_DAY + seconds, route_number, departure
+
+
+class DepartureIndex(LoadedIndex):
+    # Departures of every stop across all routes, sorted by time of day. A board
+    # lookup is one bisect into the stop's list, wrapping past midnight. Routes with
+    # first_adv/last_adv/interval are not expanded: their departures are generated
+    # from the headway on demand and merged in.
+    def __init__(self, max_age_sec: float = settings.DEPARTURE_INDEX_MAX_AGE_SEC) -> None:
+        super().__init__(max_age_sec=max_age_sec)
+        self._departures: dict[tuple[float, float], list[tuple[int, int, DepartureSchema]]] = {}
+        self._headways: dict[tuple[float, float], list[_HeadwayService]] = {}
+        self._repo = StopTimeRepository()
+
+    async def _build(self) -> None:
+        departures: dict[tuple[float, float], list[tuple[int, int, DepartureSchema]]] = {}
+        headway_rows: dict[int, list] = {}
+        async with database.session() as session:
+            result = await self._repo.stream_departures(session=session, chunk_size=settings.STREAM_CHUNK_SIZE)
+            async for row in result.mappings():
+                if Headway.from_route(row["first_adv"], row["last_adv"], row["interval"]) is not None:
+                    headway_rows.setdefault(row["route_number"], []).append(row)
+                    continue
+                departure_time = row["departure_time"] or row["arrival_time"]
+                departure = DepartureSchema(
+                    route_number=row["route_number"],
+                    departure_time=departure_time,
+                    arrival_time=row["arrival_time"],
+                    start_stop=row["start_stop"],
+                    end_stop=row["end_stop"],
+                )
+                key = (float(row["latitude"]), float(row["longitude"]))
+                departures.setdefault(key, []).append((time_to_seconds(departure_time), departure.route_number, departure))
+        for entries in departures.values():
+            entries.sort(key=lambda entry: entry[:2])
+
+        headways: dict[tuple[float, float], list[_HeadwayService]] = {}
+        for route_number, rows in headway_rows.items():
+            headway = Headway.from_route(rows[0]["first_adv"], rows[0]["last_adv"], rows[0]["interval"])
+            # The origin is the first stop along the route, not the earliest clock time: a
+            # pattern that crosses midnight is unwrapped first, as the journey planner does.
+            rows.sort(key=lambda row: (
+                row["stop_sequence"] is None,
+                row["stop_sequence"] or 0,
+                time_to_seconds(row["departure_time"] or row["arrival_time"]),
+            ))
+            times = unwrap_pattern((time_to_seconds(row["arrival_time"]), time_to_seconds(row["departure_time"])) for row in rows)
+            arrival, departure = times[0]
+            origin = departure if departure is not None else arrival
+            for row, (arrival, departure) in zip(rows, times):
+                departure, arrival = departure if departure is not None else arrival, arrival if arrival is not None else departure
+                key = (float(row["latitude"]), float(row["longitude"]))
+                headways.setdefault(key, []).append(_HeadwayService(
+                    headway=headway,
+                    departure_offset=departure - origin,
+                    dwell=departure - arrival,
+                    route_number=route_number,
+                    start_stop=row["start_stop"],
+                    end_stop=row["end_stop"],
+                ))
+        self._departures = departures
+        self._headways = headways
+
+    def next_departures(self, latitude: float, longitude: float, after: time, limit: int) -> list[DepartureSchema]:
+        key = (latitude, longitude)
+        after_seconds = time_to_seconds(after)
+        streams = []
+        entries = self._departures.get(key)
+        if entries:
+            streams.append(_cycle_once(entries, bisect_left(entries, (after_seconds,)), after_seconds))
+        for service in self._headways.get(key, ()):
+            streams.append(service.upcoming(after_seconds))
+        merged = heapq.merge(*streams, key=lambda entry: entry[:2])
+        return [
+            departure.to_schema(seconds) if isinstance(departure, _HeadwayService) else departure
+            for seconds, _, departure in islice(merged, limit)
+        ]
+
+
+departure_index = DepartureIndex()
@@ -0,0 +1,207 @@
+"""Assignment of drivers to a day's trips.
+
+A driver's shift runs from the start of their first trip to the end of their last
+and may not be longer than max_shift_sec; consecutive trips of a driver are at least
+min_break_sec apart. Only drivers whose contract covers the day take part, and a trip
+whose bus belongs to a company is only given to drivers of that company.
+
+Everything is decided in one sweep over the trips sorted by start time. Drivers of
+each company sit in two heaps: those still on a trip, keyed by when they are free
+again, and those free, keyed by the latest shift start first, so the free driver with
+the most shift left is tried first. A new driver starts a shift only when no free
+driver can fit the trip into theirs.
+"""
+import asyncio
+import heapq
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.core.config import settings
+from project.schemas.driver_roster import DriverRosterSchema, DriverShiftSchema
+from project.infrastructure.postgres.repository.driver_repo import DriverRepository
+from project.infrastructure.postgres.repository.trip_repo import TripRepository
+from project.services.timetable import seconds_to_time
+from project.services.trip_conflicts import trip_interval
+
+
+PROGRESS_EVERY = 1000
+
+
+@dataclass(frozen=True)
+class RosterTrip:
+    trip_id: int
+    company: int | None
+    start: int
+    end: int
+
+
+@dataclass
+class Shift:
+    driver_passport: str
+    start: int
+    end: int
+    trip_ids: list[int] = field(default_factory=list)
+
+
+class _CompanyPool:
+    def __init__(self) -> None:
+        self.idle: list[str] = []
+        self.running: list[tuple[int, int, Shift]] = []
+        self.free: list[tuple[int, int, Shift]] = []
+
+    def take_free(self, trip: RosterTrip, max_shift_sec: int) -> Shift | None:
+        while self.running and self.running[0][0] <= trip.start:
+            _, order, shift = heapq.heappop(self.running)
+            heapq.heappush(self.free, (-shift.start, order, shift))
+        if not self.free:
+            return None
+        latest_start = -self.free[0][0]
+        if latest_start + max_shift_sec < trip.start:
+            # Trips come in order of start, so none of these shifts can take another trip.
+            self.free.clear()
+            return None
+        if latest_start + max_shift_sec < trip.end:
+            return None
+        return heapq.heappop(self.free)[2]
+
+
+def build_roster(
+    trips: list[RosterTrip],
+    drivers: list[tuple[str, int | None]],
+    max_shift_sec: int,
+    min_break_sec: int,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> tuple[list[Shift], list[int]]:
+    """Roster (passport_number, id_company) drivers onto trips; returns the shifts and the trips left over."""
+    pools: dict[int | None, _CompanyPool] = {}
+    for passport_number, id_company in reversed(drivers):
+        pools.setdefault(id_company, _CompanyPool()).idle.append(passport_number)
+
+    shifts: list[Shift] = []
+    unassigned: list[int] = []
+    ordered = sorted(trips, key=lambda trip: (trip.start, trip.end))
+    for order, trip in enumerate(ordered):
+        if on_progress is not None and order % PROGRESS_EVERY == 0:
+            on_progress(order, len(ordered))
+        # A trip without a company can be driven by anyone.
+        candidates = [pools[trip.company]] if trip.company in pools else []
+        if trip.company is None:
+            candidates = list(pools.values())
+
+        shift = pool = None
+        if trip.end - trip.start <= max_shift_sec:
+            for candidate in candidates:
+                shift = candidate.take_free(trip, max_shift_sec)
+                if shift is not None:
+                    pool = candidate
+                    break
+            else:
+                for candidate in candidates:
+                    if candidate.idle:
+                        pool = candidate
+                        shift = Shift(driver_passport=candidate.idle.pop(), start=trip.start, end=trip.end)
+                        shifts.append(shift)
+                        break
+        if shift is None:
+            unassigned.append(trip.trip_id)
+            continue
+        shift.trip_ids.append(trip.trip_id)
+        shift.end = trip.end
+        heapq.heappush(pool.running, (trip.end + min_break_sec, order, shift))
+    if on_progress is not None:
+        on_progress(len(ordered), len(ordered))
+    return shifts, unassigned
+
+
+class DriverRosterer:
+    def __init__(self) -> None:
+        self._trip_repo = TripRepository()
+        self._driver_repo = DriverRepository()
+
+    async def roster(
+        self,
+        session: AsyncSession,
+        trip_date: date,
+        id_company: int | None = None,
+        max_shift_sec: int = settings.DRIVER_MAX_SHIFT_SEC,
+        min_break_sec: int = settings.DRIVER_MIN_BREAK_SEC,
+        reassign: bool = False,
+        dry_run: bool = False,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+    ) -> DriverRosterSchema:
+        """Assign drivers to the trips of trip_date (with buses of one company if id_company is given).
+
+        Trips that already have a driver keep them unless reassign is set, and those
+        drivers stay out of the roster, as do the drivers of daily trips. With dry_run
+        nothing is written.
+        """
+        def report(phase: str, done: int = 0, total: int = 0) -> None:
+            if on_progress is not None:
+                on_progress({"phase": phase, "trips_done": done, "trips_total": total})
+
+        report("loading")
+        busy: set[str] = set()
+        rostered: list[RosterTrip] = []
+        previous: dict[int, str | None] = {}
+        unassigned: list[int] = []
+        for trip in await self._trip_repo.get_trips_with_company(session=session, trip_date=trip_date):
+            if (
+                trip["trip_date"] is None
+                or (id_company is not None and trip["owner_company"] != id_company)
+                or (not reassign and trip["driver_passport"] is not None)
+            ):
+                if trip["driver_passport"] is not None:
+                    busy.add(trip["driver_passport"])
+                continue
+            previous[trip["trip_id"]] = trip["driver_passport"]
+            interval = trip_interval(trip["start_time"], trip["end_time"])
+            if interval is None:
+                unassigned.append(trip["trip_id"])
+                continue
+            rostered.append(RosterTrip(trip_id=trip["trip_id"], company=trip["owner_company"], start=interval[0], end=interval[1]))
+        drivers = await self._driver_repo.get_rosterable_drivers(session=session, trip_date=trip_date, id_company=id_company)
+
+        # The sweep is CPU work; a worker thread keeps the event loop responsive meanwhile.
+        shifts, left_over = await asyncio.to_thread(
+            build_roster,
+            rostered,
+            [(passport_number, company) for passport_number, company in drivers if passport_number not in busy],
+            max_shift_sec,
+            min_break_sec,
+            lambda done, total: report("rostering", done, total),
+        )
+        unassigned.extend(left_over)
+
+        if not dry_run:
+            report("writing", len(rostered), len(rostered))
+            assignments = {trip_id: shift.driver_passport for shift in shifts for trip_id in shift.trip_ids}
+            # Reassigned trips that found no driver lose the old one, who may now drive other trips.
+            changes = [
+                {"trip_id": trip_id, "driver_passport": assignments.get(trip_id)}
+                for trip_id, driver_passport in previous.items()
+                if assignments.get(trip_id) != driver_passport
+            ]
+            await self._trip_repo.bulk_update_trips(session=session, changes=changes)
+
+        return DriverRosterSchema(
+            trip_date=trip_date,
+            dry_run=dry_run,
+            trips=len(previous),
+            drivers_used=len(shifts),
+            shifts=[
+                DriverShiftSchema(
+                    driver_passport=shift.driver_passport,
+                    shift_start=seconds_to_time(shift.start),
+                    shift_end=seconds_to_time(shift.end),
+                    trip_ids=shift.trip_ids,
+                )
+                for shift in sorted(shifts, key=lambda shift: shift.driver_passport)
+            ],
+            unassigned_trip_ids=sorted(unassigned),
+        )
+
+
+driver_rosterer = DriverRosterer()
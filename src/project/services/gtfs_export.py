@@ -0,0 +1,223 @@
+"""Streaming GTFS export of the current network.
+
+Every table is read through a server-side cursor and written straight into a zip
+member; the compressed bytes are handed out as soon as a chunk of rows is written,
+so neither the tables nor the archive are ever held in memory. The only thing kept
+is the StopTime pattern of each route (one row per stop and route, in stop_sequence
+order), which every trip of the route is shifted onto to produce its stop_times.txt rows.
+
+All tables are read in one REPEATABLE READ transaction, so the files agree with
+each other even if the schedule is edited while the export runs.
+
+Usage: python -m project.services.gtfs_export gtfs.zip
+"""
+import argparse
+import asyncio
+import csv
+import io
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, AsyncIterator, Iterable
+
+from project.core.config import settings
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.models import Route, Stop, Trip
+from project.infrastructure.postgres.repository.stop_time_repo import StopTimeRepository
+from project.infrastructure.postgres.repository.streaming import stream_table
+from project.services.timetable import time_to_seconds, unwrap_pattern
+
+
+AGENCY_ID = "1"
+DAILY_SERVICE_ID = "daily"
+BUS_ROUTE_TYPE = 3
+
+
+class _ChunkSink(io.RawIOBase):
+    # Unseekable target for ZipFile: it falls back to data descriptors and lets
+    # the written bytes be taken out between members and rows.
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stop_id(latitude: Decimal, longitude: Decimal) -> str:
+    return f"{latitude}_{longitude}"
+
+
+def format_gtfs_time(seconds: int | None) -> str:
+    # Trips running past midnight keep counting from the service day: 25:10:00.
+    if seconds is None:
+        return ""
+    return f"{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+
+
+def service_id(trip_date: date | None) -> str:
+    return DAILY_SERVICE_ID if trip_date is None else trip_date.strftime("%Y%m%d")
+
+
+class GtfsExporter:
+    def __init__(self, chunk_size: int = settings.STREAM_CHUNK_SIZE) -> None:
+        self._chunk_size = chunk_size
+        self._stop_time_repo = StopTimeRepository()
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED)
+
+    async def _write_member(self, name: str, header: list[str], rows: AsyncIterator[list[list[Any]]]) -> AsyncIterator[bytes]:
+        with self._zip.open(name, "w", force_zip64=True) as member:
+            text = io.TextIOWrapper(member, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow(header)
+            async for chunk in rows:
+                writer.writerows(chunk)
+                text.flush()
+                yield self._sink.drain()
+            text.flush()
+            text.detach()
+        yield self._sink.drain()
+
+    async def _partitions(self, session, collection: type, order_by: Iterable = ()) -> AsyncIterator[list]:
+        result = await stream_table(session=session, collection=collection, chunk_size=self._chunk_size, order_by=order_by)
+        async for partition in result.mappings().partitions(self._chunk_size):
+            yield partition
+
+    async def _once(self, rows: list[list[Any]]) -> AsyncIterator[list[list[Any]]]:
+        yield rows
+
+    async def _stops(self, session) -> AsyncIterator[list[list[Any]]]:
+        async for partition in self._partitions(session, Stop):
+            yield [
+                [stop_id(row["latitude"], row["longitude"]), row["stop_name"] or "", row["address"] or "", row["latitude"], row["longitude"]]
+                for row in partition
+            ]
+
+    async def _routes(self, session) -> AsyncIterator[list[list[Any]]]:
+        async for partition in self._partitions(session, Route, (Route.route_number,)):
+            yield [
+                [
+                    row["route_number"],
+                    AGENCY_ID,
+                    row["route_number"],
+                    " - ".join(stop for stop in (row["start_stop"], row["end_stop"]) if stop),
+                    BUS_ROUTE_TYPE,
+                ]
+                for row in partition
+            ]
+
+    async def _load_patterns(self, session) -> dict[int, tuple[int, list[tuple[str, int | None, int | None]]]]:
+        # route_number -> (time of the first stop, [(stop_id, arrival, departure)] in seconds from it).
+        patterns: dict[int, list[tuple[str, int | None, int | None]]] = {}
+        result = await self._stop_time_repo.stream_route_patterns(session=session, chunk_size=self._chunk_size)
+        async for row in result:
+            arrival, departure = time_to_seconds(row.arrival_time), time_to_seconds(row.departure_time)
+            patterns.setdefault(row.route_number, []).append((stop_id(row.latitude, row.longitude), arrival, departure))
+
+        shifted = {}
+        for route_number, pattern in patterns.items():
+            times = unwrap_pattern((arrival, departure) for _, arrival, departure in pattern)
+            arrival, departure = times[0]
+            origin = departure if departure is not None else arrival
+            shifted[route_number] = (origin, [
+                (stop, None if arrival is None else arrival - origin, None if departure is None else departure - origin)
+                for (stop, _, _), (arrival, departure) in zip(pattern, times)
+            ])
+        return shifted
+
+    async def _trips(self, session, service_dates: set[date | None]) -> AsyncIterator[list[list[Any]]]:
+        async for partition in self._partitions(session, Trip, (Trip.trip_id,)):
+            rows = []
+            for row in partition:
+                if row["route_number"] is None:
+                    continue
+                service_dates.add(row["trip_date"])
+                rows.append([row["route_number"], service_id(row["trip_date"]), row["trip_id"]])
+            yield rows
+
+    async def _stop_times(self, session, patterns: dict) -> AsyncIterator[list[list[Any]]]:
+        async for partition in self._partitions(session, Trip, (Trip.trip_id,)):
+            rows = []
+            for row in partition:
+                if row["route_number"] not in patterns:
+                    continue
+                origin, pattern = patterns[row["route_number"]]
+                start = time_to_seconds(row["start_time"])
+                if start is None:
+                    start = origin
+                for sequence, (stop, arrival, departure) in enumerate(pattern, start=1):
+                    rows.append([
+                        row["trip_id"],
+                        format_gtfs_time(None if arrival is None else start + arrival),
+                        format_gtfs_time(None if departure is None else start + departure),
+                        stop,
+                        sequence,
+                    ])
+            yield rows
+
+    def _calendar(self, service_dates: set[date | None]) -> tuple[list[list[Any]], list[list[Any]]]:
+        calendar, calendar_dates = [], []
+        if None in service_dates:
+            start = date.today()
+            calendar.append([DAILY_SERVICE_ID, 1, 1, 1, 1, 1, 1, 1, start.strftime("%Y%m%d"), (start + timedelta(days=365)).strftime("%Y%m%d")])
+        for trip_date in sorted(service_date for service_date in service_dates if service_date is not None):
+            calendar_dates.append([service_id(trip_date), trip_date.strftime("%Y%m%d"), 1])
+        return calendar, calendar_dates
+
+    async def export(self) -> AsyncIterator[bytes]:
+        async with database.session() as session:
+            await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+            agency = [[AGENCY_ID, settings.GTFS_AGENCY_NAME, settings.GTFS_AGENCY_URL, settings.GTFS_AGENCY_TIMEZONE]]
+            async for data in self._write_member("agency.txt", ["agency_id", "agency_name", "agency_url", "agency_timezone"], self._once(agency)):
+                yield data
+            async for data in self._write_member("stops.txt", ["stop_id", "stop_name", "stop_desc", "stop_lat", "stop_lon"], self._stops(session)):
+                yield data
+            async for data in self._write_member("routes.txt", ["route_id", "agency_id", "route_short_name", "route_long_name", "route_type"], self._routes(session)):
+                yield data
+
+            service_dates: set[date | None] = set()
+            async for data in self._write_member("trips.txt", ["route_id", "service_id", "trip_id"], self._trips(session, service_dates)):
+                yield data
+            patterns = await self._load_patterns(session)
+            async for data in self._write_member(
+                "stop_times.txt", ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"], self._stop_times(session, patterns)
+            ):
+                yield data
+
+        calendar, calendar_dates = self._calendar(service_dates)
+        if calendar:
+            header = ["service_id", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday", "start_date", "end_date"]
+            async for data in self._write_member("calendar.txt", header, self._once(calendar)):
+                yield data
+        if calendar_dates or not calendar:
+            async for data in self._write_member("calendar_dates.txt", ["service_id", "date", "exception_type"], self._once(calendar_dates)):
+                yield data
+        self._zip.close()
+        yield self._sink.drain()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the schedule database as a GTFS feed")
+    parser.add_argument("output", help="path of the GTFS zip file to write")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        with open(args.output, "wb") as output:
+            async for data in GtfsExporter().export():
+                output.write(data)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
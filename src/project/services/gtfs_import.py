@@ -0,0 +1,303 @@
+"""Streaming GTFS importer.
+
+The feed files are read row by row straight from the zip archive. Only lookup
+tables proportional to the number of stops, routes and trips are kept in memory,
+never whole files, so stop_times.txt of any size is imported in bounded memory.
+
+Mapping onto the models:
+
+* stops.txt (location_type 0 or empty) -> Stop, keyed by its coordinates;
+* routes.txt -> Route, route_number taken from a numeric route_short_name or route_id;
+* stop_times.txt -> RouteStop for every (stop, route) pair seen, and StopTime taken
+  from the earliest trip of each route (StopTime holds one time per stop and route).
+  stop_sequence follows that trip; stops only other trips call at come after it;
+* trips.txt -> Trip with start_time/end_time spanning the trip's stop times.
+
+Usage: python -m project.services.gtfs_import feed.zip [--service-date 2024-01-01]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import logging
+import time
+import zipfile
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Iterator
+
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.models import Route, RouteStop, Stop, StopTime, Trip
+from project.infrastructure.postgres.repository.bulk import copy_insert
+from project.services.timetable import seconds_to_time
+
+
+logger = logging.getLogger(__name__)
+
+COORDINATE_QUANTUM = Decimal("0.000001")
+DEFAULT_BATCH_SIZE = 10000
+
+
+def read_feed_file(feed: zipfile.ZipFile, name: str) -> Iterator[dict[str, str]]:
+    with feed.open(name) as raw:
+        yield from csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+
+
+def parse_gtfs_time(value: str | None) -> int | None:
+    """Seconds since the start of the service day; GTFS times may run past midnight ("25:10:00").
+
+    Raises ValueError for a malformed time.
+    """
+    if not value:
+        return None
+    hours, minutes, seconds = value.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def parse_route_number(row: dict[str, str]) -> int | None:
+    for key in ("route_short_name", "route_id"):
+        value = (row.get(key) or "").strip()
+        if value.isdigit():
+            return int(value)
+    return None
+
+
+def parse_stop_sequence(row: dict[str, str], default: int) -> int:
+    value = (row.get("stop_sequence") or "").strip()
+    return int(value) if value.isdigit() else default
+
+
+class GtfsImporter:
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        service_date: date | None = None,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+    ) -> None:
+        self._batch_size = batch_size
+        self._service_date = service_date
+        self._on_progress = on_progress
+        self._progress: dict[str, Any] = {"file": None, "rows": {}, "inserted": {}, "skipped": {}}
+        self._started_at = time.perf_counter()
+
+    async def write_batch(self, collection: type, rows: list[dict[str, Any]], conflict_columns: tuple[str, ...]) -> int:
+        async with database.session() as session:
+            outcome = await copy_insert(session=session, collection=collection, rows=rows, conflict_columns=conflict_columns)
+        return outcome.inserted
+
+    async def _flush(self, collection: type, rows: list[dict[str, Any]], conflict_columns: tuple[str, ...] = ()) -> None:
+        if not rows:
+            return
+        inserted = await self.write_batch(collection, rows, conflict_columns)
+        table = collection.__tablename__
+        self._progress["inserted"][table] = self._progress["inserted"].get(table, 0) + inserted
+        rows.clear()
+
+    def _count(self, name: str, key: str = "rows") -> None:
+        counters = self._progress[key]
+        counters[name] = counters.get(name, 0) + 1
+
+    def _report(self, name: str) -> None:
+        self._progress["file"] = name
+        elapsed = time.perf_counter() - self._started_at
+        total = sum(self._progress["rows"].values())
+        self._progress["elapsed_sec"] = round(elapsed, 3)
+        self._progress["rows_per_sec"] = round(total / elapsed) if elapsed else 0
+        if self._on_progress is not None:
+            self._on_progress(dict(self._progress))
+
+    async def run(self, feed_path: str) -> dict[str, Any]:
+        with zipfile.ZipFile(feed_path) as feed:
+            stops = await self._import_stops(feed)
+            routes = await self._import_routes(feed)
+            # trips.txt and stop_times.txt are parsed in a thread so the import does not hold up
+            # the event loop (and the requests of the worker running it); only the writes run on it.
+            trips = await asyncio.to_thread(self._read_trips, feed, routes)
+            spans = await self._import_stop_times(feed, stops, trips)
+            await self._import_trips(trips, spans)
+        self._report("done")
+        return dict(self._progress)
+
+    async def _import_stops(self, feed: zipfile.ZipFile) -> dict[str, tuple[Decimal, Decimal]]:
+        stops: dict[str, tuple[Decimal, Decimal]] = {}
+        batch: list[dict[str, Any]] = []
+        for row in read_feed_file(feed, "stops.txt"):
+            self._count("stops.txt")
+            if (row.get("location_type") or "0").strip() not in ("", "0"):
+                self._count("stops.txt", "skipped")
+                continue
+            try:
+                latitude = Decimal(row["stop_lat"]).quantize(COORDINATE_QUANTUM)
+                longitude = Decimal(row["stop_lon"]).quantize(COORDINATE_QUANTUM)
+            except (KeyError, TypeError, InvalidOperation):
+                self._count("stops.txt", "skipped")
+                continue
+            stops[row["stop_id"]] = (latitude, longitude)
+            batch.append({
+                "latitude": latitude,
+                "longitude": longitude,
+                "stop_name": row.get("stop_name") or None,
+                "address": row.get("stop_desc") or None,
+            })
+            if len(batch) >= self._batch_size:
+                await self._flush(Stop, batch, ("latitude", "longitude"))
+                self._report("stops.txt")
+        await self._flush(Stop, batch, ("latitude", "longitude"))
+        self._report("stops.txt")
+        return stops
+
+    async def _import_routes(self, feed: zipfile.ZipFile) -> dict[str, int]:
+        routes: dict[str, int] = {}
+        batch: list[dict[str, Any]] = []
+        for row in read_feed_file(feed, "routes.txt"):
+            self._count("routes.txt")
+            route_number = parse_route_number(row)
+            if route_number is None:
+                self._count("routes.txt", "skipped")
+                continue
+            routes[row["route_id"]] = route_number
+            batch.append({"route_number": route_number})
+            if len(batch) >= self._batch_size:
+                await self._flush(Route, batch, ("route_number",))
+        await self._flush(Route, batch, ("route_number",))
+        self._report("routes.txt")
+        return routes
+
+    def _read_trips(self, feed: zipfile.ZipFile, routes: dict[str, int]) -> dict[str, int]:
+        trips: dict[str, int] = {}
+        for row in read_feed_file(feed, "trips.txt"):
+            self._count("trips.txt")
+            route_number = routes.get(row.get("route_id"))
+            if route_number is None:
+                self._count("trips.txt", "skipped")
+                continue
+            trips[row["trip_id"]] = route_number
+        self._report("trips.txt")
+        return trips
+
+    async def _import_stop_times(
+        self,
+        feed: zipfile.ZipFile,
+        stops: dict[str, tuple[Decimal, Decimal]],
+        trips: dict[str, int],
+    ) -> dict[str, list[int | None]]:
+        spans, route_stops, patterns = await asyncio.to_thread(self._read_stop_times, feed, stops, trips)
+        batch: list[dict[str, Any]] = []
+        for route_number, coordinates in route_stops.items():
+            ordered = dict.fromkeys((row["latitude"], row["longitude"]) for row in patterns.get(route_number, (0, []))[1])
+            ordered.update(coordinates)
+            for stop_sequence, (latitude, longitude) in enumerate(ordered, start=1):
+                batch.append({"latitude": latitude, "longitude": longitude, "route_number": route_number, "stop_sequence": stop_sequence})
+                if len(batch) >= self._batch_size:
+                    await self._flush(RouteStop, batch, ("latitude", "longitude", "route_number"))
+        await self._flush(RouteStop, batch, ("latitude", "longitude", "route_number"))
+
+        for _, rows in patterns.values():
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self._batch_size:
+                    await self._flush(StopTime, batch, ("latitude", "longitude", "route_number"))
+        await self._flush(StopTime, batch, ("latitude", "longitude", "route_number"))
+        self._report("stop_times.txt")
+        return spans
+
+    def _read_stop_times(
+        self,
+        feed: zipfile.ZipFile,
+        stops: dict[str, tuple[Decimal, Decimal]],
+        trips: dict[str, int],
+    ) -> tuple[
+        dict[str, list[int | None]],
+        dict[int, dict[tuple[Decimal, Decimal], None]],
+        dict[int, tuple[int, list[dict[str, Any]]]],
+    ]:
+        # trip_id -> [first departure, last arrival] in seconds
+        spans: dict[str, list[int | None]] = {}
+        # route_number -> coordinates of its stops in the order they were first seen
+        route_stops: dict[int, dict[tuple[Decimal, Decimal], None]] = {}
+        # route_number -> (start of the representative trip, its stop times)
+        patterns: dict[int, tuple[int, list[dict[str, Any]]]] = {}
+        current_trip, current_rows = None, []
+
+        def close_trip() -> None:
+            if current_trip is None or not current_rows:
+                return
+            route_number = trips[current_trip]
+            start = spans[current_trip][0]
+            if start is not None and (route_number not in patterns or start < patterns[route_number][0]):
+                rows = sorted(current_rows, key=lambda row: row[0])
+                patterns[route_number] = (start, [row for _, row in rows])
+
+        for row in read_feed_file(feed, "stop_times.txt"):
+            self._count("stop_times.txt")
+            trip_id, stop_id = row.get("trip_id"), row.get("stop_id")
+            route_number = trips.get(trip_id)
+            coordinates = stops.get(stop_id)
+            if route_number is None or coordinates is None:
+                self._count("stop_times.txt", "skipped")
+                continue
+            try:
+                arrival = parse_gtfs_time(row.get("arrival_time"))
+                departure = parse_gtfs_time(row.get("departure_time"))
+            except ValueError:
+                self._count("stop_times.txt", "skipped")
+                continue
+            if trip_id != current_trip:
+                close_trip()
+                current_trip, current_rows = trip_id, []
+
+            span = spans.setdefault(trip_id, [None, None])
+            first, last = departure if departure is not None else arrival, arrival if arrival is not None else departure
+            if first is not None and (span[0] is None or first < span[0]):
+                span[0] = first
+            if last is not None and (span[1] is None or last > span[1]):
+                span[1] = last
+
+            latitude, longitude = coordinates
+            current_rows.append((parse_stop_sequence(row, len(current_rows)), {
+                "latitude": latitude,
+                "longitude": longitude,
+                "route_number": route_number,
+                "arrival_time": seconds_to_time(arrival),
+                "departure_time": seconds_to_time(departure),
+            }))
+            route_stops.setdefault(route_number, {})[coordinates] = None
+            if self._progress["rows"]["stop_times.txt"] % (self._batch_size * 10) == 0:
+                self._report("stop_times.txt")
+        close_trip()
+        return spans, route_stops, patterns
+
+    async def _import_trips(self, trips: dict[str, int], spans: dict[str, list[int | None]]) -> None:
+        batch: list[dict[str, Any]] = []
+        for trip_id, route_number in trips.items():
+            start, end = spans.get(trip_id, (None, None))
+            batch.append({
+                "route_number": route_number,
+                "trip_date": self._service_date,
+                "start_time": seconds_to_time(start),
+                "end_time": seconds_to_time(end),
+            })
+            if len(batch) >= self._batch_size:
+                await self._flush(Trip, batch)
+        await self._flush(Trip, batch)
+        self._report("trips.txt")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import a GTFS feed into the schedule database")
+    parser.add_argument("feed", help="path to the GTFS zip file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--service-date", type=date.fromisoformat, default=None, help="trip_date for imported trips")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    importer = GtfsImporter(
+        batch_size=args.batch_size,
+        service_date=args.service_date,
+        on_progress=lambda progress: logger.info("%s", progress),
+    )
+    asyncio.run(importer.run(args.feed))
+
+
+if __name__ == "__main__":
+    main()
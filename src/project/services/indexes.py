@@ -0,0 +1,24 @@
+import logging
+
+from project.core.exceptions import DatabaseError
+from project.services.departure_board import departure_index
+from project.services.journey_planner import journey_planner
+from project.services.spatial_index import stop_index
+
+
+logger = logging.getLogger(__name__)
+
+
+def invalidate_schedule_indexes() -> None:
+    # Called after writes to stops, routes, stop times or trips; the next read rebuilds.
+    departure_index.invalidate()
+    journey_planner.invalidate()
+
+
+async def warm_up_indexes() -> None:
+    # Build the indexes at startup so the first requests do not pay for it.
+    for index in (stop_index, departure_index, journey_planner):
+        try:
+            await index.ensure_loaded()
+        except (Exception, DatabaseError):
+            logger.exception("Could not build %s at startup", type(index).__name__)
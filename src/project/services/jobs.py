@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from project.core.config import settings
+from project.core.exceptions import DatabaseError
+from project.schemas.job import JobSchema
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.repository.job_repo import JobRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "pending"
+    progress: dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: str | None = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    def to_schema(self) -> JobSchema:
+        return JobSchema(
+            id=self.id,
+            kind=self.kind,
+            status=self.status,
+            progress=self.progress,
+            result=self.result,
+            error=self.error,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+
+class JobRegistry:
+    # Background jobs. A job runs in the worker process that started it and is kept in the
+    # jobs table, so that every worker can report it: its state is saved when it starts,
+    # every progress_save_sec while it runs and when it ends. Finished jobs are kept until
+    # max_jobs newer ones exist.
+    def __init__(self, max_jobs: int = 100, progress_save_sec: float = settings.JOB_PROGRESS_SAVE_SEC) -> None:
+        self._max_jobs = max_jobs
+        self._progress_save_sec = progress_save_sec
+        # Jobs running in this process, and finished ones whose final state could not be saved.
+        self._jobs: dict[str, Job] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._repo = JobRepository()
+
+    async def start(self, kind: str, run: Callable[[Job], Awaitable[Any]]) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        async with database.session() as session:
+            await self._repo.save_job(session=session, job=job.to_schema())
+            await self._repo.delete_old_jobs(session=session, keep=self._max_jobs)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, run))
+        return job
+
+    async def get(self, job_id: str) -> JobSchema | None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_schema()
+        async with database.session() as session:
+            return await self._repo.get_job(session=session, job_id=job_id)
+
+    async def _save(self, job: Job) -> bool:
+        try:
+            async with database.session() as session:
+                await self._repo.save_job(session=session, job=job.to_schema())
+        except DatabaseError:
+            logger.warning("Could not save the state of job %s (%s)", job.id, job.kind, exc_info=True)
+            return False
+        return True
+
+    async def _save_progress(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self._progress_save_sec)
+            await self._save(job)
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable[Any]]) -> None:
+        job.status = "running"
+        progress_saver = asyncio.create_task(self._save_progress(job))
+        try:
+            job.result = await run(job)
+            job.status = "done"
+        except BaseException as error:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            job.status = "failed"
+            job.error = getattr(error, "message", None) or repr(error)
+            if isinstance(error, (asyncio.CancelledError, KeyboardInterrupt, SystemExit)):
+                raise
+        finally:
+            progress_saver.cancel()
+            job.finished_at = time.time()
+            self._tasks.pop(job.id, None)
+            if await self._save(job):
+                del self._jobs[job.id]
+
+
+job_registry = JobRegistry()
@@ -0,0 +1,342 @@
+"""Earliest-arrival journey planning with RAPTOR.
+
+The network is compiled from Stop, StopTime and Trip into flat arrays: every route
+is the sequence of its stops with arrival/departure offsets from the first stop
+(its StopTime pattern), and every trip of the route is that pattern shifted to the
+trip's start_time. Routes without Trip rows but with first_adv/last_adv/interval run
+the pattern on that headway, which is never expanded into trips. Footpaths between stops closer than JOURNEY_MAX_WALK_M are
+precomputed with the stop spatial index.
+
+A query runs one round per boarded vehicle (Delling, Pajor, Werneck, "Round-Based
+Public Transit Routing"): round k scans only the routes serving stops improved in
+round k - 1, and catches the earliest trip at each stop with a bisect over the
+route's sorted trip start times (or by arithmetic on the headway). Every round that improves the arrival at the
+destination yields one itinerary, so the result is the arrival/transfers Pareto set.
+"""
+import asyncio
+import math
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Iterable
+
+from project.core.config import settings
+from project.schemas.journey import JourneyLegSchema, JourneySchema
+from project.schemas.stop import StopSchema
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.repository.route_repo import RouteRepository
+from project.infrastructure.postgres.repository.stop_repo import StopRepository
+from project.infrastructure.postgres.repository.stop_time_repo import StopTimeRepository
+from project.infrastructure.postgres.repository.trip_repo import TripRepository
+from project.services.loaded_index import LoadedIndex
+from project.services.spatial_index import StopSpatialIndex, haversine_m
+from project.services.timetable import Headway, seconds_to_time, time_to_seconds, unwrap_pattern
+
+
+INFINITY = 10 ** 9
+
+
+@dataclass
+class CompiledNetwork:
+    stop_keys: list[tuple[float, float]] = field(default_factory=list)
+    stop_ids: dict[tuple[float, float], int] = field(default_factory=dict)
+    stop_names: list[str | None] = field(default_factory=list)
+    route_numbers: list[int] = field(default_factory=list)
+    # Stops of route r are route_stops[route_start[r]:route_start[r + 1]].
+    route_start: array = field(default_factory=lambda: array("i", [0]))
+    route_stops: array = field(default_factory=lambda: array("i"))
+    arrival_offsets: array = field(default_factory=lambda: array("i"))
+    departure_offsets: array = field(default_factory=lambda: array("i"))
+    # Per stop: (route, position along it) and (other stop, walking seconds).
+    stop_routes: list[list[tuple[int, int]]] = field(default_factory=list)
+    transfers: list[list[tuple[int, int]]] = field(default_factory=list)
+    # Per route: sorted trip start times by trip_date; None holds undated trips.
+    trip_starts: list[dict[date | None, array]] = field(default_factory=list)
+    headways: list[Headway | None] = field(default_factory=list)
+    spatial: StopSpatialIndex = field(default_factory=StopSpatialIndex)
+    _starts_cache: dict[tuple[int, date | None], array] = field(default_factory=dict)
+
+    def starts_for(self, route: int, service_date: date | None) -> array:
+        # Undated trips run every day, dated ones only on their trip_date.
+        by_date = self.trip_starts[route]
+        if service_date is None or service_date not in by_date:
+            return by_date.get(None, array("i"))
+        key = (route, service_date)
+        starts = self._starts_cache.get(key)
+        if starts is None:
+            if len(self._starts_cache) > 100000:
+                self._starts_cache.clear()
+            starts = array("i", sorted((*by_date.get(None, ()), *by_date[service_date])))
+            self._starts_cache[key] = starts
+        return starts
+
+
+def walking_seconds(distance_m: float, walk_speed_mps: float) -> int:
+    return math.ceil(distance_m / walk_speed_mps)
+
+
+def compile_network(
+    stops: Iterable[StopSchema],
+    patterns: Iterable[tuple[int, float, float, int | None, int | None]],
+    trips: Iterable[tuple[int, date | None, int]],
+    headways: dict[int, Headway] | None = None,
+    max_walk_m: float = settings.JOURNEY_MAX_WALK_M,
+    walk_speed_mps: float = settings.JOURNEY_WALK_SPEED_MPS,
+) -> CompiledNetwork:
+    """Build the network from stops, (route_number, latitude, longitude, arrival, departure)
+    rows ordered along each route, (route_number, trip_date, start) rows and the headways
+    of frequency-based routes; times in seconds."""
+    headways = headways or {}
+    network = CompiledNetwork()
+    stop_ids = network.stop_ids
+    stops = list(stops)
+    for stop in stops:
+        stop_ids[(stop.latitude, stop.longitude)] = len(network.stop_keys)
+        network.stop_keys.append((stop.latitude, stop.longitude))
+        network.stop_names.append(stop.stop_name)
+    network.spatial.load(stops)
+    network.stop_routes = [[] for _ in stops]
+
+    route_ids: dict[int, int] = {}
+    origins: list[int] = []
+
+    def close_route(route_number: int, rows: list[tuple[int, int | None, int | None]]) -> None:
+        if len(rows) < 2:
+            return
+        times = unwrap_pattern((arrival, departure) for _, arrival, departure in rows)
+        arrival, departure = times[0]
+        origin = departure if departure is not None else arrival
+        route = len(network.route_numbers)
+        route_ids[route_number] = route
+        network.route_numbers.append(route_number)
+        origins.append(origin)
+        for position, ((stop, _, _), (arrival, departure)) in enumerate(zip(rows, times)):
+            network.route_stops.append(stop)
+            network.arrival_offsets.append((arrival if arrival is not None else departure) - origin)
+            network.departure_offsets.append((departure if departure is not None else arrival) - origin)
+            network.stop_routes[stop].append((route, position))
+        network.route_start.append(len(network.route_stops))
+
+    current_route, rows = None, []
+    for route_number, latitude, longitude, arrival, departure in patterns:
+        if route_number != current_route:
+            if current_route is not None:
+                close_route(current_route, rows)
+            current_route, rows = route_number, []
+        stop = stop_ids.get((latitude, longitude))
+        if stop is None or (rows and rows[-1][0] == stop):
+            continue
+        rows.append((stop, arrival, departure))
+    if current_route is not None:
+        close_route(current_route, rows)
+
+    starts: list[dict[date | None, list[int]]] = [{} for _ in network.route_numbers]
+    for route_number, trip_date, start in trips:
+        route = route_ids.get(route_number)
+        if route is not None:
+            starts[route].setdefault(trip_date, []).append(start)
+    for route, by_date in enumerate(starts):
+        headway = headways.get(network.route_numbers[route]) if not by_date else None
+        network.headways.append(headway)
+        if not by_date and headway is None:
+            # A route without trips still runs its StopTime pattern once.
+            by_date[None] = [origins[route]]
+        network.trip_starts.append({trip_date: array("i", sorted(values)) for trip_date, values in by_date.items()})
+
+    for stop, (latitude, longitude) in enumerate(network.stop_keys):
+        network.transfers.append([
+            (stop_ids[(other_latitude, other_longitude)], walking_seconds(distance, walk_speed_mps))
+            for distance, other_latitude, other_longitude in network.spatial.within(latitude, longitude, max_walk_m)
+            if (other_latitude, other_longitude) != (latitude, longitude)
+        ])
+    return network
+
+
+def plan_journeys(
+    network: CompiledNetwork,
+    origin: tuple[float, float],
+    destination: tuple[float, float],
+    depart_at: int,
+    service_date: date | None = None,
+    max_transfers: int = settings.JOURNEY_MAX_TRANSFERS,
+    max_walk_m: float = settings.JOURNEY_MAX_WALK_M,
+    walk_speed_mps: float = settings.JOURNEY_WALK_SPEED_MPS,
+) -> list[JourneySchema]:
+    route_start, route_stops = network.route_start, network.route_stops
+    arrival_offsets, departure_offsets = network.arrival_offsets, network.departure_offsets
+    stop_routes, transfers = network.stop_routes, network.transfers
+
+    labels = [[INFINITY] * len(network.stop_keys)]
+    parents: list[dict[int, tuple]] = [{}]
+    marked = set()
+    for distance, latitude, longitude in network.spatial.within(*origin, max_walk_m):
+        stop = network.stop_ids[(latitude, longitude)]
+        labels[0][stop] = depart_at + walking_seconds(distance, walk_speed_mps)
+        parents[0][stop] = ("access",)
+        marked.add(stop)
+    egress = {}
+    for distance, latitude, longitude in network.spatial.within(*destination, max_walk_m):
+        egress[network.stop_ids[(latitude, longitude)]] = walking_seconds(distance, walk_speed_mps)
+
+    journeys = []
+    best = labels[0][:]
+    best_target = INFINITY
+    direct_m = haversine_m(*origin, *destination)
+    if direct_m <= max_walk_m:
+        best_target = depart_at + walking_seconds(direct_m, walk_speed_mps)
+        journeys.append(_journey([_walk_leg(origin, destination, depart_at, best_target)], depart_at, best_target))
+
+    for round_number in range(1, max_transfers + 2):
+        if not marked:
+            break
+        previous = labels[-1]
+        current = previous[:]
+        parent: dict[int, tuple] = {}
+        labels.append(current)
+        parents.append(parent)
+
+        queue: dict[int, int] = {}
+        for stop in marked:
+            for route, position in stop_routes[stop]:
+                if position < queue.get(route, INFINITY):
+                    queue[route] = position
+        marked = set()
+
+        for route, position in queue.items():
+            starts = network.starts_for(route, service_date)
+            headway = network.headways[route]
+            trip, board = None, -1
+            for index in range(route_start[route] + position, route_start[route + 1]):
+                stop = route_stops[index]
+                if trip is not None:
+                    arrival = trip + arrival_offsets[index]
+                    if arrival < best[stop] and arrival < best_target:
+                        current[stop] = best[stop] = arrival
+                        parent[stop] = ("ride", route, board, index, trip)
+                        marked.add(stop)
+                ready = previous[stop]
+                if ready < INFINITY and (trip is None or ready < trip + departure_offsets[index]):
+                    if headway is not None:
+                        candidate = headway.next_departure(ready - departure_offsets[index])
+                    else:
+                        earliest = bisect_left(starts, ready - departure_offsets[index])
+                        candidate = starts[earliest] if earliest < len(starts) else None
+                    if candidate is not None and (trip is None or candidate < trip):
+                        trip, board = candidate, index
+
+        for stop in list(marked):
+            for other, seconds in transfers[stop]:
+                arrival = current[stop] + seconds
+                if arrival < best[other] and arrival < best_target:
+                    current[other] = best[other] = arrival
+                    parent[other] = ("walk", stop)
+                    marked.add(other)
+
+        target_arrival, via = INFINITY, None
+        for stop, seconds in egress.items():
+            if current[stop] + seconds < target_arrival:
+                target_arrival, via = current[stop] + seconds, stop
+        if target_arrival < best_target:
+            best_target = target_arrival
+            legs = _reconstruct(network, labels, parents, round_number, via, origin, depart_at)
+            legs.append(_walk_leg(network.stop_keys[via], destination, current[via], target_arrival, from_name=network.stop_names[via]))
+            journeys.append(_journey(legs, depart_at, target_arrival))
+    return journeys
+
+
+def _walk_leg(start: tuple[float, float], end: tuple[float, float], departure: int, arrival: int, from_name: str | None = None, to_name: str | None = None) -> JourneyLegSchema:
+    return JourneyLegSchema(
+        mode="walk",
+        from_latitude=start[0],
+        from_longitude=start[1],
+        from_stop_name=from_name,
+        to_latitude=end[0],
+        to_longitude=end[1],
+        to_stop_name=to_name,
+        departure_time=seconds_to_time(departure),
+        arrival_time=seconds_to_time(arrival),
+    )
+
+
+def _reconstruct(network: CompiledNetwork, labels: list[list[int]], parents: list[dict[int, tuple]], round_number: int, stop: int, origin: tuple[float, float], depart_at: int) -> list[JourneyLegSchema]:
+    legs = []
+    while True:
+        while round_number > 0 and stop not in parents[round_number]:
+            round_number -= 1
+        link = parents[round_number][stop]
+        if link[0] == "access":
+            legs.append(_walk_leg(origin, network.stop_keys[stop], depart_at, labels[0][stop], to_name=network.stop_names[stop]))
+            break
+        if link[0] == "walk":
+            previous = link[1]
+            legs.append(_walk_leg(
+                network.stop_keys[previous], network.stop_keys[stop], labels[round_number][previous], labels[round_number][stop],
+                from_name=network.stop_names[previous], to_name=network.stop_names[stop],
+            ))
+            stop = previous
+            continue
+        _, route, board, alight, trip = link
+        board_stop = network.route_stops[board]
+        legs.append(JourneyLegSchema(
+            mode="bus",
+            route_number=network.route_numbers[route],
+            from_latitude=network.stop_keys[board_stop][0],
+            from_longitude=network.stop_keys[board_stop][1],
+            from_stop_name=network.stop_names[board_stop],
+            to_latitude=network.stop_keys[stop][0],
+            to_longitude=network.stop_keys[stop][1],
+            to_stop_name=network.stop_names[stop],
+            departure_time=seconds_to_time(trip + network.departure_offsets[board]),
+            arrival_time=seconds_to_time(trip + network.arrival_offsets[alight]),
+            stops_count=alight - board,
+        ))
+        stop = board_stop
+        round_number -= 1
+    legs.reverse()
+    return legs
+
+
+def _journey(legs: list[JourneyLegSchema], departure: int, arrival: int) -> JourneySchema:
+    rides = sum(1 for leg in legs if leg.mode == "bus")
+    return JourneySchema(
+        departure_time=seconds_to_time(departure),
+        arrival_time=seconds_to_time(arrival),
+        duration_sec=arrival - departure,
+        transfers=max(0, rides - 1),
+        legs=legs,
+    )
+
+
+class JourneyPlanner(LoadedIndex):
+    def __init__(self, max_age_sec: float = settings.JOURNEY_PLANNER_MAX_AGE_SEC) -> None:
+        super().__init__(max_age_sec=max_age_sec)
+        self._network = CompiledNetwork()
+        self._route_repo = RouteRepository()
+        self._stop_repo = StopRepository()
+        self._stop_time_repo = StopTimeRepository()
+        self._trip_repo = TripRepository()
+
+    async def _build(self) -> None:
+        chunk_size = settings.STREAM_CHUNK_SIZE
+        async with database.session() as session:
+            result = await self._stop_repo.stream_all_stops(session=session, chunk_size=chunk_size)
+            stops = [StopSchema.model_validate(row) async for row in result.mappings()]
+            result = await self._stop_time_repo.stream_route_patterns(session=session, chunk_size=chunk_size)
+            patterns = [
+                (row.route_number, float(row.latitude), float(row.longitude), time_to_seconds(row.arrival_time), time_to_seconds(row.departure_time))
+                async for row in result
+            ]
+            result = await self._trip_repo.stream_trip_starts(session=session, chunk_size=chunk_size)
+            trips = [(row.route_number, row.trip_date, time_to_seconds(row.start_time)) async for row in result]
+            result = await self._route_repo.stream_headways(session=session, chunk_size=chunk_size)
+            headways = {row.route_number: Headway.from_route(row.first_adv, row.last_adv, row.interval) async for row in result}
+        headways = {route_number: headway for route_number, headway in headways.items() if headway is not None}
+        # Compiling is pure CPU work; a worker thread keeps the event loop responsive meanwhile.
+        self._network = await asyncio.to_thread(compile_network, stops, patterns, trips, headways)
+
+    def plan(self, origin: tuple[float, float], destination: tuple[float, float], depart_at: int, service_date: date | None) -> list[JourneySchema]:
+        return plan_journeys(self._network, origin, destination, depart_at, service_date)
+
+
+journey_planner = JourneyPlanner()
@@ -0,0 +1,40 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+
+
+class LoadedIndex(ABC):
+    # In-memory view of some tables, built on first use. invalidate() makes the next
+    # request rebuild it; max_age_sec bounds how long changes made through other
+    # worker processes can stay unseen.
+    def __init__(self, max_age_sec: float) -> None:
+        self._max_age_sec = max_age_sec
+        self._generation = 0
+        self._loaded_generation: int | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_generation == self._generation and time.monotonic() - self._loaded_at < self._max_age_sec
+
+    def _mark_loaded(self, generation: int) -> None:
+        self._loaded_generation = generation
+        self._loaded_at = time.monotonic()
+
+    async def ensure_loaded(self) -> None:
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            # An invalidate() arriving while the build runs leaves the result stale.
+            generation = self._generation
+            await self._build()
+            self._mark_loaded(generation)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+
+    @abstractmethod
+    async def _build(self) -> None:
+        ...
@@ -0,0 +1,102 @@
+"""Readiness of this process, probed in the background.
+
+The prober started by the application lifespan checks the database every
+READINESS_PROBE_INTERVAL_SEC on a bare connection (no session, no commit) and
+keeps the result, so /readyz and /healthcheck cost no database work however
+often they are polled. A probe that takes longer than READINESS_PROBE_TIMEOUT_SEC
+fails. So does one that finds at least READINESS_MAX_POOL_SATURATION of the
+pool's connections in use, without waiting for a connection: a process starved
+for connections reports itself not ready and can be taken out of rotation until
+it catches up.
+
+A result older than three intervals (no prober running, as in scripts that skip
+the lifespan) is replaced by a probe made on the spot; one probe at a time.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import asdict
+
+from sqlalchemy import select, true
+
+from project.core.config import settings
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.pool import PoolStats
+from project.schemas.healthcheck import PoolStatsSchema, ReadinessSchema
+
+
+logger = logging.getLogger(__name__)
+
+
+def pool_saturation(pool: PoolStats) -> float:
+    capacity = pool.size + pool.max_overflow
+    return pool.checked_out / capacity if capacity else 1.0
+
+
+class ReadinessProber:
+    def __init__(
+        self,
+        interval_sec: float = settings.READINESS_PROBE_INTERVAL_SEC,
+        timeout_sec: float = settings.READINESS_PROBE_TIMEOUT_SEC,
+        max_pool_saturation: float = settings.READINESS_MAX_POOL_SATURATION,
+    ) -> None:
+        self._interval_sec = interval_sec
+        self._timeout_sec = timeout_sec
+        self._max_pool_saturation = max_pool_saturation
+        self._status: ReadinessSchema | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._status is not None and time.monotonic() - self._checked_at < 3 * self._interval_sec
+
+    async def _probe(self) -> None:
+        pool = database.pool_stats()
+        saturation = pool_saturation(pool)
+        if saturation >= self._max_pool_saturation:
+            # Waiting for a connection would only add to the shortage; the database itself was fine last time.
+            db_is_ok = self._status is not None and self._status.db_is_ok
+            error = f"{pool.checked_out} of {pool.size + pool.max_overflow} database connections in use"
+        else:
+            db_is_ok, error = await self._check_database()
+        if error is not None and (self._status is None or self._status.ready):
+            logger.warning("Not ready: %s", error)
+        self._status = ReadinessSchema(
+            ready=error is None,
+            db_is_ok=db_is_ok,
+            pool_saturation=saturation,
+            pool=PoolStatsSchema.model_validate(asdict(pool)),
+            checked_sec_ago=0.0,
+            error=error,
+        )
+        self._checked_at = time.monotonic()
+
+    async def _check_database(self) -> tuple[bool, str | None]:
+        try:
+            async with asyncio.timeout(self._timeout_sec):
+                async with database.engine.connect() as connection:
+                    await connection.execute(select(true()))
+        except TimeoutError:
+            return False, f"The database did not answer within {self._timeout_sec} s"
+        except Exception as error:
+            return False, repr(error)
+        return True, None
+
+    async def probe(self) -> None:
+        async with self._lock:
+            await self._probe()
+
+    async def run(self) -> None:
+        while True:
+            await self.probe()
+            await asyncio.sleep(self._interval_sec)
+
+    async def status(self) -> ReadinessSchema:
+        if not self._is_fresh():
+            async with self._lock:
+                if not self._is_fresh():
+                    await self._probe()
+        return self._status.model_copy(update={"checked_sec_ago": time.monotonic() - self._checked_at})
+
+
+readiness_prober = ReadinessProber()
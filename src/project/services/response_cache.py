@@ -0,0 +1,100 @@
+"""Serialized reference-data responses with strong ETags.
+
+Entries are grouped in namespaces named after the table they are read from
+("companies", "routes", "stops", "route_stops"). Handlers that write a table call
+invalidate() with its namespace, which moves the namespace to a new version; entries
+of an older version are never served again. max_age_sec bounds how long a write made
+through another worker process can go unseen, as it does for the indexes.
+
+The ETag is a hash of the body, so every worker tags the same content alike and a
+client revalidating with If-None-Match gets a 304 whichever worker answers.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Response, status
+from pydantic import BaseModel
+
+from project.core.config import settings
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    version: int
+    stored_at: float
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    # If-None-Match compares weakly: W/"x" matches "x".
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = settings.RESPONSE_CACHE_MAX_ENTRIES,
+        max_age_sec: float = settings.RESPONSE_CACHE_MAX_AGE_SEC,
+    ) -> None:
+        self._max_entries = max_entries
+        self._max_age_sec = max_age_sec
+        self._versions: dict[str, int] = {}
+        self._entries: OrderedDict[tuple[str, Hashable], CachedBody] = OrderedDict()
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] in namespaces]:
+            del self._entries[entry_key]
+
+    def _lookup(self, namespace: str, key: Hashable) -> CachedBody | None:
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        if entry.version != self._versions.get(namespace, 0) or time.monotonic() - entry.stored_at >= self._max_age_sec:
+            del self._entries[(namespace, key)]
+            return None
+        self._entries.move_to_end((namespace, key))
+        return entry
+
+    def _store(self, namespace: str, key: Hashable, entry: CachedBody) -> None:
+        self._entries[(namespace, key)] = entry
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def respond(
+        self,
+        namespace: str,
+        key: Hashable,
+        load: Callable[[], Awaitable[BaseModel]],
+        if_none_match: str | None = None,
+    ) -> Response:
+        """The body load() gives for key, from the cache when it holds a current one; a 304 if the client has it."""
+        entry = self._lookup(namespace, key)
+        if entry is None:
+            version = self._versions.get(namespace, 0)
+            body = (await load()).model_dump_json().encode()
+            entry = CachedBody(version=version, stored_at=time.monotonic(), body=body, etag=make_etag(body))
+            # A write that finished during load() may be missing from the body: serve it, but do not keep it.
+            if version == self._versions.get(namespace, 0):
+                self._store(namespace, key, entry)
+        # Clients may keep the body but must revalidate it, since any write can change it.
+        headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(if_none_match, entry.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache()
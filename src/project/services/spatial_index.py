@@ -0,0 +1,107 @@
+import heapq
+import math
+from typing import Iterable
+
+from project.core.config import settings
+from project.schemas.stop import NearbyStopSchema, StopSchema
+from project.infrastructure.postgres.database import database
+from project.infrastructure.postgres.repository.stop_repo import StopRepository
+from project.services.loaded_index import LoadedIndex
+
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class StopSpatialIndex(LoadedIndex):
+    # Uniform grid over (latitude, longitude): a radius query only looks at the
+    # cells its bounding box touches. Kept in step with create/update/delete_stop
+    # of this process between rebuilds.
+    def __init__(self, cell_deg: float = settings.STOP_INDEX_CELL_DEG, max_age_sec: float = settings.STOP_INDEX_MAX_AGE_SEC) -> None:
+        super().__init__(max_age_sec=max_age_sec)
+        self._cell_deg = cell_deg
+        self._stops: dict[tuple[float, float], StopSchema] = {}
+        self._cells: dict[tuple[int, int], set[tuple[float, float]]] = {}
+        self._repo = StopRepository()
+
+    def __len__(self) -> int:
+        return len(self._stops)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self._cell_deg), math.floor(longitude / self._cell_deg)
+
+    def __contains__(self, coordinates: tuple[float, float]) -> bool:
+        return coordinates in self._stops
+
+    def load(self, stops: Iterable[StopSchema]) -> None:
+        self._stops.clear()
+        self._cells.clear()
+        for stop in stops:
+            self.add(stop)
+        self._mark_loaded(self._generation)
+
+    async def _build(self) -> None:
+        stops = []
+        async with database.session() as session:
+            result = await self._repo.stream_all_stops(session=session, chunk_size=settings.STREAM_CHUNK_SIZE)
+            async for row in result.mappings():
+                stops.append(StopSchema.model_validate(row))
+        self.load(stops)
+
+    def add(self, stop: StopSchema) -> None:
+        key = (stop.latitude, stop.longitude)
+        self._stops[key] = stop
+        self._cells.setdefault(self._cell(*key), set()).add(key)
+
+    def remove(self, latitude: float, longitude: float) -> None:
+        key = (latitude, longitude)
+        if self._stops.pop(key, None) is None:
+            return
+        cell = self._cell(*key)
+        self._cells[cell].discard(key)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def get(self, latitude: float, longitude: float) -> StopSchema | None:
+        return self._stops.get((latitude, longitude))
+
+    def within(self, latitude: float, longitude: float, radius_m: float) -> list[tuple[float, float, float]]:
+        # (distance_m, latitude, longitude) of every stop within radius_m, unordered.
+        d_latitude = radius_m / METERS_PER_DEGREE
+        # Longitude degrees shrink towards the poles; near them the box spans every longitude.
+        cos_latitude = math.cos(math.radians(min(abs(latitude) + d_latitude, 90.0)))
+        d_longitude = 180.0 if cos_latitude < 1e-9 else min(180.0, d_latitude / cos_latitude)
+
+        min_row, min_column = self._cell(latitude - d_latitude, longitude - d_longitude)
+        max_row, max_column = self._cell(latitude + d_latitude, longitude + d_longitude)
+        if (max_row - min_row + 1) * (max_column - min_column + 1) > len(self._cells):
+            cells = self._cells.values()
+        else:
+            cells = (
+                self._cells.get((row, column), ())
+                for row in range(min_row, max_row + 1)
+                for column in range(min_column, max_column + 1)
+            )
+        found = []
+        for keys in cells:
+            for stop_latitude, stop_longitude in keys:
+                distance = haversine_m(latitude, longitude, stop_latitude, stop_longitude)
+                if distance <= radius_m:
+                    found.append((distance, stop_latitude, stop_longitude))
+        return found
+
+    def nearby(self, latitude: float, longitude: float, radius_m: float, limit: int) -> list[NearbyStopSchema]:
+        return [
+            NearbyStopSchema(**self._stops[(stop_latitude, stop_longitude)].model_dump(), distance_m=round(distance, 1))
+            for distance, stop_latitude, stop_longitude in heapq.nsmallest(limit, self.within(latitude, longitude, radius_m))
+        ]
+
+stop_index = StopSpatialIndex()
@@ -0,0 +1,127 @@
+import heapq
+from dataclasses import dataclass
+from datetime import time
+from itertools import chain
+from typing import Iterable, Iterator
+
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def time_to_seconds(value: time | None) -> int | None:
+    if value is None:
+        return None
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def seconds_to_time(seconds: int | None) -> time | None:
+    # Service times past midnight (e.g. 25:10 in GTFS) wrap onto the next day's clock.
+    if seconds is None:
+        return None
+    seconds %= SECONDS_PER_DAY
+    return time(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+def unwrap_pattern(times: Iterable[tuple[int | None, int | None]]) -> list[tuple[int | None, int | None]]:
+    # (arrival, departure) of a route's stops in route order. StopTime holds clock times,
+    # so a time earlier than the one before it means the route crossed midnight.
+    unwrapped, previous, shift = [], None, 0
+    for stop_times in times:
+        values = []
+        for value in stop_times:
+            if value is not None:
+                value += shift
+                if previous is not None and value < previous:
+                    shift += SECONDS_PER_DAY
+                    value += SECONDS_PER_DAY
+                previous = value
+            values.append(value)
+        unwrapped.append((values[0], values[1]))
+    return unwrapped
+
+
+def _first_index_at_or_after(progression: range, at: int) -> int:
+    if at <= progression.start:
+        return 0
+    return min(len(progression), -(-(at - progression.start) // progression.step))
+
+
+@dataclass(frozen=True)
+class Headway:
+    """Departures of a frequency-based route from its first stop: every interval
+    seconds from first to last inclusive. last may exceed a day for service that
+    runs past midnight. Nothing is materialized; every query is arithmetic on ranges."""
+
+    first: int
+    last: int
+    interval: int
+
+    @classmethod
+    def from_route(cls, first_adv: time | None, last_adv: time | None, interval: time | None) -> "Headway | None":
+        if first_adv is None or last_adv is None or interval is None:
+            return None
+        step = time_to_seconds(interval)
+        if step <= 0:
+            return None
+        first, last = time_to_seconds(first_adv), time_to_seconds(last_adv)
+        if last < first:
+            last += SECONDS_PER_DAY
+        return cls(first=first, last=last, interval=step)
+
+    @property
+    def departures(self) -> range:
+        return range(self.first, self.last + 1, self.interval)
+
+    def __len__(self) -> int:
+        return len(self.departures)
+
+    def window(self, start: int, end: int) -> range:
+        # Departures in [start, end], in service-day seconds; O(1) to build, O(results) to iterate.
+        departures = self.departures
+        return departures[_first_index_at_or_after(departures, start):_first_index_at_or_after(departures, end + 1)]
+
+    def clock_window(self, start: int, end: int) -> Iterator[int]:
+        # Departures whose clock time is in [start, end], end >= start (past SECONDS_PER_DAY
+        # when the window crosses midnight): the service-day window, then the same window
+        # a day later for the part of the service that runs past midnight.
+        departures = self.window(start, end)
+        if end - start >= SECONDS_PER_DAY:
+            return iter(departures)
+        return chain(departures, self.window(start + SECONDS_PER_DAY, end + SECONDS_PER_DAY))
+
+    def next_departure(self, at: int) -> int | None:
+        departures = self.departures
+        index = _first_index_at_or_after(departures, at)
+        return departures[index] if index < len(departures) else None
+
+    def _daily(self) -> list[range]:
+        # The same departures as clock times within one day: the part past midnight folds back.
+        departures = self.departures
+        split = _first_index_at_or_after(departures, SECONDS_PER_DAY)
+        head, tail = departures[:split], departures[split:]
+        daily = [head]
+        if tail:
+            daily.append(range(tail.start - SECONDS_PER_DAY, tail.stop - SECONDS_PER_DAY, tail.step))
+        return daily
+
+    def upcoming(self, after: int) -> Iterator[int]:
+        """Clock-time departures from after onwards, cycling into the following days;
+        values only grow (past SECONDS_PER_DAY) so they merge with other sorted streams."""
+        day, clock = divmod(after, SECONDS_PER_DAY)
+        base = day * SECONDS_PER_DAY
+        streams = []
+        for progression in self._daily():
+            split = _first_index_at_or_after(progression, clock)
+            streams.append(_cycle(progression, split, base))
+        return heapq.merge(*streams)
+
+
+def _cycle(progression: range, split: int, base: int) -> Iterator[int]:
+    if not progression:
+        return
+    while True:
+        for value in progression[split:]:
+            yield base + value
+        base += SECONDS_PER_DAY
+        for value in progression[:split]:
+            yield base + value
@@ -0,0 +1,155 @@
+"""Double-booking checks for drivers and buses.
+
+A trip occupies its driver and its bus over [start_time, end_time) of its trip_date;
+an end_time before start_time means the trip runs past midnight. Trips without a
+trip_date run every day, so they share the day of every dated trip. Trips missing
+either time occupy nothing and are not checked. Overlaps are only looked for within
+a day: a trip running past midnight is not compared with the next day's trips.
+"""
+import heapq
+from bisect import bisect_left
+from datetime import date, time
+from typing import Generic, Iterable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.core.exceptions import TripConflict
+from project.schemas.trip import TripConflictSchema, TripCreateUpdateSchema
+from project.infrastructure.postgres.repository.trip_repo import TripRepository
+from project.services.timetable import SECONDS_PER_DAY, time_to_seconds
+
+
+T = TypeVar("T")
+
+# (resource, TripCreateUpdateSchema field, name in error messages)
+RESOURCES = (("driver", "driver_passport", "Водитель"), ("bus", "gos_num", "Автобус"))
+
+
+def trip_interval(start_time: time | None, end_time: time | None) -> tuple[int, int] | None:
+    start, end = time_to_seconds(start_time), time_to_seconds(end_time)
+    if start is None or end is None:
+        return None
+    if end < start:
+        end += SECONDS_PER_DAY
+    return start, end
+
+
+class IntervalIndex(Generic[T]):
+    """Intervals sorted by start together with the running maximum of their ends: the
+    static form of an interval tree. A query bisects for the intervals starting before
+    its end and walks back only while one of them can still reach past its start."""
+
+    def __init__(self, intervals: Iterable[tuple[int, int, T]]) -> None:
+        self._intervals = sorted(intervals, key=lambda interval: interval[0])
+        self._starts = [start for start, _, _ in self._intervals]
+        self._max_ends: list[int] = []
+        max_end = None
+        for _, end, _ in self._intervals:
+            max_end = end if max_end is None else max(max_end, end)
+            self._max_ends.append(max_end)
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def overlapping(self, start: int, end: int) -> list[T]:
+        found = []
+        position = bisect_left(self._starts, end) - 1
+        while position >= 0 and self._max_ends[position] > start:
+            other_start, other_end, item = self._intervals[position]
+            if other_end > start and other_start < end:
+                found.append(item)
+            position -= 1
+        return found
+
+
+def find_overlaps(intervals: Iterable[tuple[int, int, T]]) -> list[tuple[T, T]]:
+    # Sweep by start keeping a heap of the intervals still running:
+    # O(n log n) plus the number of overlapping pairs.
+    overlaps = []
+    running: list[tuple[int, int, T]] = []
+    for order, (start, end, item) in enumerate(sorted(intervals, key=lambda interval: interval[0])):
+        while running and running[0][0] <= start:
+            heapq.heappop(running)
+        overlaps.extend((other, item) for _, _, other in running)
+        heapq.heappush(running, (end, order, item))
+    return overlaps
+
+
+def find_conflicts(trips: Iterable[tuple[int | None, int | None, TripCreateUpdateSchema]]) -> list[TripConflictSchema]:
+    """Overlapping pairs among (trip_id, row, trip) entries, per driver or bus and day."""
+    # (resource, key) -> trip_date -> [(start, end, (trip_id, row, trip_date))]
+    days: dict[tuple[str, str], dict[date | None, list[tuple[int, int, tuple]]]] = {}
+    for trip_id, row, trip in trips:
+        interval = trip_interval(trip.start_time, trip.end_time)
+        if interval is None:
+            continue
+        for resource, field, _ in RESOURCES:
+            key = getattr(trip, field)
+            if key is not None:
+                days.setdefault((resource, key), {}).setdefault(trip.trip_date, []).append((*interval, (trip_id, row, trip.trip_date)))
+
+    conflicts = []
+    for (resource, key), by_date in days.items():
+        daily = by_date.get(None, [])
+        for trip_date, intervals in by_date.items():
+            if trip_date is not None:
+                intervals = intervals + daily
+            for first, second in find_overlaps(intervals):
+                # Two daily trips are reported once, for the daily group itself.
+                if trip_date is not None and first[2] is None and second[2] is None:
+                    continue
+                conflicts.append(TripConflictSchema(
+                    resource=resource,
+                    key=key,
+                    trip_date=trip_date,
+                    trip_id=first[0],
+                    row=first[1],
+                    other_trip_id=second[0],
+                    other_row=second[1],
+                ))
+    return conflicts
+
+
+class TripConflictChecker:
+    def __init__(self) -> None:
+        self._repo = TripRepository()
+
+    async def check(self, session: AsyncSession, trip: TripCreateUpdateSchema, trip_id: int | None = None) -> None:
+        """Raise TripConflict if the driver or the bus of trip is busy at its time.
+
+        The driver and the bus stay locked until the transaction ends, so two
+        concurrent writes cannot both pass the check.
+        """
+        interval = trip_interval(trip.start_time, trip.end_time)
+        if interval is None:
+            return
+        resources = [(resource, field, name, getattr(trip, field)) for resource, field, name in RESOURCES if getattr(trip, field) is not None]
+        await self._repo.lock_trip_resources(session=session, keys=[f"{resource}:{key}" for resource, _, _, key in resources])
+        for resource, field, name, key in resources:
+            booked = await self._repo.get_resource_trips(
+                session=session, field=field, key=key, trip_date=trip.trip_date, exclude_trip_id=trip_id,
+            )
+            index = IntervalIndex(
+                (*other_interval, other.trip_id)
+                for other in booked
+                if (other_interval := trip_interval(other.start_time, other.end_time)) is not None
+            )
+            overlapping = index.overlapping(*interval)
+            if overlapping:
+                raise TripConflict(resource=name, key=key, trip_id=min(overlapping))
+
+    async def find_day_conflicts(self, session: AsyncSession, trip_date: date) -> list[TripConflictSchema]:
+        trips = await self._repo.get_trips_for_dates(session=session, trip_dates={trip_date})
+        return find_conflicts((trip.trip_id, None, trip) for trip in trips)
+
+    async def validate(self, session: AsyncSession, trips: list[TripCreateUpdateSchema]) -> list[TripConflictSchema]:
+        # Conflicts of the submitted trips with each other and with the stored ones.
+        stored = await self._repo.get_trips_for_dates(session=session, trip_dates={trip.trip_date for trip in trips})
+        conflicts = find_conflicts([
+            *((stored_trip.trip_id, None, stored_trip) for stored_trip in stored),
+            *((None, row, trip) for row, trip in enumerate(trips)),
+        ])
+        return [conflict for conflict in conflicts if conflict.row is not None or conflict.other_row is not None]
+
+
+trip_conflicts = TripConflictChecker()
@@ -0,0 +1,234 @@
+"""Production entry point: a pre-forking supervisor around uvicorn.
+
+The parent binds the listening socket, imports the application once and, with
+WEB_PRELOAD_INDEXES, builds the in-memory indexes. It then forks WEB_WORKERS
+workers (0: one per available CPU) that accept on the shared socket and share the
+preloaded modules and indexes copy-on-write. Workers run on uvloop and httptools
+when these are installed, on asyncio and h11 otherwise.
+
+The parent starts a new worker whenever one exits. On SIGHUP it replaces the
+workers one at a time; the code is not reloaded, that takes a restart of the
+parent. On SIGTERM or SIGINT every worker stops accepting and gets
+WEB_GRACEFUL_TIMEOUT_SEC to finish its requests.
+
+The connections of all workers together stay within POSTGRES_MAX_CONNECTIONS
+less POSTGRES_RESERVED_CONNECTIONS (left for migrations and psql). With several
+containers on one database, POSTGRES_MAX_CONNECTIONS is the share of one
+container. Each worker gets an equal part as pool size plus overflow, capped by
+POSTGRES_POOL_SIZE and POSTGRES_MAX_OVERFLOW.
+
+Background jobs run on the worker that started them and are kept in the jobs
+table, so any worker reports them; the progress seen on the other workers lags by
+up to JOB_PROGRESS_SAVE_SEC. With AUTH_STATELESS, a revoked token keeps working on
+the other workers for up to AUTH_REVOCATION_TTL_SEC.
+
+    python src/serve.py [--workers N]
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import uvicorn
+
+from project.core.config import settings
+from project.core.metrics import Histogram
+
+
+logger = logging.getLogger("uvicorn.error")
+
+HANDLED_SIGNALS = {signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD}
+# Workers that exit sooner than this after starting are restarted only after a pause.
+MIN_WORKER_UPTIME_SEC = 1.0
+# Time for the lifespan shutdown once a worker's connections are drained.
+KILL_GRACE_SEC = 5.0
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_pool_limits(workers: int, max_connections: int, reserved: int, pool_size: int, max_overflow: int) -> tuple[int, int]:
+    """(pool_size, max_overflow) for each worker, so that all workers together stay within max_connections - reserved."""
+    share = (max_connections - reserved) // workers
+    if share < 1:
+        raise ValueError(f"{workers} workers cannot each get a connection out of {max_connections - reserved}")
+    pool_size = min(pool_size, share)
+    return pool_size, min(max_overflow, share - pool_size)
+
+
+class Supervisor:
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int, graceful_timeout_sec: float) -> None:
+        self._config = config
+        self._sock = sock
+        self._workers = workers
+        self._graceful_timeout_sec = graceful_timeout_sec
+        self._children: dict[int, float] = {}
+        self._retiring: set[int] = set()
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self._children[pid] = time.monotonic()
+        logger.info("Started worker [%d]", pid)
+
+    def _run_worker(self) -> None:
+        signal.pthread_sigmask(signal.SIG_SETMASK, set())
+        for signum in HANDLED_SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        from project.infrastructure.postgres.database import database
+
+        # Connections opened by the parent belong to it; the worker starts with a pool of its own.
+        database.engine.sync_engine.dispose(close=False)
+        # Checkout waits measured in the parent are not this worker's.
+        database.engine.pool.checkout_wait = Histogram()
+        server = uvicorn.Server(config=self._config)
+        try:
+            server.run(sockets=[self._sock])
+        finally:
+            os._exit(0 if server.started else 3)
+
+    def _reap(self) -> list[tuple[int, float]]:
+        exited = []
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started_at = self._children.pop(pid, None)
+            if started_at is None:
+                continue
+            self._retiring.discard(pid)
+            logger.info("Worker [%d] exited with code %d", pid, os.waitstatus_to_exitcode(status))
+            exited.append((pid, started_at))
+        return exited
+
+    def _wait_for(self, pids: set[int], timeout_sec: float) -> None:
+        # Sends SIGKILL to whichever of pids is still running after timeout_sec.
+        deadline = time.monotonic() + timeout_sec
+        while pids & self._children.keys() and time.monotonic() < deadline:
+            for pid, _ in self._reap():
+                if pid not in pids:
+                    self._spawn()
+            time.sleep(0.1)
+        for pid in pids & self._children.keys():
+            logger.warning("Killing worker [%d], still running after %.0f s", pid, timeout_sec)
+            os.kill(pid, signal.SIGKILL)
+        while pids & self._children.keys():
+            self._reap()
+            time.sleep(0.1)
+
+    def _restart_all(self) -> None:
+        for pid in list(self._children):
+            if pid in self._retiring:
+                continue
+            self._spawn()
+            self._retiring.add(pid)
+            os.kill(pid, signal.SIGTERM)
+            self._wait_for({pid}, self._graceful_timeout_sec + KILL_GRACE_SEC)
+
+    def _stop(self) -> None:
+        for pid in self._children:
+            os.kill(pid, signal.SIGTERM)
+        self._wait_for(set(self._children), self._graceful_timeout_sec + KILL_GRACE_SEC)
+
+    def run(self) -> None:
+        # Signals are taken synchronously below, so none of them interrupts a fork or a wait.
+        signal.pthread_sigmask(signal.SIG_BLOCK, HANDLED_SIGNALS)
+        for _ in range(self._workers):
+            self._spawn()
+        while True:
+            received = signal.sigtimedwait(HANDLED_SIGNALS, 1.0)
+            if received is not None and received.si_signo in (signal.SIGTERM, signal.SIGINT):
+                logger.info("Stopping %d workers", len(self._children))
+                self._stop()
+                return
+            if received is not None and received.si_signo == signal.SIGHUP:
+                logger.info("Restarting %d workers", len(self._children))
+                self._restart_all()
+            for _, started_at in self._reap():
+                if time.monotonic() - started_at < MIN_WORKER_UPTIME_SEC:
+                    time.sleep(MIN_WORKER_UPTIME_SEC)
+                self._spawn()
+
+
+async def preload_indexes() -> None:
+    from project.infrastructure.postgres.database import database
+    from project.services.indexes import warm_up_indexes
+
+    await warm_up_indexes()
+    # The connections used for the build are closed here, before any worker exists.
+    await database.engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS, help="0: one per available CPU")
+    args = parser.parse_args()
+    workers = args.workers or available_cpus()
+
+    try:
+        settings.POSTGRES_POOL_SIZE, settings.POSTGRES_MAX_OVERFLOW = worker_pool_limits(
+            workers=workers,
+            max_connections=settings.POSTGRES_MAX_CONNECTIONS,
+            reserved=settings.POSTGRES_RESERVED_CONNECTIONS,
+            pool_size=settings.POSTGRES_POOL_SIZE,
+            max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+        )
+    except ValueError as error:
+        sys.exit(str(error))
+
+    # Workers share their metrics through files in METRICS_DIR; left over ones are from an earlier run.
+    metrics_dir_is_temporary = not settings.METRICS_DIR
+    if metrics_dir_is_temporary:
+        settings.METRICS_DIR = tempfile.mkdtemp(prefix="metrics-")
+    for path in Path(settings.METRICS_DIR).glob("*.json"):
+        path.unlink()
+
+    # The engine reads the pool settings when the application is imported.
+    from main import app
+
+    config = uvicorn.Config(
+        app,
+        host=settings.WEB_HOST,
+        port=settings.WEB_PORT,
+        loop="auto",
+        http="auto",
+        lifespan="on",
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT_SEC,
+    )
+    sock = config.bind_socket()
+    if settings.WEB_PRELOAD_INDEXES:
+        asyncio.run(preload_indexes())
+
+    logger.info(
+        "Starting %d workers (loop: %s, http: %s, database pool: %d + %d overflow each)",
+        workers,
+        "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "httptools" if importlib.util.find_spec("httptools") else "h11",
+        settings.POSTGRES_POOL_SIZE,
+        settings.POSTGRES_MAX_OVERFLOW,
+    )
+    try:
+        Supervisor(config=config, sock=sock, workers=workers, graceful_timeout_sec=settings.WEB_GRACEFUL_TIMEOUT_SEC).run()
+    finally:
+        sock.close()
+        if metrics_dir_is_temporary:
+            shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
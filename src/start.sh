@@ -2,4 +2,4 @@
 
 SCRIPT_DIR=$(dirname "$0")
 alembic upgrade head
-python "${SCRIPT_DIR}/main.py"
\ No newline at end of file
+exec python "${SCRIPT_DIR}/serve.py"
\ No newline at end of file